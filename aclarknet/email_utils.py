@@ -1,7 +1,34 @@
-"""Email utilities for improved deliverability and authentication."""
+"""Email utilities for improved deliverability and authentication.
+
+Mail sent while handling a request should be queued with
+:func:`queue_email_with_headers` or :func:`queue_notification_email`. Queued
+messages are stored in the ``OutboxEmail`` collection and delivered by the
+``send_outbox`` management command (see :func:`send_outbox`), so a slow SES
+or SMTP relay never holds a web worker.
+"""
+
+from datetime import timedelta
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+
+def get_email_headers(from_email, reply_to=None):
+    """
+    Return the headers added to every outgoing email.
+
+    These help with:
+    - Email authentication (SPF, DKIM, DMARC)
+    - Spam filtering
+    - Gmail warning prevention
+    """
+    return {
+        "Reply-To": reply_to or from_email,
+        "X-Mailer": "aclark.net",
+        "X-Auto-Response-Suppress": "OOF, AutoReply",  # Suppress auto-replies
+        "Precedence": "bulk",  # Indicate this is automated mail
+    }
 
 
 def send_email_with_headers(
@@ -16,10 +43,9 @@ def send_email_with_headers(
     """
     Send email with proper headers for better deliverability and authentication.
 
-    This function adds headers that help with:
-    - Email authentication (SPF, DKIM, DMARC)
-    - Spam filtering
-    - Gmail warning prevention
+    This sends immediately; inside a request prefer
+    :func:`queue_email_with_headers`. See :func:`get_email_headers` for the
+    headers added.
 
     Args:
         subject: Email subject line
@@ -36,16 +62,8 @@ def send_email_with_headers(
     if from_email is None:
         from_email = settings.DEFAULT_FROM_EMAIL
 
-    if reply_to is None:
-        reply_to = from_email
-
     # Prepare headers for better deliverability
-    headers = {
-        "Reply-To": reply_to,
-        "X-Mailer": "aclark.net",
-        "X-Auto-Response-Suppress": "OOF, AutoReply",  # Suppress auto-replies
-        "Precedence": "bulk",  # Indicate this is automated mail
-    }
+    headers = get_email_headers(from_email, reply_to)
 
     # Create email message
     email = EmailMultiAlternatives(
@@ -100,3 +118,184 @@ def send_notification_email(
         from_email=from_email,
         fail_silently=False,
     )
+
+
+def queue_email_with_headers(
+    subject,
+    plain_message,
+    recipient_list,
+    html_message=None,
+    from_email=None,
+    reply_to=None,
+):
+    """
+    Queue an email for delivery by the ``send_outbox`` worker.
+
+    Takes the same arguments as :func:`send_email_with_headers` but only
+    stores the rendered message, so it is cheap to call inside a request.
+    When called inside a transaction the message is only delivered if the
+    transaction commits.
+
+    Returns:
+        The queued OutboxEmail instance
+    """
+    from db.models import OutboxEmail
+
+    if from_email is None:
+        from_email = settings.DEFAULT_FROM_EMAIL
+
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=plain_message,
+        html_body=html_message,
+        from_email=from_email,
+        to=list(recipient_list),
+        headers=get_email_headers(from_email, reply_to),
+    )
+
+
+def queue_notification_email(
+    subject,
+    plain_message,
+    html_message=None,
+    from_email=None,
+    recipient_email=None,
+):
+    """
+    Queue a notification email to the site admin.
+
+    The queued counterpart of :func:`send_notification_email`.
+
+    Returns:
+        The queued OutboxEmail instance
+    """
+    if from_email is None:
+        from_email = settings.DEFAULT_FROM_EMAIL
+
+    if recipient_email is None:
+        recipient_email = settings.DEFAULT_FROM_EMAIL
+
+    return queue_email_with_headers(
+        subject=subject,
+        plain_message=plain_message,
+        recipient_list=[recipient_email],
+        html_message=html_message,
+        from_email=from_email,
+    )
+
+
+def _claim_outbox_batch(batch_size, now):
+    """Claim up to ``batch_size`` due messages and return them.
+
+    Each message is claimed with a conditional update, so concurrent workers
+    never deliver the same message twice. Messages left in ``sending`` by a
+    worker that died are released once EMAIL_OUTBOX_CLAIM_TIMEOUT passes.
+    """
+    from db.models import OutboxEmail
+
+    stale = now - timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+    OutboxEmail.objects.filter(
+        status=OutboxEmail.STATUS_SENDING, claimed_at__lt=stale
+    ).update(status=OutboxEmail.STATUS_PENDING)
+
+    due = OutboxEmail.objects.filter(
+        status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now
+    ).order_by("next_attempt_at")
+    claimed = [
+        pk
+        for pk in due.values_list("pk", flat=True)[:batch_size]
+        if OutboxEmail.objects.filter(pk=pk, status=OutboxEmail.STATUS_PENDING).update(
+            status=OutboxEmail.STATUS_SENDING, claimed_at=now
+        )
+    ]
+    return list(OutboxEmail.objects.filter(pk__in=claimed))
+
+
+def _record_failure(outbox_email, error, now):
+    """Schedule a retry with exponential backoff, or give up.
+
+    Returns ``"retried"`` or ``"failed"``.
+    """
+    from db.models import OutboxEmail
+
+    outbox_email.attempts += 1
+    outbox_email.last_error = str(error) or error.__class__.__name__
+    if outbox_email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        outbox_email.status = OutboxEmail.STATUS_FAILED
+    else:
+        outbox_email.status = OutboxEmail.STATUS_PENDING
+        delay = settings.EMAIL_OUTBOX_RETRY_BACKOFF * 2 ** (outbox_email.attempts - 1)
+        outbox_email.next_attempt_at = now + timedelta(seconds=delay)
+    outbox_email.save(
+        update_fields=["attempts", "last_error", "status", "next_attempt_at"]
+    )
+    if outbox_email.status == OutboxEmail.STATUS_FAILED:
+        return "failed"
+    return "retried"
+
+
+def send_outbox(batch_size=None):
+    """
+    Deliver one batch of queued emails over a single connection.
+
+    Messages that fail are retried with exponential backoff (starting at
+    EMAIL_OUTBOX_RETRY_BACKOFF seconds) and marked failed after
+    EMAIL_OUTBOX_MAX_ATTEMPTS attempts. The backend is EMAIL_OUTBOX_BACKEND
+    if set, otherwise EMAIL_BACKEND.
+
+    Args:
+        batch_size: Maximum number of messages to send
+            (defaults to EMAIL_OUTBOX_BATCH_SIZE)
+
+    Returns:
+        Dict with the number of messages ``sent``, ``retried`` and ``failed``
+    """
+    from db.models import OutboxEmail
+
+    if batch_size is None:
+        batch_size = settings.EMAIL_OUTBOX_BATCH_SIZE
+
+    now = timezone.now()
+    counts = {"sent": 0, "retried": 0, "failed": 0}
+    batch = _claim_outbox_batch(batch_size, now)
+    if not batch:
+        return counts
+
+    connection = get_connection(settings.EMAIL_OUTBOX_BACKEND, fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for outbox_email in batch:
+            counts[_record_failure(outbox_email, e, now)] += 1
+        return counts
+
+    try:
+        for outbox_email in batch:
+            email = EmailMultiAlternatives(
+                subject=outbox_email.subject,
+                body=outbox_email.body,
+                from_email=outbox_email.from_email,
+                to=outbox_email.to,
+                headers=outbox_email.headers,
+                connection=connection,
+            )
+            if outbox_email.html_body:
+                email.attach_alternative(outbox_email.html_body, "text/html")
+            try:
+                if not email.send():
+                    raise RuntimeError("Email backend did not accept the message")
+            except Exception as e:
+                counts[_record_failure(outbox_email, e, now)] += 1
+                continue
+            outbox_email.attempts += 1
+            outbox_email.status = OutboxEmail.STATUS_SENT
+            outbox_email.sent_at = timezone.now()
+            outbox_email.last_error = None
+            outbox_email.save(
+                update_fields=["attempts", "status", "sent_at", "last_error"]
+            )
+            counts["sent"] += 1
+    finally:
+        connection.close()
+
+    return counts
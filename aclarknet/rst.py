@@ -0,0 +1,77 @@
+"""Stored HTML for reStructuredText bodies.
+
+Blog entries and now page entries are written in RST. Rendering with
+docutils takes tens of milliseconds for a long post, so the HTML is
+rendered on save and stored in ``body_html``, next to ``body_hash``, a hash
+of the body it came from. :meth:`RenderedBodyMixin.render_body` serves the
+stored HTML while the hash still matches the body. When it doesn't match,
+for example after a ``QuerySet.update()``, it renders the body again.
+``manage.py rerender_posts`` refreshes stale rows in bulk.
+
+This module doesn't import Django models, so :func:`render_many` can run
+in worker processes.
+"""
+
+import hashlib
+
+# Part of every hash: bump it when the rendering settings change, so
+# rerender_posts regenerates every stored body
+RENDER_VERSION = "1"
+
+SETTINGS_OVERRIDES = {"initial_header_level": 2}
+
+
+def get_body_hash(body):
+    """Return the hash stored with the HTML rendered from ``body``."""
+    digest = hashlib.sha256(f"{RENDER_VERSION}\n{body or ''}".encode())
+    return digest.hexdigest()
+
+
+def render_rst(body):
+    """Render an RST body to HTML, falling back to plain text."""
+    try:
+        from docutils.core import publish_parts
+
+        parts = publish_parts(
+            source=body,
+            writer_name="html",
+            settings_overrides=SETTINGS_OVERRIDES,
+        )
+        return parts["body"]
+    except Exception:
+        return body
+
+
+def render_many(rows):
+    """Render ``(pk, body)`` pairs; return ``(pk, html, hash)`` triples."""
+    return [(pk, render_rst(body), get_body_hash(body)) for pk, body in rows]
+
+
+class RenderedBodyMixin:
+    """Keep a model's ``body_html`` and ``body_hash`` in step with ``body``."""
+
+    RENDERED_FIELDS = ("body_html", "body_hash")
+
+    def has_current_html(self):
+        return bool(self.body_hash) and self.body_hash == get_body_hash(self.body)
+
+    def update_rendered_body(self):
+        """Render the body if the stored HTML is stale; return True if so."""
+        if self.has_current_html():
+            return False
+        self.body_html = render_rst(self.body)
+        self.body_hash = get_body_hash(self.body)
+        return True
+
+    def render_body(self):
+        """Return the body as HTML, from the stored copy when it's current."""
+        if self.has_current_html():
+            return self.body_html
+        return render_rst(self.body)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "body" in update_fields:
+            if self.update_rendered_body() and update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, *self.RENDERED_FIELDS}
+        super().save(*args, **kwargs)
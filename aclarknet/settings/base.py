@@ -65,6 +65,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "db.middleware.InstrumentationMiddleware",  # Unused unless INSTRUMENTATION_ENABLED
+    "db.middleware.SlowCommandOriginMiddleware",  # Unused unless SLOW_COMMAND_LOG_ENABLED
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -246,6 +248,35 @@ AUTH_USER_MODEL = "siteuser.SiteUser"
 DEFAULT_FROM_EMAIL = "aclark@aclark.net"
 CONTACT_EMAIL = "aclark@aclark.net"  # Email address to receive contact form submissions
 
+# Analytics page counts (see db.statistics)
+ANALYTICS_CACHE = "default"
+ANALYTICS_CACHE_TIMEOUT = 300  # Seconds
+
+# Default tasks of new time entries, cached in each process (see db.default_tasks).
+# Task and project changes in other processes show up after this long
+DEFAULT_TASK_CACHE_TIMEOUT = 300  # Seconds
+
+# Per-request MongoDB command counts and timings (see db.instrumentation)
+INSTRUMENTATION_ENABLED = False
+INSTRUMENTATION_SAMPLE_RATE = 1.0  # Fraction of requests measured
+INSTRUMENTATION_HEADERS = False  # Add X-DB-Commands etc. to measured responses
+# Per URL name limits on "commands", "db_ms", "view_ms" and "render_ms", e.g.
+# {"time_index": {"commands": 10, "db_ms": 100}}; overruns are logged
+INSTRUMENTATION_BUDGETS = {}
+
+# Log MongoDB commands slower than the threshold (see db.slowlog)
+SLOW_COMMAND_LOG_ENABLED = False
+SLOW_COMMAND_THRESHOLD_MS = 100
+SLOW_COMMAND_EXPLAIN = True  # Store the winning plan and flag COLLSCANs
+SLOW_COMMAND_LOG_SIZE = 16 * 1024 * 1024  # Bytes kept in the capped collection
+
+# Email outbox (delivered by `manage.py send_outbox`)
+EMAIL_OUTBOX_BACKEND = None  # Defaults to EMAIL_BACKEND
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BACKOFF = 60  # Seconds before the first retry, doubled each attempt
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 600  # Seconds before a stuck "sending" message is retried
+
 # Django Allauth settings
 AUTHENTICATION_BACKENDS = [
     # Needed to login by username in Django admin, regardless of `allauth`
@@ -42,6 +42,28 @@ DATABASES = {
     }
 }
 
+# Cache shared by all gunicorn workers, so invalidation reaches every process.
+# Create the collection with `python manage.py createcachecollection`.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django_mongodb_backend.cache.MongoDBCache",
+        "LOCATION": "django_cache",
+    },
+}
+ANALYTICS_CACHE = "shared"
+
+# Measure a small sample of requests (see db.instrumentation)
+INSTRUMENTATION_ENABLED = os.environ.get("DJANGO_INSTRUMENTATION", "True") == "True"
+INSTRUMENTATION_SAMPLE_RATE = float(
+    os.environ.get("DJANGO_INSTRUMENTATION_SAMPLE_RATE", "0.05")
+)
+
+# Create the collection with `python manage.py create_slow_log`
+SLOW_COMMAND_LOG_ENABLED = os.environ.get("DJANGO_SLOW_COMMAND_LOG", "True") == "True"
+
 # Static files configuration for production
 STATIC_ROOT = os.environ.get("DJANGO_STATIC_ROOT", "/srv/aclarknet/static")
 MEDIA_ROOT = os.environ.get("DJANGO_MEDIA_ROOT", "/srv/aclarknet/media")
@@ -0,0 +1,47 @@
+"""Compute the list view summary fields of existing blog entries.
+
+Entries store a thumbnail URL, a plain-text excerpt and a tag list computed
+from body and tags on save (see Entry.update_summary). This command fills
+them in for entries written before those fields existed or with bulk
+writes that skip save(), and repairs entries whose stored values are stale.
+
+Usage:
+    python manage.py backfill_entry_summaries
+    python manage.py backfill_entry_summaries --batch-size 500
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Entry
+
+
+class Command(BaseCommand):
+    help = "Compute the thumbnail, excerpt and tag list of blog entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Entries read and written per batch (default: 200).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        entries = Entry.objects.only("pk", "body", "tags", *Entry.SUMMARY_FIELDS)
+        changed = []
+        updated = 0
+        for entry in entries.iterator(chunk_size=batch_size):
+            if entry.update_summary():
+                changed.append(entry)
+            if len(changed) >= batch_size:
+                Entry.objects.bulk_update(changed, Entry.SUMMARY_FIELDS)
+                updated += len(changed)
+                changed = []
+        if changed:
+            Entry.objects.bulk_update(changed, Entry.SUMMARY_FIELDS)
+            updated += len(changed)
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} entries"))
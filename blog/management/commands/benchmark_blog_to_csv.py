@@ -0,0 +1,107 @@
+"""Benchmark blog_to_csv on a generated blog repo.
+
+Writes a synthetic repo to a temporary directory: a mix of ABlog
+(YYYY/MM/DD/<slug>/index.rst), flat RST (YYYY/MM/DD/<slug>.rst) and
+Pelican HTML (YYYY/MM/DD/<slug>/index.html) posts. Then times blog_to_csv
+in repo mode with one worker and with --workers, and times --merge of the
+resulting CSVs, which are all duplicates of each other.
+
+Usage:
+    python manage.py benchmark_blog_to_csv
+    python manage.py benchmark_blog_to_csv --posts 5000 --workers 4
+"""
+
+import datetime
+import os
+import tempfile
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+PARAGRAPH = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua.\n\n"
+)
+
+
+def write_post(repo_path, number):
+    """Write post ``number`` in one of the three formats."""
+    day = datetime.date(2000, 1, 1) + datetime.timedelta(days=number % 9000)
+    directory = os.path.join(repo_path, day.strftime("%Y/%m/%d"))
+    slug = f"post-{number}"
+    title = f"Post {number}"
+    body = PARAGRAPH * (1 + number % 8)
+    kind = number % 3
+    if kind == 0:
+        path = os.path.join(directory, slug, "index.rst")
+        content = (
+            f".. post:: {day:%Y/%m/%d}\n   :category: Bench\n\n"
+            f"{title}\n{'=' * len(title)}\n\n{body}"
+        )
+    elif kind == 1:
+        path = os.path.join(directory, f"{slug}.rst")
+        content = f"{title}\n{'=' * len(title)}\n\n{body}"
+    else:
+        path = os.path.join(directory, slug, "index.html")
+        content = (
+            f"<html><head><title>{title}</title></head><body><article>"
+            f"<h1>{title}</h1><p>{body}</p></article></body></html>"
+        )
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+class Command(BaseCommand):
+    help = "Time blog_to_csv on a generated repo of blog posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--posts",
+            type=int,
+            default=50000,
+            help="Posts to generate (default: 50000).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Workers for the parallel run (default: CPU count).",
+        )
+
+    def handle(self, *args, **options):
+        if options["posts"] < 1 or options["workers"] < 1:
+            raise CommandError("--posts and --workers must be at least 1.")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            repo_path = os.path.join(tmpdir, "repo")
+            start = time.perf_counter()
+            for number in range(options["posts"]):
+                write_post(repo_path, number)
+            self.stdout.write(
+                f"Generated {options['posts']} posts in "
+                f"{time.perf_counter() - start:.2f} s"
+            )
+
+            outputs = []
+            for workers in sorted({1, options["workers"]}):
+                output = os.path.join(tmpdir, f"workers-{workers}.csv")
+                elapsed = self.time_command(
+                    repo_path=repo_path, output=output, workers=workers
+                )
+                self.stdout.write(f"Repo mode, {workers} worker(s): {elapsed:.2f} s")
+                outputs.append(output)
+
+            elapsed = self.time_command(
+                merge=outputs * 2, output=os.path.join(tmpdir, "merged.csv")
+            )
+            self.stdout.write(f"Merge of {len(outputs) * 2} CSVs: {elapsed:.2f} s")
+        self.stdout.write(self.style.SUCCESS("Benchmark complete"))
+
+    def time_command(self, **options):
+        # Silence the command's own summaries; only the timings are reported
+        with open(os.devnull, "w") as devnull:
+            start = time.perf_counter()
+            call_command("blog_to_csv", stdout=devnull, stderr=devnull, **options)
+            return time.perf_counter() - start
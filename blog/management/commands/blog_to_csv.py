@@ -6,12 +6,30 @@ Supports three source formats:
 - Pelican HTML: YYYY/MM/DD/<slug>/index.html  (pelican-blog compiled output)
 
 Also supports merging multiple CSVs with deduplication via --merge.
+
+Both modes stream and write rows sorted by (pub_date, slug). In repo mode
+a process pool walks the top-level directories and parses the entry files
+in chunks, with a bounded number of chunks in flight. Both modes then sort
+with an external merge: rows are collected in sorted runs of --run-size,
+spilled to temporary files, and merged. In --merge mode, rows with the
+same body hash are exact duplicates and are dropped. Other duplicates are
+resolved as before, preferring RST over HTML and then the longer body.
+Memory stays bounded by the run size, not the corpus.
 """
 
 import csv
+import functools
+import hashlib
+import heapq
+import itertools
+import multiprocessing
 import os
 import re
 import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 
 from django.core.management.base import BaseCommand, CommandError
 
@@ -23,6 +41,17 @@ CATEGORY_RE = re.compile(r"^\s+:category:\s*(.+)$", re.IGNORECASE | re.MULTILINE
 UNDERLINE_RE = re.compile(r"^[=\-~^\*#]+$")
 DATE_PATH_RE = re.compile(r"(\d{4})[/\\](\d{2})[/\\](\d{1,2})")
 
+FIELDNAMES = ["title", "slug", "pub_date", "body", "tags", "source"]
+SKIP_DIRS = ("_static", "_themes", "_build", "images", "now", "nginx")
+
+RST = "rst"
+HTML = "html"
+
+# Files parsed per worker task
+CHUNK_SIZE = 100
+# Rows sorted in memory per run before spilling to disk
+RUN_SIZE = 10000
+
 
 def _slug_from_path(path):
     """Extract slug from a relative file path."""
@@ -205,109 +234,229 @@ def parse_html_entry(content, path, source):
     }
 
 
-def collect_entries_from_repo(repo_path, source, stderr_write):
-    """Walk a repo directory and parse all blog entries found."""
-    entries = []
-    for dirpath, dirnames, filenames in os.walk(repo_path):
-        dirnames[:] = sorted(
-            d
-            for d in dirnames
-            if not d.startswith(".")
-            and d not in ("_static", "_themes", "_build", "images", "now", "nginx")
-        )
+def _is_skipped_dir(name):
+    return name.startswith(".") or name in SKIP_DIRS
 
+
+def find_entry_files(repo_path, top):
+    """Return ``(kind, rel_path)`` for the entry files under one directory."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(os.path.join(repo_path, top)):
+        dirnames[:] = sorted(d for d in dirnames if not _is_skipped_dir(d))
+        names = []
         # ABlog/Sphinx: YYYY/MM/DD/<slug>/index.rst
         if "index.rst" in filenames:
-            rst_path = os.path.join(dirpath, "index.rst")
-            rel_path = os.path.relpath(rst_path, repo_path)
-            # Only treat as blog post if path matches date pattern
-            if DATE_PATH_RE.search(rel_path.replace("\\", "/")):
-                try:
-                    with open(rst_path, encoding="utf-8") as f:
-                        content = f.read()
-                    entry = parse_rst_entry(content, rel_path, source)
-                    if entry["pub_date"]:
-                        entries.append(entry)
-                except Exception as e:
-                    stderr_write(f"Warning: could not parse {rst_path}: {e}")
-
+            names.append((RST, "index.rst"))
         # Flat RST: YYYY/MM/DD/<slug>.rst
-        for filename in filenames:
-            if filename.endswith(".rst") and filename != "index.rst":
-                rst_path = os.path.join(dirpath, filename)
-                rel_path = os.path.relpath(rst_path, repo_path)
-                if DATE_PATH_RE.search(rel_path.replace("\\", "/")):
-                    try:
-                        with open(rst_path, encoding="utf-8") as f:
-                            content = f.read()
-                        entry = parse_rst_entry(content, rel_path, source)
-                        if entry["pub_date"]:
-                            entries.append(entry)
-                    except Exception as e:
-                        stderr_write(f"Warning: could not parse {rst_path}: {e}")
-
+        names.extend(
+            (RST, filename)
+            for filename in sorted(filenames)
+            if filename.endswith(".rst") and filename != "index.rst"
+        )
         # Pelican compiled HTML: YYYY/MM/DD/<slug>/index.html
         if "index.html" in filenames:
-            html_path = os.path.join(dirpath, "index.html")
-            rel_path = os.path.relpath(html_path, repo_path)
+            names.append((HTML, "index.html"))
+        for kind, filename in names:
+            rel_path = os.path.relpath(os.path.join(dirpath, filename), repo_path)
+            # Only treat as blog post if path matches date pattern
             if DATE_PATH_RE.search(rel_path.replace("\\", "/")):
-                try:
-                    with open(html_path, encoding="utf-8") as f:
-                        content = f.read()
-                    entry = parse_html_entry(content, rel_path, source)
-                    if entry["pub_date"] and entry["slug"]:
-                        entries.append(entry)
-                except Exception as e:
-                    stderr_write(f"Warning: could not parse {html_path}: {e}")
+                found.append((kind, rel_path))
+    return found
+
+
+def parse_entry_files(repo_path, source, files):
+    """Parse ``(kind, rel_path)`` files; return ``(entries, warnings)``."""
+    entries = []
+    warnings = []
+    for kind, rel_path in files:
+        path = os.path.join(repo_path, rel_path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+            if kind == HTML:
+                entry = parse_html_entry(content, rel_path, source)
+                keep = entry["pub_date"] and entry["slug"]
+            else:
+                entry = parse_rst_entry(content, rel_path, source)
+                keep = entry["pub_date"]
+        except Exception as e:
+            warnings.append(f"Warning: could not parse {path}: {e}")
+            continue
+        if keep:
+            entries.append(entry)
+    return entries, warnings
+
+
+def _bounded_map(executor, fn, items, window):
+    """Like ``executor.map``, in order, with at most ``window`` tasks queued."""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def iter_entries_from_repo(repo_path, source, stderr_write, workers=1):
+    """Yield the blog entries of a repo directory, in path order."""
+    tops = sorted(
+        name
+        for name in os.listdir(repo_path)
+        if os.path.isdir(os.path.join(repo_path, name)) and not _is_skipped_dir(name)
+    )
+    find = functools.partial(find_entry_files, repo_path)
+    parse = functools.partial(parse_entry_files, repo_path, source)
+    if workers == 1:
+        files = [item for top in tops for item in find(top)]
+        results = map(parse, _chunks(files, CHUNK_SIZE))
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        files = [item for found in executor.map(find, tops) for item in found]
+        results = _bounded_map(
+            executor, parse, _chunks(files, CHUNK_SIZE), window=workers * 2
+        )
+    try:
+        for entries, warnings in results:
+            for warning in warnings:
+                stderr_write(warning)
+            yield from entries
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
 
-    return entries
+def _is_html(entry):
+    return entry.get("source", "").startswith("pelican")
 
 
-def merge_and_dedup(all_entries):
-    """Merge entries from multiple sources, deduplicating by (pub_date, slug).
+def prefer(existing, entry):
+    """Return whichever of two entries for the same post to keep.
 
-    When duplicates exist, prefer RST entries over HTML ones and later sources
-    over earlier ones (last-write-wins within same format).
+    Prefer RST entries over HTML ones, then the longer body; on a tie the
+    earlier entry is kept.
     """
-    seen = {}
-    for entry in all_entries:
-        key = (entry["pub_date"], entry["slug"])
-        if key not in seen:
-            seen[key] = entry
-        else:
-            existing = seen[key]
-            # Prefer entries with a body; prefer RST over HTML
-            existing_is_html = existing.get("source", "").startswith("pelican")
-            new_is_html = entry.get("source", "").startswith("pelican")
-            if existing_is_html and not new_is_html:
-                seen[key] = entry
-            elif not existing_is_html and new_is_html:
-                pass  # keep existing RST
-            elif len(entry.get("body", "")) > len(existing.get("body", "")):
-                seen[key] = entry
-    return sorted(seen.values(), key=lambda e: e["pub_date"])
-
-
-def write_csv(entries, output, stdout_write, stderr_write):
-    fieldnames = ["title", "slug", "pub_date", "body", "tags", "source"]
+    existing_is_html = _is_html(existing)
+    new_is_html = _is_html(entry)
+    if existing_is_html and not new_is_html:
+        return entry
+    if not existing_is_html and new_is_html:
+        return existing  # keep existing RST
+    if len(entry.get("body", "")) > len(existing.get("body", "")):
+        return entry
+    return existing
+
+
+def _content_hash(entry):
+    # The format is part of the hash, since it decides which entry wins
+    text = f"{_is_html(entry)}\n{entry.get('body', '')}"
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _run_key(row):
+    return (row["pub_date"], row["slug"], row["_seq"])
+
+
+def _write_run(rows, tmpdir):
+    rows.sort(key=_run_key)
+    fd, path = tempfile.mkstemp(suffix=".csv", dir=tmpdir)
+    with os.fdopen(fd, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[*FIELDNAMES, "_seq", "_hash"])
+        writer.writerows(rows)
+    return path
+
+
+def _read_run(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, fieldnames=[*FIELDNAMES, "_seq", "_hash"]):
+            row["_seq"] = int(row["_seq"])
+            yield row
+
+
+def sorted_rows(rows, tmpdir, run_size=RUN_SIZE):
+    """Yield ``rows`` sorted by date and slug, keeping input order for ties.
+
+    Rows are sorted in runs of ``run_size`` and spilled to ``tmpdir``, then
+    merged. Each row needs a ``_hash``; ``_seq`` is assigned here.
+    """
+    runs = []
+    run = []
+    for seq, row in enumerate(rows):
+        row["_seq"] = seq
+        run.append(row)
+        if len(run) >= run_size:
+            runs.append(_write_run(run, tmpdir))
+            run = []
+    if run:
+        runs.append(_write_run(run, tmpdir))
+    return heapq.merge(*(_read_run(path) for path in runs), key=_run_key)
+
+
+def _read_csv_files(csv_paths, stats, on_read):
+    stats["total"] = 0
+    for csv_path in csv_paths:
+        count = 0
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                row = {name: row.get(name) or "" for name in FIELDNAMES}
+                row["_hash"] = _content_hash(row)
+                count += 1
+                yield row
+        stats["total"] += count
+        if on_read is not None:
+            on_read(csv_path, count)
+
+
+def merge_csv_files(csv_paths, tmpdir, stats, run_size=RUN_SIZE, on_read=None):
+    """Yield the deduplicated entries of several CSVs, sorted by date and slug.
+
+    ``on_read(path, count)`` is called after each input file, and ``stats``
+    gets the ``total`` rows read and the exact ``duplicates``.
+    """
+    stats["duplicates"] = 0
+    merged = sorted_rows(
+        _read_csv_files(csv_paths, stats, on_read), tmpdir, run_size=run_size
+    )
+    for _, group in itertools.groupby(merged, key=lambda r: (r["pub_date"], r["slug"])):
+        winner = None
+        hashes = set()
+        for row in group:
+            if row["_hash"] in hashes:
+                stats["duplicates"] += 1
+                continue
+            hashes.add(row["_hash"])
+            winner = row if winner is None else prefer(winner, row)
+        yield {name: winner[name] for name in FIELDNAMES}
+
+
+@contextmanager
+def open_output(output):
+    """Yield a CSV writer with the header written, for a path or '-'."""
     if output == "-":
-        writer = csv.DictWriter(sys.stdout, fieldnames=fieldnames)
+        writer = csv.DictWriter(sys.stdout, fieldnames=FIELDNAMES)
         writer.writeheader()
-        writer.writerows(entries)
-        stderr_write(f"Wrote {len(entries)} entries to stdout.")
-    else:
-        with open(output, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(entries)
-        stdout_write(f"Wrote {len(entries)} entries to {output}")
+        yield writer
+        return
+    with open(output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        yield writer
 
 
 class Command(BaseCommand):
     help = (
         "Convert blog entries from cloned repos to CSV for import. "
         "Supports ABlog RST, flat RST, and compiled Pelican HTML formats. "
-        "Use --merge to combine multiple CSV files with deduplication."
+        "Use --merge to combine multiple CSV files with deduplication. "
+        "Rows are written sorted by pub_date and slug."
     )
 
     def add_arguments(self, parser):
@@ -332,34 +481,50 @@ class Command(BaseCommand):
             default="",
             help='Source label for entries (e.g. "blog-2017"). Used with --repo-path.',
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes walking and parsing the repo (default: CPU count).",
+        )
+        parser.add_argument(
+            "--run-size",
+            type=int,
+            default=RUN_SIZE,
+            help=f"Rows sorted in memory per run (default: {RUN_SIZE}).",
+        )
 
     def handle(self, *args, **options):
         output = options["output"]
+        if options["workers"] < 1 or options["run_size"] < 1:
+            raise CommandError("--workers and --run-size must be at least 1.")
 
         if options.get("merge"):
             # Merge mode: read multiple CSVs and deduplicate
-            all_entries = []
             for csv_path in options["merge"]:
                 if not os.path.isfile(csv_path):
                     raise CommandError(f"CSV file not found: {csv_path}")
-                with open(csv_path, newline="", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    entries = list(reader)
-                all_entries.extend(entries)
-                self.stderr.write(f"Read {len(entries)} entries from {csv_path}")
-            merged = merge_and_dedup(all_entries)
+            stats = {}
+            count = 0
+            with tempfile.TemporaryDirectory() as tmpdir, open_output(output) as writer:
+                for entry in merge_csv_files(
+                    options["merge"],
+                    tmpdir,
+                    stats,
+                    run_size=options["run_size"],
+                    on_read=lambda path, n: self.stderr.write(
+                        f"Read {n} entries from {path}"
+                    ),
+                ):
+                    writer.writerow(entry)
+                    count += 1
             self.stderr.write(
                 self.style.SUCCESS(
-                    f"Merged to {len(merged)} unique entries "
-                    f"(from {len(all_entries)} total)."
+                    f"Merged to {count} unique entries (from {stats['total']} "
+                    f"total, {stats['duplicates']} exact duplicates)."
                 )
             )
-            write_csv(
-                merged,
-                output,
-                lambda m: self.stdout.write(self.style.SUCCESS(m)),
-                lambda m: self.stderr.write(self.style.SUCCESS(m)),
-            )
+            self.report_written(count, output)
             return
 
         # Repo mode: parse entries from a repo directory
@@ -369,13 +534,23 @@ class Command(BaseCommand):
         if not os.path.isdir(repo_path):
             raise CommandError(f"repo-path does not exist: {repo_path}")
 
-        entries = collect_entries_from_repo(repo_path, source, self.stderr.write)
-        entries.sort(key=lambda e: e["pub_date"])
-
-        self.stderr.write(f"Found {len(entries)} entries in {repo_path}")
-        write_csv(
-            entries,
-            output,
-            lambda m: self.stdout.write(self.style.SUCCESS(m)),
-            lambda m: self.stderr.write(self.style.SUCCESS(m)),
+        entries = (
+            {**entry, "_hash": ""}
+            for entry in iter_entries_from_repo(
+                repo_path, source, self.stderr.write, workers=options["workers"]
+            )
         )
+        count = 0
+        with tempfile.TemporaryDirectory() as tmpdir, open_output(output) as writer:
+            for entry in sorted_rows(entries, tmpdir, run_size=options["run_size"]):
+                writer.writerow({name: entry[name] for name in FIELDNAMES})
+                count += 1
+
+        self.stderr.write(f"Found {count} entries in {repo_path}")
+        self.report_written(count, output)
+
+    def report_written(self, count, output):
+        if output == "-":
+            self.stderr.write(self.style.SUCCESS(f"Wrote {count} entries to stdout."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {count} entries to {output}"))
@@ -3,17 +3,26 @@
 Each file is named YYYY-MM-DD-slug.rst and contains RST front-matter followed
 by the original body content.
 
+Existing files are kept unless --overwrite is given. With --overwrite, each
+rendered file is compared with the file on disk by SHA-256, and only files
+whose content differs are replaced, so repeated round trips leave unchanged
+files (and their mtimes) alone. Files are written to a temporary name and
+renamed into place. Entries are streamed from the database in chunks.
+
 Usage:
     python manage.py export_rst_posts
     python manage.py export_rst_posts --from-csv data/blog_entries.csv
     python manage.py export_rst_posts --output-dir data/posts
+    python manage.py export_rst_posts --overwrite
 """
 
 import csv
+import hashlib
+import os
 import pathlib
 import re
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 SAFE_RE = re.compile(r"[^\w-]")
 
@@ -41,6 +50,34 @@ def entry_to_rst(title, slug, pub_date, tags, source, status, body):
     return "\n".join(lines)
 
 
+def content_hash(data):
+    """Return the SHA-256 hex digest of ``data`` (bytes)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_if_changed(path, content):
+    """Write ``content`` to ``path`` unless it already holds it.
+
+    Returns "added", "changed" or "unchanged". Writes go through a temporary
+    file renamed into place, so readers never see a partial file.
+    """
+    data = content.encode("utf-8")
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        result = "added"
+    else:
+        # Only files of the same size need hashing
+        same_size = stat.st_size == len(data)
+        if same_size and content_hash(path.read_bytes()) == content_hash(data):
+            return "unchanged"
+        result = "changed"
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return result
+
+
 class Command(BaseCommand):
     help = "Export blog entries to data/posts/*.rst files."
 
@@ -58,24 +95,32 @@ class Command(BaseCommand):
         parser.add_argument(
             "--overwrite",
             action="store_true",
-            help="Overwrite existing .rst files.",
+            help="Overwrite existing .rst files whose content has changed.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Entries fetched per database round trip (default: 500).",
         )
 
     def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
         output_dir = pathlib.Path(options["output_dir"])
         output_dir.mkdir(parents=True, exist_ok=True)
 
         if options["from_csv"]:
             entries = self._load_csv(options["from_csv"])
         else:
-            entries = self._load_db()
+            entries = self._load_db(options["chunk_size"])
 
-        written = skipped = 0
+        counts = {"added": 0, "changed": 0, "unchanged": 0, "skipped": 0}
         for entry in entries:
             filename = f"{entry['pub_date']}-{slug_to_safe(entry['slug'])}.rst"
             path = output_dir / filename
-            if path.exists() and not options["overwrite"]:
-                skipped += 1
+            if not options["overwrite"] and path.exists():
+                counts["skipped"] += 1
                 continue
             content = entry_to_rst(
                 title=entry["title"],
@@ -86,33 +131,28 @@ class Command(BaseCommand):
                 status=entry.get("status", "published"),
                 body=entry.get("body", ""),
             )
-            path.write_text(content, encoding="utf-8")
-            written += 1
+            counts[write_if_changed(path, content)] += 1
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Exported {written} entries to {output_dir}/ "
-                f"({skipped} skipped — already exist, use --overwrite to replace)."
+                f"Exported to {output_dir}/: {counts['added']} added, "
+                f"{counts['changed']} changed, {counts['unchanged']} unchanged, "
+                f"{counts['skipped']} skipped (already exist, use --overwrite "
+                "to replace)."
             )
         )
 
     def _load_csv(self, csv_path):
         with open(csv_path, newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            return [{k.lower().strip(): v for k, v in row.items()} for row in reader]
+            for row in csv.DictReader(f):
+                yield {k.lower().strip(): v for k, v in row.items()}
 
-    def _load_db(self):
+    def _load_db(self, chunk_size):
         from blog.models import Entry
 
-        return [
-            {
-                "title": e.title,
-                "slug": e.slug,
-                "pub_date": str(e.pub_date),
-                "tags": e.tags,
-                "source": e.source,
-                "status": e.status,
-                "body": e.body,
-            }
-            for e in Entry.objects.all()
-        ]
+        entries = Entry.objects.values(
+            "title", "slug", "pub_date", "tags", "source", "status", "body"
+        ).order_by("pub_date", "slug")
+        for entry in entries.iterator(chunk_size=chunk_size):
+            entry["pub_date"] = str(entry["pub_date"])
+            yield entry
@@ -15,23 +15,55 @@ field-list front-matter block:
 The date and slug in the filename are authoritative. Front-matter fields
 override filename-derived values when present. Upserts on (pub_date, slug).
 
+Imports are incremental. A manifest in the posts directory
+(.import-manifest.json) records each file's size, mtime and SHA-256 and
+the entry it was imported as. Files whose size and mtime, or else content
+hash, match the manifest are skipped without touching the database. Changed
+files are parsed and rendered in a process pool, then written in batches:
+one query loads the existing entries of a batch, then bulk_update and
+bulk_create write it. --sync deletes orphaned entries in batches, using the
+manifest for the keys of unchanged files. --full ignores the manifest.
+
+The manifest is tied to the database it was imported into (a hash of its
+host and name), so pointing the checkout at another database imports every
+file again. It can't see changes made to the database directly, such as an
+entry deleted in the admin or a database restored from a backup: run with
+--full after those.
+
 Usage:
     python manage.py import_rst_posts
     python manage.py import_rst_posts --posts-dir data/posts
     python manage.py import_rst_posts --dry-run
+    python manage.py import_rst_posts --sync --workers 4
+    python manage.py import_rst_posts --full
 """
 
 import datetime
+import functools
+import hashlib
+import json
+import multiprocessing
+import os
 import pathlib
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from aclarknet.rst import get_body_hash, render_rst
 
 # Matches :fieldname: value lines at the start of the file
 _FIELD_RE = re.compile(r"^:(\w+):\s*(.*)", re.MULTILINE)
 # Matches YYYY-MM-DD-slug in filename
 _FILENAME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})-(.+)\.rst$")
 
+MANIFEST_NAME = ".import-manifest.json"
+# Bump when parsing changes, so every file is imported again
+MANIFEST_VERSION = 1
+# Fewer changed files than this are parsed in-process
+PARALLEL_THRESHOLD = 32
+
 
 def parse_rst_file(path):
     """Return (metadata dict, body str) from an RST file with front-matter."""
@@ -65,8 +97,114 @@ def parse_filename(filename):
     return None, None
 
 
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def parse_post(path, render=True):
+    """Parse one post file; return a dict of entry fields, or of ``error``.
+
+    An error dict still has the post's ``date`` and ``slug`` when they
+    parsed, so --sync keeps the entry of a file that fails validation.
+    Runs in worker processes, so it only uses the file and aclarknet.rst.
+    """
+    path = pathlib.Path(path)
+    date_str, slug_from_file = parse_filename(path.name)
+    if not date_str:
+        return {
+            "name": path.name,
+            "error": "filename must be YYYY-MM-DD-slug.rst",
+        }
+    try:
+        meta, body = parse_rst_file(path)
+    except Exception as e:
+        return {"name": path.name, "error": f"error reading file: {e}"}
+
+    # Front-matter overrides filename; filename is fallback
+    slug = meta.get("slug", slug_from_file)
+    date_str = meta.get("date", date_str)
+    try:
+        datetime.date.fromisoformat(date_str)
+    except ValueError:
+        return {"name": path.name, "error": f"invalid date: {date_str!r}"}
+    title = meta.get("title", "")
+    if not title:
+        return {
+            "name": path.name,
+            "date": date_str,
+            "slug": slug,
+            "error": "missing :title: in front-matter",
+        }
+
+    post = {
+        "name": path.name,
+        "date": date_str,
+        "slug": slug,
+        "title": title,
+        "tags": meta.get("tags", ""),
+        "source": meta.get("source", ""),
+        "status": meta.get("status"),
+        "body": body,
+    }
+    if render:
+        post["body_html"] = render_rst(body)
+        post["body_hash"] = get_body_hash(body)
+    return post
+
+
+def parse_posts(paths, render=True):
+    return [parse_post(path, render) for path in paths]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def get_database_key(using=DEFAULT_DB_ALIAS):
+    """Return a hash identifying a database, for the manifest.
+
+    Hashed because the host may be a URI with credentials.
+    """
+    settings_dict = connections[using].settings_dict
+    identity = f"{settings_dict.get('HOST') or ''}\n{settings_dict.get('NAME') or ''}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def load_manifest(path, options_key):
+    """Return the manifest's file records, or {} if missing or outdated."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("options") != options_key
+    ):
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(path, options_key, files):
+    """Write the manifest atomically."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(
+        json.dumps(
+            {"version": MANIFEST_VERSION, "options": options_key, "files": files},
+            indent=1,
+            sort_keys=True,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp, path)
+
+
 class Command(BaseCommand):
-    help = "Import blog entries from data/posts/*.rst files."
+    help = (
+        "Import blog entries from data/posts/*.rst files. Unchanged files are "
+        "skipped; use --full after editing or restoring the database directly."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -89,120 +227,220 @@ class Command(BaseCommand):
             action="store_true",
             help="Delete DB entries that have no matching .rst file (by pub_date+slug).",
         )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help=(
+                "Ignore the manifest and import every file, e.g. after entries "
+                "were changed or deleted in the database directly."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes parsing changed files (default: CPU count).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Entries written or deleted per batch (default: 200).",
+        )
 
     def handle(self, *args, **options):
-        from blog.models import Entry
-
         posts_dir = pathlib.Path(options["posts_dir"])
         if not posts_dir.exists():
             raise CommandError(f"Posts directory not found: {posts_dir}")
+        if options["workers"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--workers and --batch-size must be at least 1.")
 
         rst_files = sorted(posts_dir.glob("*.rst"))
         if not rst_files:
             self.stdout.write(self.style.WARNING(f"No .rst files found in {posts_dir}"))
             return
 
-        created = updated = skipped = errors = 0
+        dry_run = options["dry_run"]
+        manifest_path = posts_dir / MANIFEST_NAME
+        options_key = {"status": options["status"], "database": get_database_key()}
+        manifest = {} if options["full"] else load_manifest(manifest_path, options_key)
 
+        # Unchanged files keep their manifest record; the rest are parsed
+        files = {}
+        changed = []
         for path in rst_files:
-            date_str, slug_from_file = parse_filename(path.name)
-            if not date_str:
-                self.stderr.write(
-                    f"Skipping {path.name} — filename must be YYYY-MM-DD-slug.rst"
-                )
-                errors += 1
-                continue
-
-            try:
-                meta, body = parse_rst_file(path)
-            except Exception as e:
-                self.stderr.write(f"Error reading {path.name}: {e}")
-                errors += 1
+            stat = path.stat()
+            record = manifest.get(path.name)
+            if (
+                record
+                and record["size"] == stat.st_size
+                and record["mtime_ns"] == stat.st_mtime_ns
+            ):
+                files[path.name] = record
                 continue
-
-            # Front-matter overrides filename; filename is fallback
-            slug = meta.get("slug", slug_from_file)
-            date_str = meta.get("date", date_str)
-            title = meta.get("title", "")
-            tags = meta.get("tags", "")
-            source = meta.get("source", "")
-            status = options["status"] or meta.get("status", Entry.PUBLISHED)
-
-            if not title:
-                self.stderr.write(
-                    f"Skipping {path.name} — missing :title: in front-matter"
-                )
-                errors += 1
+            digest = file_hash(path)
+            if record and record["sha256"] == digest:
+                files[path.name] = {
+                    **record,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                }
                 continue
+            changed.append((path, digest, stat))
+        skipped = len(files)
 
-            try:
-                pub_date = datetime.date.fromisoformat(date_str)
-            except ValueError:
-                self.stderr.write(f"Skipping {path.name} — invalid date: {date_str!r}")
+        posts = self.parse(
+            [path for path, _, _ in changed], options["workers"], render=not dry_run
+        )
+        errors = 0
+        valid = []
+        # Keys of files that failed validation, which --sync must not delete
+        kept_keys = []
+        for post in posts:
+            if "error" in post:
+                self.stderr.write(f"Skipping {post['name']} — {post['error']}")
                 errors += 1
-                continue
-
-            if options["dry_run"]:
-                self.stdout.write(f"  [dry-run] {pub_date} {slug!r} — {title!r}")
-                continue
-
-            obj, created_flag = Entry.objects.update_or_create(
-                pub_date=pub_date,
-                slug=slug,
-                defaults={
-                    "title": title,
-                    "body": body,
-                    "tags": tags,
-                    "source": source,
-                    "status": status,
-                },
-            )
-            if created_flag:
-                created += 1
+                # The previous record stays, so the file is parsed again
+                # next time and its entry is still known
+                if post["name"] in manifest:
+                    files[post["name"]] = manifest[post["name"]]
+                if "date" in post:
+                    kept_keys.append(post)
             else:
-                updated += 1
+                valid.append(post)
 
-        if options["dry_run"]:
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Dry run complete — {len(rst_files)} files parsed, {errors} errors."
+        if dry_run:
+            for post in valid:
+                self.stdout.write(
+                    f"  [dry-run] {post['date']} {post['slug']!r} — {post['title']!r}"
                 )
-            )
-        else:
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Import complete: {created} created, {updated} updated, "
-                    f"{skipped} skipped, {errors} errors."
+                    f"Dry run complete — {len(changed)} changed files parsed, "
+                    f"{skipped} unchanged, {errors} errors."
                 )
             )
+            return
+
+        created, updated = self.write_entries(
+            valid, options["status"], options["batch_size"]
+        )
+        stats = {path.name: (digest, stat) for path, digest, stat in changed}
+        for post in valid:
+            digest, stat = stats[post["name"]]
+            files[post["name"]] = {
+                "sha256": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "date": post["date"],
+                "slug": post["slug"],
+            }
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Import complete: {created} created, {updated} updated, "
+                f"{skipped} skipped, {errors} errors."
+            )
+        )
 
-        if options.get("sync") and not options["dry_run"]:
-            # Build set of (pub_date, slug) keys present in RST files
-            rst_keys = set()
-            for path in rst_files:
-                date_str, slug_from_file = parse_filename(path.name)
-                if not date_str:
-                    continue
-                try:
-                    meta, _ = parse_rst_file(path)
-                except Exception:
-                    continue
-                slug = meta.get("slug", slug_from_file)
-                date_str = meta.get("date", date_str)
-                try:
-                    pub_date = datetime.date.fromisoformat(date_str)
-                except ValueError:
-                    continue
-                rst_keys.add((pub_date, slug))
-
-            deleted = 0
-            for entry in Entry.objects.all():
-                if (entry.pub_date, entry.slug) not in rst_keys:
-                    self.stdout.write(
-                        f"  Deleting orphan: {entry.pub_date} {entry.slug!r}"
-                    )
-                    entry.delete()
-                    deleted += 1
+        if options["sync"]:
+            deleted = self.delete_orphans(
+                [*files.values(), *kept_keys], options["batch_size"]
+            )
             self.stdout.write(
                 self.style.SUCCESS(f"Sync complete: {deleted} orphan(s) deleted.")
             )
+        if created or updated or (options["sync"] and deleted):
+            from db.statistics import invalidate_analytics
+
+            # Bulk writes send no signals
+            invalidate_analytics()
+
+        save_manifest(manifest_path, options_key, files)
+
+    def parse(self, paths, workers, render=True):
+        """Parse files, in a process pool when there are enough of them."""
+        if workers == 1 or len(paths) < PARALLEL_THRESHOLD:
+            return parse_posts(paths, render)
+        chunk_size = max(len(paths) // (workers * 4), 1)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            results = executor.map(
+                functools.partial(parse_posts, render=render),
+                _chunks(paths, chunk_size),
+            )
+            return [post for chunk in results for post in chunk]
+
+    def write_entries(self, posts, status, batch_size):
+        """Upsert parsed posts on (pub_date, slug); return (created, updated)."""
+        from blog.models import Entry
+
+        fields = (
+            "title",
+            "body",
+            "tags",
+            "source",
+            "status",
+            "body_html",
+            "body_hash",
+            *Entry.SUMMARY_FIELDS,
+        )
+        # A later file with the same key wins, as it did one save at a time
+        by_key = {}
+        for post in posts:
+            by_key[(datetime.date.fromisoformat(post["date"]), post["slug"])] = post
+
+        created = updated = 0
+        for batch in _chunks(list(by_key.items()), batch_size):
+            slugs = {slug for (_, slug), _ in batch}
+            existing = {
+                (entry.pub_date, entry.slug): entry
+                for entry in Entry.objects.filter(slug__in=slugs)
+            }
+            to_create = []
+            to_update = []
+            for (pub_date, slug), post in batch:
+                entry = existing.get((pub_date, slug))
+                if entry is None:
+                    entry = Entry(pub_date=pub_date, slug=slug)
+                    to_create.append(entry)
+                else:
+                    to_update.append(entry)
+                entry.title = post["title"]
+                entry.body = post["body"]
+                entry.tags = post["tags"]
+                entry.source = post["source"]
+                entry.status = status or post["status"] or Entry.PUBLISHED
+                entry.body_html = post["body_html"]
+                entry.body_hash = post["body_hash"]
+                entry.update_summary()
+            if to_update:
+                Entry.objects.bulk_update(to_update, fields)
+            if to_create:
+                Entry.objects.bulk_create(to_create)
+            created += len(to_create)
+            updated += len(to_update)
+        return created, updated
+
+    def delete_orphans(self, records, batch_size):
+        """Delete entries with no post file, in batches; return the count.
+
+        ``records`` are dicts with the ``date`` and ``slug`` of every post
+        file, imported or not.
+        """
+        from blog.models import Entry
+
+        keys = {
+            (datetime.date.fromisoformat(record["date"]), record["slug"])
+            for record in records
+        }
+        orphans = []
+        for pk, pub_date, slug in Entry.objects.values_list(
+            "pk", "pub_date", "slug"
+        ).iterator():
+            if (pub_date, slug) not in keys:
+                self.stdout.write(f"  Deleting orphan: {pub_date} {slug!r}")
+                orphans.append(pk)
+        for batch in _chunks(orphans, batch_size):
+            Entry.objects.filter(pk__in=batch).delete()
+        return len(orphans)
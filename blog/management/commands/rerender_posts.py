@@ -0,0 +1,113 @@
+"""Re-render the stored HTML of blog entries and now page entries.
+
+Entries store their body rendered to HTML, with a hash of the body (see
+aclarknet.rst). Saving an entry renders it. This command renders the
+entries whose stored HTML is missing or stale, for example after a
+QuerySet.update(), an import with bulk writes, or a change of
+RENDER_VERSION. Rendering runs in a pool of worker processes.
+
+Usage:
+    python manage.py rerender_posts
+    python manage.py rerender_posts --model entry --workers 4
+    python manage.py rerender_posts --force
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from aclarknet.rst import get_body_hash, render_many
+from blog.models import Entry
+from cms.models import NowEntry
+
+MODELS = {"entry": Entry, "now": NowEntry}
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+class Command(BaseCommand):
+    help = "Re-render stale stored HTML of blog and now page entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="model_names",
+            choices=sorted(MODELS),
+            help="Model to re-render (may be given more than once; default: all).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render every entry, not only stale ones.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes (default: CPU count; 1 renders in-process).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Entries per worker task and per database write (default: 50).",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--workers and --batch-size must be at least 1.")
+        names = options["model_names"] or sorted(MODELS)
+
+        executor = None
+        if options["workers"] > 1:
+            # Workers only render, so start them clean rather than forking
+            # the database connections
+            executor = ProcessPoolExecutor(
+                max_workers=options["workers"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        try:
+            for name in names:
+                model = MODELS[name]
+                count = self.rerender(
+                    model, options["force"], options["batch_size"], executor
+                )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Rendered {count} {model._meta.verbose_name_plural}"
+                    )
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def rerender(self, model, force, batch_size, executor):
+        """Render the model's stale entries; return how many were written."""
+        rows = [
+            (pk, body)
+            for pk, body, body_hash in model.objects.values_list(
+                "pk", "body", "body_hash"
+            ).iterator()
+            if force or body_hash != get_body_hash(body)
+        ]
+        chunks = list(_chunks(rows, batch_size))
+        if executor is None:
+            results = map(render_many, chunks)
+        else:
+            results = executor.map(render_many, chunks)
+
+        count = 0
+        for rendered in results:
+            objs = [
+                model(pk=pk, body_html=html, body_hash=body_hash)
+                for pk, html, body_hash in rendered
+            ]
+            model.objects.bulk_update(objs, ["body_html", "body_hash"])
+            count += len(objs)
+        return count
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0003_entry_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entry",
+            name="body_html",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="body_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
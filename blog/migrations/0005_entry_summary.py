@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blog", "0004_entry_body_html"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="entry",
+            name="thumbnail",
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name="entry",
+            name="tag_list",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(
+                fields=["status", "-pub_date"], name="blog_entry_status_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="entry",
+            index=models.Index(fields=["tag_list"], name="blog_entry_tag_list_idx"),
+        ),
+    ]
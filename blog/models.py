@@ -3,10 +3,57 @@ import re
 from django.db import models
 from django.urls import reverse
 
+from aclarknet.rst import RenderedBodyMixin
+
 _IMAGE_RE = re.compile(r"\.\. image::\s*(\S+)")
+# `text <url>`_ links, and the markup characters left after them
+_LINK_RE = re.compile(r"`([^`<]*?)\s*<[^>]*>`_{1,2}")
+_MARKUP_RE = re.compile(r"`_{1,2}|[`*]|\|")
+# Section title under/overlines: a run of one punctuation character
+_ADORNMENT_RE = re.compile(r"^([!-/:-@\[-`{-~])\1+\s*$")
+
+EXCERPT_LENGTH = 200
+
+
+def get_excerpt(body, length=EXCERPT_LENGTH):
+    """Return the start of an RST body's text, without titles or markup."""
+    lines = (body or "").splitlines()
+    words = []
+    in_directive = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if in_directive and (not stripped or line[:1].isspace()):
+            continue
+        in_directive = stripped.startswith("..")
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+        if (
+            not stripped
+            or in_directive
+            or _ADORNMENT_RE.match(stripped)
+            or _ADORNMENT_RE.match(next_line.strip())
+            or re.match(r"^:\w+:", stripped)
+        ):
+            continue
+        words.extend(_MARKUP_RE.sub("", _LINK_RE.sub(r"\1", stripped)).split())
+        if sum(len(word) + 1 for word in words) > length:
+            break
+    text = " ".join(words)
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(" ", 1)[0].rstrip(",.;:") + "\u2026"
+
 
+def parse_tags(tags):
+    """Return the comma-separated tags as a list, without blanks or repeats."""
+    parsed = []
+    for tag in (tags or "").split(","):
+        tag = tag.strip()
+        if tag and tag not in parsed:
+            parsed.append(tag)
+    return parsed
 
-class Entry(models.Model):
+
+class Entry(RenderedBodyMixin, models.Model):
     DRAFT = "draft"
     PUBLISHED = "published"
     STATUS_CHOICES = [
@@ -18,6 +65,9 @@ class Entry(models.Model):
     slug = models.SlugField(max_length=300)
     pub_date = models.DateField()
     body = models.TextField(blank=True)
+    # Rendered from body on save, see aclarknet.rst
+    body_html = models.TextField(blank=True, editable=False)
+    body_hash = models.CharField(max_length=64, blank=True, editable=False)
     tags = models.CharField(
         max_length=500,
         blank=True,
@@ -35,11 +85,25 @@ class Entry(models.Model):
         db_index=True,
         help_text="Only published entries are visible to the public.",
     )
+    # Computed from body and tags on save, so the list view doesn't have to
+    # load the body (see update_summary)
+    thumbnail = models.CharField(max_length=500, blank=True, editable=False)
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    tag_list = models.JSONField(default=list, blank=True, editable=False)
+
+    SUMMARY_FIELDS = ("thumbnail", "excerpt", "tag_list")
 
     class Meta:
         ordering = ["-pub_date"]
         unique_together = [("pub_date", "slug")]
         verbose_name_plural = "entries"
+        indexes = [
+            # The list view: published entries, newest first
+            models.Index(
+                fields=["status", "-pub_date"], name="blog_entry_status_date_idx"
+            ),
+            models.Index(fields=["tag_list"], name="blog_entry_tag_list_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -60,16 +124,27 @@ class Entry(models.Model):
         m = _IMAGE_RE.search(self.body)
         return m.group(1) if m else None
 
-    def render_body(self):
-        """Render RST body to HTML, falling back to plain text."""
-        try:
-            from docutils.core import publish_parts
-
-            parts = publish_parts(
-                source=self.body,
-                writer_name="html",
-                settings_overrides={"initial_header_level": 2},
-            )
-            return parts["body"]
-        except Exception:
-            return self.body
+    def get_summary(self):
+        """Return the summary field values computed from body and tags."""
+        return {
+            "thumbnail": self.first_image() or "",
+            "excerpt": get_excerpt(self.body),
+            "tag_list": parse_tags(self.tags),
+        }
+
+    def update_summary(self):
+        """Recompute the summary fields; return True if any changed."""
+        changed = False
+        for name, value in self.get_summary().items():
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed = True
+        return changed
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.update_summary()
+        elif {"body", "tags"} & set(update_fields) and self.update_summary():
+            kwargs["update_fields"] = {*update_fields, *self.SUMMARY_FIELDS}
+        super().save(*args, **kwargs)
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Entry
+
+
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def invalidate_analytics_on_entry_change(sender, **kwargs):
+    """Drop the cached analytics counts, which include blog entries."""
+    from db.statistics import invalidate_analytics
+
+    invalidate_analytics()
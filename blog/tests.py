@@ -0,0 +1,301 @@
+"""Tests for the blog app."""
+
+import csv
+import datetime
+import pathlib
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .management.commands.benchmark_blog_to_csv import write_post
+from .models import Entry, get_excerpt, parse_tags
+
+BODY = """Hello
+=====
+
+.. image:: /static/hello.png
+   :width: 200
+
+A `link <https://example.com>`_ with *emphasis*.
+"""
+
+
+class EntrySignalTests(TestCase):
+    """Entry changes drop the cached analytics counts."""
+
+    def test_save_and_delete_invalidate_analytics(self):
+        with patch("db.statistics.invalidate_analytics") as invalidate:
+            entry = Entry.objects.create(
+                title="Hello", slug="hello", pub_date=datetime.date(2026, 1, 1)
+            )
+            entry.delete()
+        self.assertEqual(invalidate.call_count, 2)
+
+
+class EntrySummaryTests(TestCase):
+    """Thumbnail, excerpt and tag list are computed on save."""
+
+    def setUp(self):
+        self.entry = Entry.objects.create(
+            title="Hello",
+            slug="hello",
+            pub_date=datetime.date(2026, 1, 1),
+            body=BODY,
+            tags="python, django, python",
+        )
+
+    def test_excerpt_and_tags(self):
+        self.assertEqual(get_excerpt(BODY), "A link with emphasis.")
+        self.assertLessEqual(len(get_excerpt("word " * 100, length=50)), 50)
+        self.assertEqual(parse_tags(" a,, b ,a"), ["a", "b"])
+
+    def test_computed_on_save(self):
+        self.assertEqual(self.entry.thumbnail, "/static/hello.png")
+        self.assertEqual(self.entry.excerpt, "A link with emphasis.")
+        self.assertEqual(self.entry.tag_list, ["python", "django"])
+
+        self.entry.tags = "pillow"
+        self.entry.save(update_fields=["tags"])
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.tag_list, ["pillow"])
+
+    def test_list_view_skips_body(self):
+        response = self.client.get(reverse("blog:entry_list"))
+        entry = response.context["entries"][0]
+        self.assertIn("body", entry.get_deferred_fields())
+        self.assertContains(response, "/static/hello.png")
+        self.assertContains(response, "python, django")
+
+    def test_backfill(self):
+        Entry.objects.filter(pk=self.entry.pk).update(
+            thumbnail="", excerpt="", tag_list=[]
+        )
+        out = StringIO()
+        call_command("backfill_entry_summaries", stdout=out)
+        self.assertIn("Updated 1 entries", out.getvalue())
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.tag_list, ["python", "django"])
+
+
+def _post(title, body="Body text."):
+    return f":title: {title}\n:tags: python\n\n{body}\n"
+
+
+class ImportRstPostsTests(TestCase):
+    """Imports skip unchanged files and write changed ones in bulk."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.posts_dir = pathlib.Path(self.tmp.name)
+        for day in range(1, 4):
+            path = self.posts_dir / f"2026-01-0{day}-post-{day}.rst"
+            path.write_text(_post(f"Post {day}"), encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _import(self, *args):
+        out = StringIO()
+        call_command(
+            "import_rst_posts",
+            "--posts-dir",
+            self.tmp.name,
+            "--workers",
+            "1",
+            *args,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        return out.getvalue()
+
+    def test_incremental(self):
+        output = self._import()
+        self.assertIn("3 created, 0 updated, 0 skipped", output)
+        entry = Entry.objects.get(slug="post-1")
+        self.assertEqual(entry.tag_list, ["python"])
+        self.assertTrue(entry.has_current_html())
+
+        with self.assertNumQueries(0):
+            output = self._import()
+        self.assertIn("0 created, 0 updated, 3 skipped", output)
+
+        (self.posts_dir / "2026-01-01-post-1.rst").write_text(
+            _post("Post 1", "New body."), encoding="utf-8"
+        )
+        output = self._import()
+        self.assertIn("0 created, 1 updated, 2 skipped", output)
+        self.assertEqual(Entry.objects.get(slug="post-1").body, "New body.")
+
+    def test_other_database_reimports(self):
+        self._import()
+        with patch(
+            "blog.management.commands.import_rst_posts.get_database_key",
+            return_value="other",
+        ):
+            output = self._import()
+        self.assertIn("0 created, 3 updated, 0 skipped", output)
+
+    def test_status_override_reimports(self):
+        self._import()
+        output = self._import("--status", "draft")
+        self.assertIn("0 created, 3 updated", output)
+        self.assertEqual(Entry.objects.filter(status=Entry.DRAFT).count(), 3)
+
+    def test_sync_deletes_orphans(self):
+        self._import()
+        Entry.objects.create(
+            title="Orphan", slug="orphan", pub_date=datetime.date(2020, 1, 1)
+        )
+        (self.posts_dir / "2026-01-03-post-3.rst").unlink()
+        output = self._import("--sync")
+        self.assertIn("2 orphan(s) deleted", output)
+        self.assertEqual(
+            sorted(Entry.objects.values_list("slug", flat=True)),
+            ["post-1", "post-2"],
+        )
+
+    def test_sync_keeps_entries_of_invalid_files(self):
+        self._import()
+        (self.posts_dir / "2026-01-02-post-2.rst").write_text(
+            ":tags: python\n\nNo title.\n", encoding="utf-8"
+        )
+        output = self._import("--sync")
+        self.assertIn("1 errors", output)
+        self.assertIn("0 orphan(s) deleted", output)
+        self.assertTrue(Entry.objects.filter(slug="post-2").exists())
+        # The file is still reported, not skipped as unchanged
+        self.assertIn("1 errors", self._import("--sync"))
+
+
+class BlogToCsvTests(SimpleTestCase):
+    """Repo mode streams entries and --merge drops duplicates."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = pathlib.Path(self.tmp.name)
+        self.repo = self.root / "repo"
+        for number in range(12):
+            write_post(self.repo, number)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, *args):
+        call_command(
+            "blog_to_csv", *args, "--workers", "1", stdout=StringIO(), stderr=StringIO()
+        )
+
+    def _read(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def test_repo_mode(self):
+        output = self.root / "repo.csv"
+        self._run(
+            "--repo-path", str(self.repo), "--run-size", "5", "--output", str(output)
+        )
+        rows = self._read(output)
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(
+            sorted(row["slug"] for row in rows),
+            sorted(f"post-{number}" for number in range(12)),
+        )
+        keys = [(row["pub_date"], row["slug"]) for row in rows]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_merge_deduplicates(self):
+        first = self.root / "first.csv"
+        self._run("--repo-path", str(self.repo), "--output", str(first))
+        rows = self._read(first)
+        second = self.root / "second.csv"
+        with open(second, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+            # The same post with a longer body wins
+            writer.writerow({**rows[0], "body": rows[0]["body"] + "More."})
+
+        merged = self.root / "merged.csv"
+        self._run(
+            "--merge",
+            str(first),
+            str(second),
+            "--run-size",
+            "5",
+            "--output",
+            str(merged),
+        )
+        result = self._read(merged)
+        self.assertEqual(len(result), 12)
+        self.assertEqual(
+            [(row["pub_date"], row["slug"]) for row in result],
+            sorted((row["pub_date"], row["slug"]) for row in rows),
+        )
+        winner = next(row for row in result if row["slug"] == rows[0]["slug"])
+        self.assertTrue(winner["body"].endswith("More."))
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            "benchmark_blog_to_csv", "--posts", "30", "--workers", "2", stdout=out
+        )
+        self.assertIn("Benchmark complete", out.getvalue())
+
+
+class ExportRstPostsTests(TestCase):
+    """Exports with --overwrite only rewrite files whose content changed."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_dir = pathlib.Path(self.tmp.name)
+        for day in range(1, 4):
+            Entry.objects.create(
+                title=f"Post {day}",
+                slug=f"post-{day}",
+                pub_date=datetime.date(2026, 1, day),
+                body="Body.",
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _export(self, *args):
+        out = StringIO()
+        call_command(
+            "export_rst_posts",
+            "--output-dir",
+            self.tmp.name,
+            "--chunk-size",
+            "2",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_incremental(self):
+        output = self._export("--overwrite")
+        self.assertIn("3 added, 0 changed, 0 unchanged", output)
+        path = self.output_dir / "2026-01-01-post-1.rst"
+        mtime = path.stat().st_mtime_ns
+
+        output = self._export("--overwrite")
+        self.assertIn("0 added, 0 changed, 3 unchanged", output)
+        self.assertEqual(path.stat().st_mtime_ns, mtime)
+
+        Entry.objects.filter(slug="post-2").update(body="New body.")
+        output = self._export("--overwrite")
+        self.assertIn("0 added, 1 changed, 2 unchanged", output)
+        self.assertIn(
+            "New body.",
+            (self.output_dir / "2026-01-02-post-2.rst").read_text(encoding="utf-8"),
+        )
+        self.assertEqual(list(self.output_dir.glob("*.tmp")), [])
+
+    def test_existing_files_skipped_without_overwrite(self):
+        self._export()
+        output = self._export()
+        self.assertIn("0 added, 0 changed, 0 unchanged, 3 skipped", output)
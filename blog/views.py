@@ -11,8 +11,9 @@ class EntryListView(ListView):
     paginate_by = 20
 
     def get_queryset(self):
+        # The summary fields stand in for body, so ?page=all stays small
         qs = Entry.objects.only(
-            "title", "slug", "pub_date", "tags", "source", "body", "status"
+            "title", "slug", "pub_date", "status", *Entry.SUMMARY_FIELDS
         )
         if not (self.request.user.is_staff or self.request.user.is_superuser):
             qs = qs.filter(status=Entry.PUBLISHED)
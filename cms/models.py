@@ -3,14 +3,19 @@
 import django_mongodb_backend.fields
 from django.db import models
 
+from aclarknet.rst import RenderedBodyMixin
 
-class NowEntry(models.Model):
+
+class NowEntry(RenderedBodyMixin, models.Model):
     """A single 'now page' snapshot. Latest entry is shown at /now/."""
 
     id = django_mongodb_backend.fields.ObjectIdAutoField(
         primary_key=True, serialize=False
     )
     body = models.TextField(help_text="RST-formatted content.")
+    # Rendered from body on save, see aclarknet.rst
+    body_html = models.TextField(blank=True, editable=False)
+    body_hash = models.CharField(max_length=64, blank=True, editable=False)
     updated_at = models.DateField(help_text="Date this entry was written.")
     location = models.CharField(
         max_length=200, blank=True, help_text="e.g. Bethesda, MD, USA"
@@ -23,17 +28,3 @@ class NowEntry(models.Model):
 
     def __str__(self):
         return f"Now ({self.updated_at})"
-
-    def render_body(self):
-        """Render RST body to HTML, falling back to plain text."""
-        try:
-            from docutils.core import publish_parts
-
-            parts = publish_parts(
-                source=self.body,
-                writer_name="html",
-                settings_overrides={"initial_header_level": 2},
-            )
-            return parts["body"]
-        except Exception:
-            return self.body
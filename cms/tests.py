@@ -1,12 +1,15 @@
 """Tests for the CMS app."""
 
 import os
+from io import StringIO
 from unittest.mock import patch
 from django.core import mail
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 
 from .forms import ContactFormPublic
+from .models import NowEntry
 
 
 class ContactFormTests(TestCase):
@@ -167,6 +170,10 @@ class ContactViewTests(TestCase):
         # Should redirect after successful submission
         self.assertEqual(response.status_code, 302)
 
+        # The email is queued, not sent, during the request
+        self.assertEqual(len(mail.outbox), 0)
+        call_command("send_outbox", stdout=StringIO())
+
         # Check that one email was sent
         self.assertEqual(len(mail.outbox), 1)
 
@@ -179,3 +186,42 @@ class ContactViewTests(TestCase):
         self.assertIn("I have a question about your services", email.body)
         self.assertEqual(email.to, ["aclark@aclark.net"])
         self.assertEqual(email.from_email, "aclark@aclark.net")
+
+
+class NowEntryRenderedBodyTests(TestCase):
+    """The now page body is rendered on save and served from storage."""
+
+    def setUp(self):
+        self.entry = NowEntry.objects.create(
+            body="Now\n===\n\nWorking on *things*.", updated_at="2026-01-01"
+        )
+
+    def test_rendered_on_save(self):
+        self.assertIn("<em>things</em>", self.entry.body_html)
+        self.assertTrue(self.entry.body_hash)
+
+    def test_stored_html_served(self):
+        entry = NowEntry.objects.get(pk=self.entry.pk)
+        with patch("aclarknet.rst.render_rst") as render_rst:
+            html = entry.render_body()
+        render_rst.assert_not_called()
+        self.assertEqual(html, self.entry.body_html)
+
+    def test_stale_html_rerendered(self):
+        NowEntry.objects.filter(pk=self.entry.pk).update(body="Now *later*.")
+        entry = NowEntry.objects.get(pk=self.entry.pk)
+        self.assertIn("<em>later</em>", entry.render_body())
+
+        out = StringIO()
+        call_command("rerender_posts", "--model", "now", "--workers", "1", stdout=out)
+        self.assertIn("Rendered 1 Now Entries", out.getvalue())
+        entry.refresh_from_db()
+        self.assertIn("<em>later</em>", entry.body_html)
+
+        out = StringIO()
+        call_command("rerender_posts", "--model", "now", "--workers", "1", stdout=out)
+        self.assertIn("Rendered 0 Now Entries", out.getvalue())
+
+    def test_now_view(self):
+        response = self.client.get(reverse("now"))
+        self.assertContains(response, "<em>things</em>")
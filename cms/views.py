@@ -7,7 +7,7 @@ from django.contrib import messages
 from django.urls import reverse_lazy
 from django.views.generic import FormView, TemplateView
 
-from aclarknet.email_utils import send_email_with_headers
+from aclarknet.email_utils import queue_email_with_headers
 from db.models import Note
 from .forms import ContactFormPublic
 
@@ -183,14 +183,13 @@ Message:
 This email was sent from the contact form at {self.request.build_absolute_uri("/")}
 """
 
-            # Send email with improved headers for better deliverability
-            send_email_with_headers(
+            # Queue for the send_outbox worker instead of sending inline
+            queue_email_with_headers(
                 subject=email_subject,
                 plain_message=email_body,
                 recipient_list=[contact_email],
                 from_email=settings.DEFAULT_FROM_EMAIL,
                 reply_to=email,  # Set reply-to to the contact form submitter
-                fail_silently=False,
             )
         except Exception as e:
             # Log the error but don't prevent the success message
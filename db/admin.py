@@ -11,6 +11,7 @@ from .models import (
     Contact,
     Invoice,
     Note,
+    OutboxEmail,
     Project,
     Task,
     Time,
@@ -271,3 +272,10 @@ class TimeResource(ImportExportModelResource):
 @admin.register(Time)
 class TimeAdmin(ImportExportModelAdmin):
     resource_class = TimeResource
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "status", "attempts", "created", "sent_at"]
+    list_filter = ["status"]
+    readonly_fields = ["created", "claimed_at", "sent_at", "last_error"]
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class DBConfig(AppConfig):
@@ -7,6 +8,8 @@ class DBConfig(AppConfig):
 
     def ready(self):
         import db.signals  # noqa
+        from db.field_registry import build_field_registry
+        from db import instrumentation, slowlog
         from bson import ObjectId
         from telepath import BaseAdapter, ValueNode
         from wagtail.admin.telepath import register as wagtail_register
@@ -16,3 +19,9 @@ class DBConfig(AppConfig):
                 return ValueNode(str(obj))
 
         wagtail_register(ObjectIdAdapter(), ObjectId)
+        build_field_registry()
+        # Listeners must exist before the MongoDB client is created
+        if getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            instrumentation.register_listener()
+        if getattr(settings, "SLOW_COMMAND_LOG_ENABLED", False):
+            slowlog.register_listener()
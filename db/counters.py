@@ -0,0 +1,99 @@
+"""Atomic named counters.
+
+Invoice numbers used to be ``Max(invoice_number) + 1`` under
+``select_for_update()``. That scanned every invoice on each create, and it
+locked nothing on MongoDB. Now each :class:`~db.models.Counter` document
+holds the last value handed out. :func:`reserve` increments it with a
+single ``findAndModify``, so concurrent workers never get the same value.
+A whole block of values can be reserved for bulk creation.
+
+A counter is created on first use at its seed, for invoices the highest
+existing invoice number. Values set explicitly, by imports or fixtures,
+move the counter forward with :func:`advance`, so it never hands out a
+value already taken. Counters are updated outside any transaction and
+values are not given back when a save fails, so sequences may have gaps.
+"""
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+INVOICE_NUMBER = "invoice_number"
+
+# Counter name -> (model label, field) whose maximum seeds the counter
+COUNTER_SEEDS = {
+    INVOICE_NUMBER: ("db.Invoice", "invoice_number"),
+}
+
+
+def _collection(using):
+    from .models import Counter
+
+    return connections[using].get_collection(Counter._meta.db_table)
+
+
+def get_seed(name, using=DEFAULT_DB_ALIAS):
+    """Return the starting value of a counter (0 for unseeded names)."""
+    if name not in COUNTER_SEEDS:
+        return 0
+    label, field = COUNTER_SEEDS[name]
+    model = apps.get_model(label)
+    queryset = model._default_manager.using(using)
+    return queryset.aggregate(value=Max(field))["value"] or 0
+
+
+def _create(name, using):
+    try:
+        _collection(using).update_one(
+            {"name": name}, {"$max": {"value": get_seed(name, using)}}, upsert=True
+        )
+    except DuplicateKeyError:
+        # Another worker created it first
+        pass
+
+
+def _increment(name, count, using):
+    return _collection(using).find_one_and_update(
+        {"name": name},
+        {"$inc": {"value": count}},
+        projection={"_id": False, "value": True},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def reserve(name, count=1, using=DEFAULT_DB_ALIAS):
+    """Reserve ``count`` consecutive values of a counter, as a range."""
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    document = _increment(name, count, using)
+    if document is None:
+        _create(name, using)
+        document = _increment(name, count, using)
+    last = document["value"]
+    return range(last - count + 1, last + 1)
+
+
+def advance(name, value, using=DEFAULT_DB_ALIAS):
+    """Move a counter forward to at least ``value``."""
+    collection = _collection(using)
+    result = collection.update_one({"name": name}, {"$max": {"value": value}})
+    if result.matched_count == 0:
+        _create(name, using)
+        collection.update_one({"name": name}, {"$max": {"value": value}})
+
+
+def next_invoice_number(using=DEFAULT_DB_ALIAS):
+    """Return a new, unused invoice number."""
+    return reserve(INVOICE_NUMBER, using=using)[0]
+
+
+def reserve_invoice_numbers(count, using=DEFAULT_DB_ALIAS):
+    """Reserve a block of invoice numbers for bulk creation."""
+    return reserve(INVOICE_NUMBER, count, using=using)
+
+
+def advance_invoice_number(value, using=DEFAULT_DB_ALIAS):
+    """Record an explicitly set invoice number."""
+    advance(INVOICE_NUMBER, value, using=using)
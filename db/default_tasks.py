@@ -0,0 +1,93 @@
+"""Process-local cache of default tasks.
+
+A time entry saved without a task gets its project's ``default_task``, or
+else the global default task ("Software Development"). The time form and
+its ``time_api_*`` lookups need the same answer. Both change rarely, so
+each process caches them:
+
+* the global default task, created on first use;
+* per project id, the project's default task (or None).
+
+The ``Task`` and ``Project`` save and delete signals in ``db.signals`` clear
+the cache of the process that made the change, as does ``post_migrate``
+(sent after migrations and ``flush``). Other processes see the change after
+DEFAULT_TASK_CACHE_TIMEOUT seconds.
+
+Callers get a copy of the cached task, so changing the copy leaves the
+cache alone.
+"""
+
+import copy
+import threading
+import time
+
+from django.conf import settings
+
+DEFAULT_TASK_NAME = "Software Development"
+DEFAULT_TASK_DEFAULTS = {"rate": 187.50, "unit": 1.0}
+
+# Cache key of the global default task; projects are keyed by id
+_DEFAULT = object()
+
+_cache = {}
+_lock = threading.Lock()
+# Bumped on every clear, so a load that raced with a change isn't stored
+_generation = 0
+
+
+def _get(key, load):
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+        generation = _generation
+    if entry is not None and entry[1] > now:
+        value = entry[0]
+    else:
+        value = load()
+        with _lock:
+            if generation == _generation:
+                _cache[key] = (value, now + settings.DEFAULT_TASK_CACHE_TIMEOUT)
+    return copy.copy(value)
+
+
+def _load_default_task():
+    from .models import Task
+
+    task, _ = Task.objects.get_or_create(
+        name=DEFAULT_TASK_NAME, defaults=DEFAULT_TASK_DEFAULTS
+    )
+    return task
+
+
+def get_default_task():
+    """Return the global default task."""
+    return _get(_DEFAULT, _load_default_task)
+
+
+def get_project_default_task(project_id):
+    """Return a project's default task, or the global default task.
+
+    Raises ``Project.DoesNotExist`` for an unknown project.
+    """
+    from .models import Project
+
+    if project_id is None:
+        return get_default_task()
+
+    def load():
+        project = (
+            Project.objects.select_related("default_task")
+            .only("default_task")
+            .get(pk=project_id)
+        )
+        return project.default_task
+
+    return _get(str(project_id), load) or get_default_task()
+
+
+def clear_default_tasks():
+    """Drop every cached task, in this process."""
+    global _generation
+    with _lock:
+        _cache.clear()
+        _generation += 1
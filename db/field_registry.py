@@ -0,0 +1,121 @@
+"""Displayable field registry for the db models.
+
+List, detail and related tables show the fields of each model's form
+(``ClientForm`` for ``Client`` and so on). Instantiating a form to read its
+fields on every request, or for every item of a related panel, is wasted
+work: the field list only depends on the form class and, for ``TimeForm``,
+on whether the user is a superuser.
+
+:func:`build_field_registry` runs once from ``DBConfig.ready()``. It
+records, for every model with a form and for each role, the field names
+and the column formatter of each field. Form classes that are not
+registered (custom view forms) are added the first time they are looked
+up.
+"""
+
+from collections import namedtuple
+from types import SimpleNamespace
+
+from django.apps import apps
+
+from .templatetags.babel import currencyfmt
+
+ROLE_USER = "user"
+ROLE_SUPERUSER = "superuser"
+ROLES = (ROLE_USER, ROLE_SUPERUSER)
+
+CURRENCY_FIELDS = ("amount", "paid_amount", "cost", "net", "balance")
+
+FieldSet = namedtuple("FieldSet", ["fields", "formatters"])
+
+_form_classes = {}  # model -> form class
+_field_sets = {}  # (form class, role) -> FieldSet
+
+
+# ---- Column formatters ----
+def format_currency(value):
+    """Format as USD, treating None as 0."""
+    return currencyfmt(value if value is not None else 0, "USD")
+
+
+def format_hours(value):
+    return value if value is not None else 0
+
+
+def format_invoice(value):
+    """Show the invoice, or "Not invoiced"."""
+    return "Not invoiced" if value is None else str(value)
+
+
+def format_default(value):
+    return value if value is not None else ""
+
+
+def get_formatter(field_name):
+    """Return the column formatter for a field name."""
+    if field_name in CURRENCY_FIELDS:
+        return format_currency
+    if field_name == "hours":
+        return format_hours
+    if field_name == "invoice":
+        return format_invoice
+    return format_default
+
+
+# ---- Registry ----
+def get_role(user):
+    """Return the registry role for a user (None is a regular user)."""
+    return ROLE_SUPERUSER if getattr(user, "is_superuser", False) else ROLE_USER
+
+
+def _read_fields(form_class, role):
+    # Role-aware forms (TimeForm) take a ``user`` keyword; a stand-in with
+    # only ``is_superuser`` is enough to pick their field set.
+    user = SimpleNamespace(is_superuser=role == ROLE_SUPERUSER, is_authenticated=True)
+    try:
+        form = form_class(user=user)
+    except TypeError:
+        form = form_class()
+    fields = tuple(form.fields)
+    return FieldSet(fields, {name: get_formatter(name) for name in fields})
+
+
+def register_form(form_class):
+    """Record the field sets of a form class for every role."""
+    for role in ROLES:
+        _field_sets[(form_class, role)] = _read_fields(form_class, role)
+
+
+def build_field_registry():
+    """Register the ``<Model>Form`` of every db model from ``db.forms``."""
+    from . import forms
+
+    _form_classes.clear()
+    _field_sets.clear()
+    for model in apps.get_app_config("db").get_models():
+        form_class = getattr(forms, f"{model.__name__}Form", None)
+        if form_class is None or getattr(form_class._meta, "model", None) is not model:
+            continue
+        _form_classes[model] = form_class
+        register_form(form_class)
+
+
+def get_form_class(model):
+    """Return the registered form class of a model, or None."""
+    return _form_classes.get(model)
+
+
+def get_form_field_set(form_class, user=None):
+    """Return the :class:`FieldSet` of a form class for a user's role."""
+    key = (form_class, get_role(user))
+    if key not in _field_sets:
+        register_form(form_class)
+    return _field_sets[key]
+
+
+def get_model_field_set(model, user=None):
+    """Return the :class:`FieldSet` of a model for a user's role, or None."""
+    form_class = get_form_class(model)
+    if form_class is None:
+        return None
+    return get_form_field_set(form_class, user)
@@ -0,0 +1,256 @@
+"""Index advice for the query shapes the views run.
+
+:data:`QUERY_SHAPES` declares the hot queries of ``db/views``,
+``cms/views.py`` and ``blog/views.py``: the model, the equality filters, the
+sort, and any range filter. :func:`advise` fills the filters with values
+sampled from the database, asks the server to ``explain`` each query, and
+times a page of results.
+
+A shape needs an index when its winning plan scans the collection
+(``COLLSCAN``) or sorts in memory (``SORT``). The proposed index follows the
+equality, sort, range rule: the equality fields first, then the sort
+fields, then the range fields. A proposal is dropped if an existing index
+on the collection already starts with the same keys.
+
+The ``index_advisor`` management command reports the advice. It can
+measure each proposal by building the index temporarily, and prints it as
+a ``Meta.indexes`` entry to add to the model before ``makemigrations``.
+"""
+
+import time
+from collections import namedtuple
+
+from bson import json_util
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+from .slowlog import find_winning_plans
+
+# Placeholder for a filter value sampled from an existing row
+SAMPLE = object()
+
+# One query shape. ``filters`` maps field names to values (or SAMPLE),
+# ``ranges`` maps field names to a lookup such as "lt", compared with a
+# sampled value, and ``limit`` is the page size the view fetches.
+QueryShape = namedtuple(
+    "QueryShape",
+    ["name", "model", "filters", "order_by", "ranges", "limit"],
+    defaults=({}, 20),
+)
+
+QUERY_SHAPES = (
+    # db/views: time entries, newest first, by user or for a superuser
+    QueryShape("time_list_user", "db.Time", {"user": SAMPLE}, ("-date", "-pk")),
+    QueryShape("time_list", "db.Time", {}, ("-date", "-pk")),
+    QueryShape("invoice_list_user", "db.Invoice", {"user": SAMPLE}, ("-issue_date",)),
+    QueryShape("invoice_dashboard", "db.Invoice", {}, ("-issue_date",), limit=10),
+    QueryShape(
+        "note_object",
+        "db.Note",
+        {"content_type": SAMPLE, "object_id": SAMPLE},
+        ("-created",),
+    ),
+    QueryShape("note_list", "db.Note", {}, ("pk",)),
+    # cms/views.py: clients page and testimonials
+    QueryShape(
+        "featured_clients", "db.Client", {"featured": True}, ("category", "name")
+    ),
+    QueryShape(
+        "testimonials", "db.Note", {"is_testimonial": True}, ("-created",), limit=3
+    ),
+    QueryShape("now_entry", "cms.NowEntry", {}, ("-updated_at",), limit=1),
+    # blog/views.py: published entries and the previous entry of a post
+    QueryShape("entry_list", "blog.Entry", {"status": "published"}, ("-pub_date",)),
+    QueryShape(
+        "entry_previous",
+        "blog.Entry",
+        {"status": "published"},
+        ("-pub_date",),
+        ranges={"pub_date": "lt"},
+        limit=1,
+    ),
+)
+
+Advice = namedtuple(
+    "Advice", ["shape", "model", "plan", "duration_ms", "index", "covered_by"]
+)
+
+PlanSummary = namedtuple("PlanSummary", ["collscan", "sort", "indexes"])
+
+
+def get_model(shape):
+    return apps.get_model(shape.model)
+
+
+def _field_name(model, name):
+    return model._meta.pk.name if name == "pk" else name
+
+
+def get_sample(shape, using=DEFAULT_DB_ALIAS):
+    """Return ``{field name: value}`` for the sampled filters, or None.
+
+    The values come from one row that has all of them, so shapes such as
+    ``(content_type, object_id)`` match an existing object.
+    """
+    model = get_model(shape)
+    names = [name for name, value in shape.filters.items() if value is SAMPLE]
+    names += list(shape.ranges)
+    if not names:
+        return {}
+    attnames = [model._meta.get_field(name).attname for name in names]
+    row = (
+        model._default_manager.using(using)
+        .filter(**{f"{attname}__isnull": False for attname in attnames})
+        .values(*attnames)
+        .first()
+    )
+    if row is None:
+        return None
+    return dict(zip(names, (row[attname] for attname in attnames)))
+
+
+def build_queryset(shape, sample, using=DEFAULT_DB_ALIAS):
+    """Return the queryset of a shape with its sampled values filled in."""
+    model = get_model(shape)
+    lookups = {}
+    for name, value in shape.filters.items():
+        if value is SAMPLE:
+            lookups[model._meta.get_field(name).attname] = sample[name]
+        else:
+            lookups[name] = value
+    for name, lookup in shape.ranges.items():
+        lookups[f"{name}__{lookup}"] = sample[name]
+    queryset = model._default_manager.using(using).filter(**lookups)
+    return queryset.order_by(*shape.order_by)[: shape.limit]
+
+
+def get_proposed_index(shape):
+    """Return the equality, sort, range index for a shape."""
+    model = get_model(shape)
+    fields = []
+    seen = set()
+    candidates = [*shape.filters, *shape.order_by, *shape.ranges]
+    for candidate in candidates:
+        name = _field_name(model, candidate.lstrip("-"))
+        if name not in seen:
+            seen.add(name)
+            fields.append(f"-{name}" if candidate.startswith("-") else name)
+    index = models.Index(fields=fields)
+    index.set_name_with_model(model)
+    return index
+
+
+def _index_keys(model, index):
+    """Return ``[(column, direction)]`` for a Django index."""
+    keys = []
+    for name, order in index.fields_orders:
+        column = model._meta.get_field(name).column
+        keys.append((column, -1 if order == "DESC" else 1))
+    return keys
+
+
+def _is_prefix(keys, existing, equality):
+    """Whether ``keys`` starts ``existing``, in the same or reverse order.
+
+    Directions of the leading equality fields don't matter.
+    """
+    if len(keys) > len(existing):
+        return False
+    if [column for column, _ in keys] != [
+        column for column, _ in existing[: len(keys)]
+    ]:
+        return False
+    directions = [
+        (direction, existing[position][1])
+        for position, (_, direction) in enumerate(keys)
+        if position >= equality
+    ]
+    same = all(a == b for a, b in directions)
+    reverse = all(a == -b for a, b in directions)
+    return same or reverse
+
+
+def get_covering_index(shape, index, using=DEFAULT_DB_ALIAS):
+    """Return the name of an existing index that serves ``index``, or None."""
+    model = get_model(shape)
+    keys = _index_keys(model, index)
+    collection = connections[using].get_collection(model._meta.db_table)
+    for name, info in collection.index_information().items():
+        existing = [(column, int(direction)) for column, direction in info["key"]]
+        if _is_prefix(keys, existing, equality=len(shape.filters)):
+            return name
+    return None
+
+
+def _stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+def summarize_plans(plans):
+    """Return a :class:`PlanSummary` of the winning plans of an explain."""
+    stages = list(_stages(plans))
+    return PlanSummary(
+        collscan=any(stage["stage"] == "COLLSCAN" for stage in stages),
+        sort=any(stage["stage"] == "SORT" for stage in stages),
+        indexes=sorted(
+            {stage["indexName"] for stage in stages if stage.get("indexName")}
+        ),
+    )
+
+
+def explain_queryset(queryset):
+    """Return the :class:`PlanSummary` of a queryset's winning plan."""
+    explain = json_util.loads(queryset.explain())
+    return summarize_plans(find_winning_plans(explain))
+
+
+def time_queryset(queryset, repeat=5):
+    """Return the best wall time, in milliseconds, of fetching a queryset."""
+    best = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        list(queryset.all())
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def advise(shapes=QUERY_SHAPES, repeat=5, using=DEFAULT_DB_ALIAS):
+    """Explain and time each shape; return ``(advice, skipped shape names)``.
+
+    ``Advice.index`` is the proposed index when the plan scans the
+    collection or sorts in memory and no existing index covers it.
+    """
+    advice = []
+    skipped = []
+    for shape in shapes:
+        sample = get_sample(shape, using=using)
+        if sample is None:
+            skipped.append(shape.name)
+            continue
+        queryset = build_queryset(shape, sample, using=using)
+        plan = explain_queryset(queryset)
+        index = covered_by = None
+        if plan.collscan or plan.sort:
+            index = get_proposed_index(shape)
+            covered_by = get_covering_index(shape, index, using=using)
+            if covered_by is not None:
+                index = None
+        advice.append(
+            Advice(
+                shape=shape,
+                model=get_model(shape),
+                plan=plan,
+                duration_ms=time_queryset(queryset, repeat),
+                index=index,
+                covered_by=covered_by,
+            )
+        )
+    return advice, skipped
@@ -0,0 +1,166 @@
+"""Per-request query and latency instrumentation.
+
+When INSTRUMENTATION_ENABLED is set, ``db.middleware.InstrumentationMiddleware``
+samples a fraction (INSTRUMENTATION_SAMPLE_RATE) of requests. For a sampled
+request, :class:`CommandCounter`, a pymongo ``CommandListener`` registered
+at startup, counts the MongoDB commands it issues and their total server
+time. The middleware adds view and template render time. Unsampled
+requests cost one random draw, and the listener returns at once for them.
+
+Totals are kept per URL name in this process (see :func:`get_summary`),
+shown on the superuser performance page under ``/dashboard/analytics/``,
+and optionally returned as ``X-DB-*`` response headers. Requests over their
+INSTRUMENTATION_BUDGETS entry are logged as warnings.
+"""
+
+import logging
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+BUDGET_METRICS = ("commands", "db_ms", "view_ms", "render_ms")
+
+_current = ContextVar("db_request_stats", default=None)
+_totals = {}
+_totals_lock = threading.Lock()
+_registered = False
+
+
+class RequestStats:
+    """Commands and timings (in seconds) for one request."""
+
+    __slots__ = ("commands", "db_time", "view_time", "render_time")
+
+    def __init__(self):
+        self.commands = 0
+        self.db_time = 0.0
+        self.view_time = 0.0
+        self.render_time = 0.0
+
+    def as_metrics(self):
+        """Return the stats as budget metrics (times in milliseconds)."""
+        return {
+            "commands": self.commands,
+            "db_ms": self.db_time * 1000,
+            "view_ms": self.view_time * 1000,
+            "render_ms": self.render_time * 1000,
+        }
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Add each finished command to the current request's stats, if any."""
+
+    def started(self, event):
+        pass
+
+    def _finished(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.commands += 1
+            stats.db_time += event.duration_micros / 1_000_000
+
+    succeeded = _finished
+    failed = _finished
+
+
+def register_listener():
+    """Register :class:`CommandCounter` with pymongo (once).
+
+    Must run before the database client is created, so it is called from
+    ``DBConfig.ready()``.
+    """
+    global _registered
+    if not _registered:
+        monitoring.register(CommandCounter())
+        _registered = True
+
+
+def start_request():
+    """Start collecting stats for the current request; returns a token."""
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    """Stop collecting stats for the current request."""
+    _current.reset(token)
+
+
+def get_budget(url_name):
+    """Return the budget dict for a URL name, or None."""
+    return getattr(settings, "INSTRUMENTATION_BUDGETS", {}).get(url_name)
+
+
+def get_budget_overruns(url_name, stats):
+    """Return ``{metric: (value, limit)}`` for metrics over budget."""
+    budget = get_budget(url_name)
+    if not budget:
+        return {}
+    metrics = stats.as_metrics()
+    return {
+        metric: (metrics[metric], budget[metric])
+        for metric in BUDGET_METRICS
+        if metric in budget and metrics[metric] > budget[metric]
+    }
+
+
+def record(url_name, stats):
+    """Add a finished request to the totals and check its budget."""
+    metrics = stats.as_metrics()
+    with _totals_lock:
+        totals = _totals.get(url_name)
+        if totals is None:
+            totals = _totals[url_name] = {
+                "requests": 0,
+                "over_budget": 0,
+                **{metric: 0 for metric in BUDGET_METRICS},
+                **{f"max_{metric}": 0 for metric in BUDGET_METRICS},
+            }
+        totals["requests"] += 1
+        for metric in BUDGET_METRICS:
+            totals[metric] += metrics[metric]
+            totals[f"max_{metric}"] = max(totals[f"max_{metric}"], metrics[metric])
+
+    overruns = get_budget_overruns(url_name, stats)
+    if overruns:
+        with _totals_lock:
+            totals["over_budget"] += 1
+        logger.warning(
+            "%s over budget: %s",
+            url_name,
+            ", ".join(
+                f"{metric}={value:g} (budget {limit:g})"
+                for metric, (value, limit) in overruns.items()
+            ),
+        )
+    return overruns
+
+
+def get_summary():
+    """Return per-URL-name averages and maxima, slowest DB time first."""
+    with _totals_lock:
+        snapshot = {name: dict(totals) for name, totals in _totals.items()}
+    rows = []
+    for url_name, totals in snapshot.items():
+        requests = totals["requests"]
+        row = {
+            "url_name": url_name,
+            "requests": requests,
+            "over_budget": totals["over_budget"],
+            "budget": get_budget(url_name),
+        }
+        for metric in BUDGET_METRICS:
+            row[f"avg_{metric}"] = totals[metric] / requests
+            row[f"max_{metric}"] = totals[f"max_{metric}"]
+        rows.append(row)
+    return sorted(rows, key=lambda row: row["avg_db_ms"], reverse=True)
+
+
+def reset():
+    """Clear the collected totals."""
+    with _totals_lock:
+        _totals.clear()
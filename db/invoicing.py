@@ -0,0 +1,303 @@
+"""Invoice totals engine.
+
+Each time entry stores its own line totals: ``hours``, ``amount`` (task rate
+times hours) and ``cost`` (user rate times hours). When a time entry changes,
+only the difference between its previous and current line totals is applied
+to the invoice, in a single atomic update. A full rebuild that reprices every
+time entry from the current task and user rates remains available as an
+explicit fallback for backfills and drift repair.
+
+Bulk writes are coalesced with :class:`coalesce_invoice_totals`: inside it
+changed invoices are only marked dirty, and each dirty invoice is re-summed
+exactly once when the outermost block exits, before its transaction commits.
+Bulk edits (formsets, bulk deletes) therefore cost a constant number of
+writes per invoice regardless of how many rows changed.
+"""
+
+import threading
+from collections import namedtuple
+from contextlib import ContextDecorator
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+ZERO = Decimal("0")
+
+_state = threading.local()
+
+LINE_FIELDS = ("invoice_id", "hours", "amount", "cost")
+
+LineTotals = namedtuple("LineTotals", LINE_FIELDS)
+
+
+def to_decimal(value):
+    """Return a value as a Decimal, with None as zero."""
+    if value is None:
+        return ZERO
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def compute_line_totals(time):
+    """Return ``(amount, cost)`` for a time entry from its task and user rates.
+
+    Missing tasks, users or rates count as zero.
+    """
+    hours = to_decimal(time.hours)
+    try:
+        amount = time.task.rate * hours
+    except (AttributeError, TypeError):
+        amount = ZERO
+    try:
+        cost = time.user.rate * hours
+    except (AttributeError, TypeError):
+        cost = ZERO
+    return amount, cost
+
+
+def get_line_totals(time):
+    """Return the :class:`LineTotals` currently held by a time entry.
+
+    Reads the instance ``__dict__`` directly so deferred fields are never
+    loaded; returns None when any of the line fields is deferred.
+    """
+    values = time.__dict__
+    if any(field not in values for field in LINE_FIELDS):
+        return None
+    return LineTotals(
+        values["invoice_id"],
+        to_decimal(values["hours"]),
+        to_decimal(values["amount"]),
+        to_decimal(values["cost"]),
+    )
+
+
+def _total(field_name):
+    return Coalesce(F(field_name), Value(ZERO), output_field=DecimalField())
+
+
+def apply_invoice_delta(invoice_id, hours=ZERO, amount=ZERO, cost=ZERO):
+    """Add deltas to an invoice's totals with one atomic update.
+
+    ``net`` and ``balance`` are derived in the same write so the invoice is
+    never observed half-updated.
+    """
+    from .models import Invoice
+
+    if invoice_id is None or not (hours or amount or cost):
+        return
+    new_amount = _total("amount") + Value(amount)
+    new_cost = _total("cost") + Value(cost)
+    Invoice.objects.filter(pk=invoice_id).update(
+        hours=_total("hours") + Value(hours),
+        amount=new_amount,
+        cost=new_cost,
+        net=new_amount - new_cost,
+        balance=new_amount - _total("paid_amount"),
+    )
+
+
+def apply_line_change(old, new):
+    """Apply the change from ``old`` to ``new`` line totals to the invoices.
+
+    Either side may be None (a new or deleted time entry). When the entry
+    moved between invoices its old totals are removed from the old invoice
+    and its new totals added to the new one. Inside
+    :class:`coalesce_invoice_totals` the affected invoices are only marked
+    dirty.
+    """
+    dirty = getattr(_state, "dirty_invoices", None)
+    if dirty is not None:
+        dirty.update(line.invoice_id for line in (old, new) if line is not None)
+        dirty.discard(None)
+        return
+    if old is not None and new is not None and old.invoice_id == new.invoice_id:
+        apply_invoice_delta(
+            new.invoice_id,
+            hours=new.hours - old.hours,
+            amount=new.amount - old.amount,
+            cost=new.cost - old.cost,
+        )
+        return
+    if old is not None:
+        apply_invoice_delta(
+            old.invoice_id, hours=-old.hours, amount=-old.amount, cost=-old.cost
+        )
+    if new is not None:
+        apply_invoice_delta(
+            new.invoice_id, hours=new.hours, amount=new.amount, cost=new.cost
+        )
+
+
+def _write_totals(invoice_id, hours, amount, cost):
+    from .models import Invoice
+
+    totals = {"hours": hours, "amount": amount, "cost": cost, "net": amount - cost}
+    Invoice.objects.filter(pk=invoice_id).update(
+        balance=Value(amount) - _total("paid_amount"), **totals
+    )
+    return totals
+
+
+def write_invoice_totals(invoice, hours, amount, cost):
+    """Overwrite an invoice's totals with one update and mirror them in memory."""
+    hours, amount, cost = to_decimal(hours), to_decimal(amount), to_decimal(cost)
+    totals = _write_totals(invoice.pk, hours, amount, cost)
+    totals["balance"] = amount - to_decimal(invoice.paid_amount)
+    for field_name, value in totals.items():
+        setattr(invoice, field_name, value)
+    return invoice
+
+
+def get_invoice_statistics(invoice):
+    """Return per-user and overall hours, amount and cost for an invoice.
+
+    Runs a single grouped aggregation over the invoice's time entries (the
+    MongoDB backend compiles it to one ``$lookup``/``$group`` pipeline), so
+    the cost does not grow with the number of entries. Accepts an invoice
+    instance or primary key. Returns a dict with ``hours``, ``amount`` and
+    ``cost`` totals over all entries, and ``users``: one dict per user with
+    ``user_id``, ``username``, ``user_rate``, ``hours``, ``amount`` and
+    ``cost``, ordered by username. Entries without a user count towards the
+    totals only.
+    """
+    from .models import Time
+
+    invoice_id = getattr(invoice, "pk", invoice)
+    rows = (
+        Time.objects.filter(invoice_id=invoice_id)
+        .values("user", "user__username", "user__rate")
+        .annotate(
+            total_hours=Sum("hours"),
+            total_amount=Sum("amount"),
+            total_cost=Sum("cost"),
+        )
+        .order_by("user__username")
+    )
+    stats = {"hours": ZERO, "amount": ZERO, "cost": ZERO, "users": []}
+    for row in rows:
+        hours = to_decimal(row["total_hours"])
+        amount = to_decimal(row["total_amount"])
+        cost = to_decimal(row["total_cost"])
+        stats["hours"] += hours
+        stats["amount"] += amount
+        stats["cost"] += cost
+        if row["user"] is not None:
+            stats["users"].append(
+                {
+                    "user_id": row["user"],
+                    "username": row["user__username"],
+                    "user_rate": row["user__rate"],
+                    "hours": hours,
+                    "amount": amount,
+                    "cost": cost,
+                }
+            )
+    return stats
+
+
+def sync_invoice_totals(invoice):
+    """Re-sum an invoice from the line totals stored on its time entries.
+
+    Accepts an invoice instance (whose in-memory totals are refreshed too)
+    or a primary key. One aggregation and one write; time entries are not
+    repriced.
+    """
+    from .models import Invoice
+
+    stats = get_invoice_statistics(invoice)
+    if isinstance(invoice, Invoice):
+        return write_invoice_totals(
+            invoice, stats["hours"], stats["amount"], stats["cost"]
+        )
+    _write_totals(invoice, stats["hours"], stats["amount"], stats["cost"])
+    return None
+
+
+class coalesce_invoice_totals(ContextDecorator):
+    """Re-sum each invoice touched inside the block exactly once, on exit.
+
+    Usable as a context manager or view decorator; wrap it in (or around)
+    ``transaction.atomic`` so the totals commit with the rows. The block is
+    also a :class:`~db.rollups.coalesce_rollups` block, so dashboard rollups
+    touched inside it are refreshed once, after the invoice totals. Dirty
+    invoices and the nesting depth are tracked per thread, never on the
+    instance, so one decorator instance can serve concurrent requests.
+    Nested blocks join the outermost one, and nothing is written if the
+    block raises.
+    """
+
+    def __enter__(self):
+        from .rollups import coalesce_rollups
+
+        depth = getattr(_state, "depth", 0)
+        if depth == 0:
+            _state.dirty_invoices = set()
+        _state.depth = depth + 1
+        coalesce_rollups().__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        from .rollups import coalesce_rollups
+
+        # Rollups read invoice totals, so they are refreshed last
+        rollups = coalesce_rollups()
+        _state.depth -= 1
+        if _state.depth:
+            return rollups.__exit__(exc_type, exc_value, traceback)
+        invoice_ids = _state.dirty_invoices
+        del _state.dirty_invoices
+        if exc_type is None:
+            try:
+                for invoice_id in invoice_ids:
+                    sync_invoice_totals(invoice_id)
+            except BaseException as exc:
+                rollups.__exit__(type(exc), exc, exc.__traceback__)
+                raise
+        return rollups.__exit__(exc_type, exc_value, traceback)
+
+
+def invoice_totals_deferred():
+    """Return whether invoice totals are being coalesced on this thread."""
+    return getattr(_state, "dirty_invoices", None) is not None
+
+
+def mark_invoice_dirty(invoice):
+    """Re-sum an invoice now, or on exit of the enclosing coalescing block.
+
+    Accepts an invoice instance or primary key, like
+    :func:`sync_invoice_totals`.
+    """
+    if invoice is None:
+        return
+    dirty = getattr(_state, "dirty_invoices", None)
+    if dirty is None:
+        sync_invoice_totals(invoice)
+    else:
+        dirty.add(getattr(invoice, "pk", invoice))
+
+
+def rebuild_invoice_totals(invoice):
+    """Reprice every time entry on an invoice and rewrite the invoice totals.
+
+    This is the full-recompute fallback: it picks up task and user rate
+    changes that the incremental path does not see. Changed time entries
+    are written with a single ``bulk_update``.
+    """
+    from .models import Time
+
+    hours = amount = cost = ZERO
+    changed = []
+    for time in Time.objects.filter(invoice=invoice).select_related("task", "user"):
+        line_amount, line_cost = compute_line_totals(time)
+        if (time.amount, time.cost) != (line_amount, line_cost):
+            time.amount, time.cost = line_amount, line_cost
+            changed.append(time)
+        hours += to_decimal(time.hours)
+        amount += line_amount
+        cost += line_cost
+    if changed:
+        Time.objects.bulk_update(changed, ["amount", "cost"])
+    return write_invoice_totals(invoice, hours, amount, cost)
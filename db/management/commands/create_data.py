@@ -4,6 +4,7 @@ from decimal import Decimal
 from django.core.management.base import BaseCommand
 from faker import Faker
 
+from db.counters import reserve_invoice_numbers
 from db.models import Company, Client, Contact, Project, Invoice, Time, Task
 
 from siteuser.models import SiteUser
@@ -366,8 +367,13 @@ class Command(BaseCommand):
         # Create Invoices (without amounts initially)
         invoices = []
         if create_invoices:
-            for _ in range(num_invoices):
+            # One counter update for the whole batch of invoice numbers
+            invoice_numbers = (
+                reserve_invoice_numbers(num_invoices) if num_invoices else []
+            )
+            for invoice_number in invoice_numbers:
                 invoice = Invoice.objects.create(
+                    invoice_number=invoice_number,
                     name=fake.sentence(),
                     issue_date=fake.date_this_decade(),
                     due_date=fake.date_this_decade(),
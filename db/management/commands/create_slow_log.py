@@ -0,0 +1,29 @@
+"""
+Django management command to create the slow MongoDB command log.
+
+The slow command log (see db.slowlog) is a capped collection sized by
+SLOW_COMMAND_LOG_SIZE. It is created on the first write if missing; run this
+command on deploy so the size is set up front.
+"""
+
+from django.core.management.base import BaseCommand
+
+from db.slowlog import SLOW_COMMAND_COLLECTION, create_slow_log_collection
+
+
+class Command(BaseCommand):
+    """
+    Create the capped slow command log collection.
+
+    Usage Examples:
+        python manage.py create_slow_log
+    """
+
+    help = "Create the capped collection for the slow MongoDB command log"
+
+    def handle(self, *args, **options):
+        if create_slow_log_collection():
+            message = f"Created {SLOW_COMMAND_COLLECTION}"
+        else:
+            message = f"{SLOW_COMMAND_COLLECTION} already exists"
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,156 @@
+"""
+Django management command to propose indexes for the views' query shapes.
+
+Replays the queries declared in db.index_advisor.QUERY_SHAPES against the
+current database, explains and times them, and proposes compound indexes
+for the ones that scan a collection or sort in memory. Proposals can be
+measured by building each index temporarily. Proposals are printed as
+Meta.indexes entries; add them to the models and run makemigrations.
+"""
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from db.index_advisor import (
+    QUERY_SHAPES,
+    advise,
+    build_queryset,
+    explain_queryset,
+    get_sample,
+    time_queryset,
+)
+
+
+def _describe(plan):
+    stages = [
+        name
+        for name, flag in (("COLLSCAN", plan.collscan), ("SORT", plan.sort))
+        if flag
+    ]
+    stages += [f"IXSCAN {name}" for name in plan.indexes]
+    return ", ".join(stages) or "no stages"
+
+
+def _index_code(index):
+    return f"models.Index(fields={index.fields!r}, name={index.name!r})"
+
+
+class Command(BaseCommand):
+    """
+    Explain the views' query shapes and propose compound indexes.
+
+    Usage Examples:
+        # Report plans, timings and proposed indexes
+        python manage.py index_advisor
+
+        # Also build each proposed index temporarily and time it
+        python manage.py index_advisor --measure
+
+        # Only some shapes
+        python manage.py index_advisor --shape time_list_user --shape entry_list
+    """
+
+    help = "Explain the views' query shapes and propose compound indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--shape",
+            action="append",
+            dest="shape_names",
+            choices=[shape.name for shape in QUERY_SHAPES],
+            help="Query shape to check (may be given more than once)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per query; the best is reported (default: 5)",
+        )
+        parser.add_argument(
+            "--measure",
+            action="store_true",
+            help="Build each proposed index temporarily and time the query again",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to replay the queries against (default: default)",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        shapes = QUERY_SHAPES
+        if options["shape_names"]:
+            shapes = [
+                shape for shape in QUERY_SHAPES if shape.name in options["shape_names"]
+            ]
+        using = options["database"]
+
+        advice, skipped = advise(shapes, repeat=options["repeat"], using=using)
+        for name in skipped:
+            self.stdout.write(f"{name}: skipped, no sample data")
+
+        proposals = {}
+        for item in advice:
+            self.stdout.write(
+                f"{item.shape.name} ({item.shape.model}): "
+                f"{_describe(item.plan)}, {item.duration_ms:.2f} ms"
+            )
+            if item.index is not None:
+                self.stdout.write(f"  propose {_index_code(item.index)}")
+                key = (item.model, tuple(item.index.fields))
+                proposals.setdefault(key, item.index)
+            elif item.covered_by:
+                self.stdout.write(f"  covered by existing index {item.covered_by}")
+
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS("No indexes to propose"))
+            return
+
+        if options["measure"]:
+            self.measure(advice, proposals, options["repeat"], using)
+        self.print_meta_indexes(proposals)
+        self.stdout.write(self.style.SUCCESS(f"Proposed {len(proposals)} index(es)"))
+
+    def measure(self, advice, proposals, repeat, using):
+        """Build each proposed index, re-time its shapes, then drop it."""
+        connection = connections[using]
+        for (model, fields), index in proposals.items():
+            with connection.schema_editor() as editor:
+                editor.add_index(model, index)
+            try:
+                for item in advice:
+                    if item.model is not model or item.index is None:
+                        continue
+                    if tuple(item.index.fields) != fields:
+                        continue
+                    queryset = build_queryset(
+                        item.shape, get_sample(item.shape, using=using), using=using
+                    )
+                    plan = explain_queryset(queryset)
+                    duration = time_queryset(queryset, repeat)
+                    self.stdout.write(
+                        f"{item.shape.name} with {index.name}: {_describe(plan)}, "
+                        f"{item.duration_ms:.2f} ms -> {duration:.2f} ms"
+                    )
+            finally:
+                with connection.schema_editor() as editor:
+                    editor.remove_index(model, index)
+
+    def print_meta_indexes(self, proposals):
+        """List the proposals as Meta.indexes entries, by model.
+
+        Migrations are left to ``makemigrations``, so they always match the
+        models' Meta.
+        """
+        by_model = defaultdict(list)
+        for (model, _), index in proposals.items():
+            by_model[model].append(index)
+        self.stdout.write("Add to Meta.indexes, then run makemigrations:")
+        for model, indexes in by_model.items():
+            self.stdout.write(f"  {model._meta.label}:")
+            for index in indexes:
+                self.stdout.write(f"    {_index_code(index)},")
@@ -0,0 +1,51 @@
+"""
+Django management command to rebuild invoice totals from their time entries.
+
+Invoice totals are normally maintained incrementally as time entries change.
+This command is the explicit full-recompute fallback: it reprices every time
+entry from the current task and user rates and rewrites the invoice totals.
+Use it after changing rates, after importing data, or to repair drift.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from db.invoicing import rebuild_invoice_totals
+from db.models import Invoice
+
+
+class Command(BaseCommand):
+    """
+    Rebuild invoice totals (hours, amount, cost, net, balance).
+
+    Usage Examples:
+        # Rebuild every invoice
+        python manage.py rebuild_invoices
+
+        # Rebuild specific invoices by invoice number
+        python manage.py rebuild_invoices --invoice 101 --invoice 102
+    """
+
+    help = "Reprice time entries and rebuild invoice totals"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--invoice",
+            type=int,
+            action="append",
+            dest="invoice_numbers",
+            help="Invoice number to rebuild (may be given more than once)",
+        )
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.all()
+        if options["invoice_numbers"]:
+            invoices = invoices.filter(invoice_number__in=options["invoice_numbers"])
+            if not invoices.exists():
+                raise CommandError("No matching invoices found.")
+
+        count = 0
+        for invoice in invoices.iterator():
+            rebuild_invoice_totals(invoice)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt totals for {count} invoices"))
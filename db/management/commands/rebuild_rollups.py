@@ -0,0 +1,27 @@
+"""
+Django management command to rebuild the dashboard rollups.
+
+Dashboard rollups (per-user, per-month hours and invoice totals) are normally
+maintained as time entries and invoices change. This command recomputes all
+of them from scratch. Run it after migrating, after importing data, or to
+repair drift.
+"""
+
+from django.core.management.base import BaseCommand
+
+from db.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the dashboard rollups from time entries and invoices.
+
+    Usage Examples:
+        python manage.py rebuild_rollups
+    """
+
+    help = "Recompute the per-user, per-month dashboard rollups"
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollups"))
@@ -0,0 +1,55 @@
+"""
+Django management command to rebuild the search token index.
+
+The index is normally kept current as searchable objects are saved and
+deleted. This command rebuilds it from scratch, for the initial backfill,
+after importing data, or to repair drift.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from db.search import SEARCH_MODELS, rebuild_search_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the search token index.
+
+    Usage Examples:
+        # Rebuild the index for every searchable model
+        python manage.py rebuild_search_index
+
+        # Rebuild only notes and time entries
+        python manage.py rebuild_search_index --model note --model time
+    """
+
+    help = "Rebuild the search token index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="model_names",
+            choices=[model._meta.model_name for model in SEARCH_MODELS],
+            help="Model to re-index (may be given more than once)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Index entries written per batch (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        search_models = SEARCH_MODELS
+        if options["model_names"]:
+            search_models = [
+                model
+                for model in SEARCH_MODELS
+                if model._meta.model_name in options["model_names"]
+            ]
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        count = rebuild_search_index(search_models, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} objects"))
@@ -0,0 +1,79 @@
+"""
+Django management command to deliver queued outgoing email.
+
+Requests queue email in the outbox (see aclarknet.email_utils) instead of
+talking to SES/SMTP inline. This command drains the outbox in batches, each
+sent over a single backend connection, retrying failures with exponential
+backoff and recording the delivery status of every message.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from aclarknet.email_utils import send_outbox
+
+
+class Command(BaseCommand):
+    """
+    Send queued outbox email.
+
+    Usage Examples:
+        # Send everything that is currently due, then exit
+        python manage.py send_outbox
+
+        # Run as a worker, polling every 10 seconds
+        python manage.py send_outbox --loop --interval 10
+
+        # Use smaller batches
+        python manage.py send_outbox --batch-size 10
+    """
+
+    help = "Deliver queued outbox email"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Messages per batch (default: EMAIL_OUTBOX_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll the outbox for new messages",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds to wait between polls with --loop (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            totals = self.drain(options["batch_size"])
+            if not options["loop"]:
+                break
+            if any(totals.values()):
+                self.report(totals)
+            time.sleep(options["interval"])
+        self.report(totals)
+
+    def drain(self, batch_size):
+        """Send batches until nothing due is left."""
+        totals = {"sent": 0, "retried": 0, "failed": 0}
+        while True:
+            counts = send_outbox(batch_size)
+            for key, value in counts.items():
+                totals[key] += value
+            if not any(counts.values()):
+                return totals
+
+    def report(self, totals):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {totals['sent']} emails "
+                f"({totals['retried']} to retry, {totals['failed']} failed)"
+            )
+        )
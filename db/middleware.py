@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 # Via https://github.com/Zegocover/enmerkar/blob/master/enmerkar/middleware.py
 
+import random
+import time
 from threading import local
 
 from babel import Locale, UnknownLocaleError
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.utils.deprecation import MiddlewareMixin
 from django.utils.translation import get_language
 
-__all__ = ["get_current_locale", "LocaleMiddleware"]
+from . import instrumentation, slowlog
+
+__all__ = [
+    "get_current_locale",
+    "InstrumentationMiddleware",
+    "LocaleMiddleware",
+    "SlowCommandOriginMiddleware",
+]
 
 _thread_locals = local()
 
@@ -34,3 +45,87 @@ class LocaleMiddleware(MiddlewareMixin):
             pass
         else:
             _thread_locals.locale = request.locale = locale
+
+
+class InstrumentationMiddleware:
+    """Measure MongoDB commands, view and render time for sampled requests.
+
+    Not loaded unless INSTRUMENTATION_ENABLED is set; see
+    :mod:`db.instrumentation`.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        instrumentation.register_listener()
+        self.get_response = get_response
+        self.sample_rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        self.headers = settings.INSTRUMENTATION_HEADERS
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        stats, token = instrumentation.start_request()
+        request._instrumentation = {"stats": stats, "view_start": None}
+        try:
+            response = self.get_response(request)
+        finally:
+            instrumentation.end_request(token)
+
+        timing = request._instrumentation
+        if timing["view_start"] is not None and not stats.view_time:
+            # Not a template response: the view ran until now
+            stats.view_time = time.perf_counter() - timing["view_start"]
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            instrumentation.record(match.view_name, stats)
+        if self.headers:
+            metrics = stats.as_metrics()
+            response["X-DB-Commands"] = str(metrics["commands"])
+            response["X-DB-Time-Ms"] = f"{metrics['db_ms']:.1f}"
+            response["X-View-Time-Ms"] = f"{metrics['view_ms']:.1f}"
+            response["X-Render-Time-Ms"] = f"{metrics['render_ms']:.1f}"
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing = getattr(request, "_instrumentation", None)
+        if timing is not None:
+            timing["view_start"] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timing = getattr(request, "_instrumentation", None)
+        if timing is None or timing["view_start"] is None:
+            return response
+        stats = timing["stats"]
+        render_start = time.perf_counter()
+        stats.view_time = render_start - timing["view_start"]
+
+        def rendered(response):
+            stats.render_time = time.perf_counter() - render_start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class SlowCommandOriginMiddleware:
+    """Record the view name as the origin of slow commands.
+
+    Not loaded unless SLOW_COMMAND_LOG_ENABLED is set; see :mod:`db.slowlog`.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SLOW_COMMAND_LOG_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = slowlog.set_origin(request.path)
+        try:
+            return self.get_response(request)
+        finally:
+            slowlog.reset_origin(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slowlog.set_origin(request.resolver_match.view_name)
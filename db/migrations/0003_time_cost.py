@@ -0,0 +1,72 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+ZERO = Decimal("0")
+
+
+def _rate_times(related, hours):
+    try:
+        return related.rate * hours
+    except (AttributeError, TypeError):
+        return ZERO
+
+
+def backfill_line_totals(apps, schema_editor):
+    """Price existing time entries and rewrite invoice totals from them.
+
+    Mirrors db.invoicing.rebuild_invoice_totals with the historical models,
+    so invoices re-summed from Time.cost after this migration keep the
+    figures the full recompute used to give them.
+    """
+    Invoice = apps.get_model("db", "Invoice")
+    Time = apps.get_model("db", "Time")
+    using = schema_editor.connection.alias
+
+    totals = defaultdict(lambda: [ZERO, ZERO, ZERO])
+    times = []
+    for time in Time.objects.using(using).select_related("task", "user").iterator():
+        hours = time.hours if time.hours is not None else ZERO
+        time.amount = _rate_times(time.task, hours)
+        time.cost = _rate_times(time.user, hours)
+        times.append(time)
+        if time.invoice_id is not None:
+            line = totals[time.invoice_id]
+            line[0] += hours
+            line[1] += time.amount
+            line[2] += time.cost
+    Time.objects.using(using).bulk_update(times, ["amount", "cost"], batch_size=500)
+
+    for invoice_id, paid_amount in Invoice.objects.using(using).values_list(
+        "pk", "paid_amount"
+    ):
+        hours, amount, cost = totals.get(invoice_id, (ZERO, ZERO, ZERO))
+        Invoice.objects.using(using).filter(pk=invoice_id).update(
+            hours=hours,
+            amount=amount,
+            cost=cost,
+            net=amount - cost,
+            balance=amount - (paid_amount or ZERO),
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("db", "0002_stripe"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="time",
+            name="cost",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                max_digits=12,
+                null=True,
+                verbose_name="Cost",
+            ),
+        ),
+        migrations.RunPython(backfill_line_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+import django.db.models.deletion
+import django_mongodb_backend.fields
+from django.db import migrations, models
+
+
+def backfill_search_index(apps, schema_editor):
+    from db.search import rebuild_search_index
+
+    rebuild_search_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("db", "0005_dashboardrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchToken",
+            fields=[
+                (
+                    "id",
+                    django_mongodb_backend.fields.ObjectIdAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("object_id", models.CharField(max_length=255)),
+                ("token", models.CharField(max_length=64)),
+                ("weight", models.PositiveIntegerField(default=1)),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["token"], name="db_search_token_idx"),
+                    models.Index(
+                        fields=["content_type", "object_id"],
+                        name="db_search_object_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
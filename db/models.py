@@ -1,10 +1,14 @@
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models, transaction
+from django.db import models, router
 from django.urls import reverse
 from django.utils import timezone
 
+from .counters import advance_invoice_number, next_invoice_number
+from .default_tasks import get_default_task, get_project_default_task
+from .invoicing import compute_line_totals
+
 # --- Base Classes & Mixins ---
 
 
@@ -145,11 +149,8 @@ class Task(BaseModel):
 
     @classmethod
     def get_default_task(cls):
-        task, _ = cls.objects.get_or_create(
-            name="Software Development",
-            defaults={"rate": 187.50, "unit": 1.0},
-        )
-        return task
+        """Return the default task, cached per process (see db.default_tasks)."""
+        return get_default_task()
 
 
 class Invoice(BaseModel):
@@ -191,15 +192,26 @@ class Invoice(BaseModel):
     class Meta:
         ordering = ["-issue_date", "name"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_invoice_number = instance.__dict__.get("invoice_number")
+        return instance
+
     def save(self, *args, **kwargs):
-        # Auto-generate invoice number if not set
-        if self.invoice_number is None:
-            with transaction.atomic():
-                # Use select_for_update to prevent race conditions
-                max_invoice = Invoice.objects.select_for_update().aggregate(
-                    models.Max("invoice_number")
-                )["invoice_number__max"]
-                self.invoice_number = (max_invoice or 0) + 1
+        # Invoice numbers come from an atomic counter, see db.counters. It is
+        # only written for new invoices and changed numbers.
+        if "invoice_number" not in self.get_deferred_fields():
+            using = kwargs.get("using") or router.db_for_write(
+                self.__class__, instance=self
+            )
+            if self.invoice_number is None:
+                self.invoice_number = next_invoice_number(using=using)
+            elif self._state.adding or self.invoice_number != getattr(
+                self, "_loaded_invoice_number", None
+            ):
+                advance_invoice_number(self.invoice_number, using=using)
+            self._loaded_invoice_number = self.invoice_number
 
         if not self.name:
             self.name = (
@@ -243,13 +255,15 @@ class Time(BaseModel):
     amount = models.DecimalField(
         "Amount", blank=True, null=True, max_digits=12, decimal_places=2
     )
+    cost = models.DecimalField(
+        "Cost", blank=True, null=True, max_digits=12, decimal_places=2
+    )
 
     def save(self, *args, **kwargs):
-        if not self.task:
-            if self.project and self.project.default_task:
-                self.task = self.project.default_task
-            else:
-                self.task = Task.get_default_task()
+        if self.task_id is None:
+            self.task = get_project_default_task(self.project_id)
+        # Line totals are stored so invoice totals can be updated by delta
+        self.amount, self.cost = compute_line_totals(self)
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -283,6 +297,15 @@ class Note(BaseModel):
         help_text="Check to feature this testimonial on the homepage",
     )
 
+    class Meta:
+        indexes = [
+            # Notes of an object (or a page of objects), newest first
+            models.Index(
+                fields=["content_type", "object_id", "created"],
+                name="db_note_object_idx",
+            ),
+        ]
+
     def __str__(self):
         if self.name:
             return self.name
@@ -350,3 +373,111 @@ class Payment(BaseModel):
 
     def get_absolute_url(self):
         return reverse("payment_view", args=[self.id])
+
+
+class SearchToken(models.Model):
+    """One word of a searchable object's text, maintained by ``db.search``."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=255)
+    token = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["token"], name="db_search_token_idx"),
+            models.Index(
+                fields=["content_type", "object_id"], name="db_search_object_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.token
+
+
+class DashboardRollup(models.Model):
+    """Dashboard totals for one user and month, maintained by ``db.rollups``."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="dashboard_rollups",
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+    )
+    month = models.DateField()
+    entered_hours = models.DecimalField(default=0, max_digits=12, decimal_places=2)
+    approved_hours = models.DecimalField(default=0, max_digits=12, decimal_places=2)
+    gross = models.DecimalField(default=0, max_digits=12, decimal_places=2)
+    cost = models.DecimalField(default=0, max_digits=12, decimal_places=2)
+    net = models.DecimalField(default=0, max_digits=12, decimal_places=2)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-month"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "month"], name="db_rollup_user_month_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user or 'No user'} {self.month:%Y-%m}"
+
+
+class Counter(models.Model):
+    """A named sequence, such as invoice numbers, maintained by ``db.counters``."""
+
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class OutboxEmail(models.Model):
+    """An outgoing email waiting to be delivered by the ``send_outbox`` worker.
+
+    Requests enqueue fully rendered messages here instead of talking to
+    SES/SMTP directly; see ``aclarknet.email_utils``.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    created = models.DateTimeField(auto_now_add=True, editable=False)
+    subject = models.CharField(max_length=998)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, null=True)
+    from_email = models.CharField(max_length=320)
+    to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["created"]
+        verbose_name = "outbox email"
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="db_outbox_status_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
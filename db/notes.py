@@ -0,0 +1,87 @@
+"""Notes attached to objects through the ``Note`` generic foreign key.
+
+Notes are looked up by ``(content_type, object_id, created)``, which the
+``db_note_object_idx`` index on ``Note`` serves for one object or a whole
+page of objects. The batched helpers take any mix of model instances and
+run a single query, so list tables can show note counts at no per-row cost.
+"""
+
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Q
+
+
+def _note_key(content_type_id, object_id):
+    return (content_type_id, str(object_id))
+
+
+def _object_filter(objects):
+    """Return a Note filter matching any of the objects, or None."""
+    ids_by_model = defaultdict(set)
+    for obj in objects:
+        if obj is not None and obj.pk is not None:
+            ids_by_model[obj.__class__].add(str(obj.pk))
+    if not ids_by_model:
+        return None
+    content_types = ContentType.objects.get_for_models(*ids_by_model)
+    match = Q()
+    for model, ids in ids_by_model.items():
+        match |= Q(content_type=content_types[model], object_id__in=sorted(ids))
+    return match
+
+
+def get_notes(obj):
+    """Return the notes of one object, newest first."""
+    return get_notes_for_objects([obj]).get(obj, [])
+
+
+def get_notes_for_objects(objects):
+    """Return ``{object: [notes, newest first]}`` for objects with notes."""
+    from .models import Note
+
+    objects = list(objects)
+    match = _object_filter(objects)
+    if match is None:
+        return {}
+    notes = defaultdict(list)
+    queryset = (
+        Note.objects.filter(match)
+        .select_related("user")
+        .order_by("content_type", "object_id", "-created")
+    )
+    for note in queryset:
+        notes[_note_key(note.content_type_id, note.object_id)].append(note)
+    return _by_object(objects, notes)
+
+
+def get_note_counts(objects):
+    """Return ``{object: note count}`` for objects with notes."""
+    from .models import Note
+
+    objects = list(objects)
+    match = _object_filter(objects)
+    if match is None:
+        return {}
+    counts = {
+        _note_key(row["content_type"], row["object_id"]): row["count"]
+        for row in Note.objects.filter(match)
+        .values("content_type", "object_id")
+        .annotate(count=Count("pk"))
+        .order_by()
+    }
+    return _by_object(objects, counts)
+
+
+def _by_object(objects, values):
+    content_types = ContentType.objects.get_for_models(
+        *{obj.__class__ for obj in objects if obj is not None}
+    )
+    result = {}
+    for obj in objects:
+        if obj is None:
+            continue
+        key = _note_key(content_types[obj.__class__].pk, obj.pk)
+        if key in values:
+            result[obj] = values[key]
+    return result
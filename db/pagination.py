@@ -0,0 +1,250 @@
+"""Keyset (cursor) pagination.
+
+Django's ``Paginator`` runs ``count()`` and then skips ``(page - 1) *
+per_page`` documents, so deep pages and large collections get slower and
+slower. :class:`CursorPaginator` instead orders by ``(ordering fields, pk)``
+and fetches the rows strictly after (or before) the last row shown, which an
+index on the ordering fields serves at a constant cost per page. Positions
+are passed between requests as opaque, URL-safe cursor tokens.
+
+The same keyset gives detail views their first/previous/next/last links
+(:meth:`CursorPaginator.get_neighbors`).
+"""
+
+import base64
+import functools
+import json
+import operator
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+def _encode_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class CursorPage:
+    """One page of a :class:`CursorPaginator`.
+
+    Exposes the parts of Django's ``Page`` that the list templates use
+    (``object_list``, ``has_next``, ``has_previous``, ``paginator``), plus
+    ``next_cursor`` and ``previous_cursor`` tokens.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate a queryset by the keyset of its ordering fields and pk.
+
+    Every field of the queryset's ordering (or of ``ordering``) is part of
+    the sort key, each in its own direction, so pages come back in the same
+    order as the offset-paginated list. The primary key, in the direction
+    of the first field, breaks ties. Orderings other than plain field names
+    of the model (expressions, related lookups, random) raise ``ValueError``.
+    With ``estimate_total`` the paginator exposes ``estimated_count``, the
+    collection's document count from its metadata, which is cheap but
+    ignores any filters on the queryset.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None, estimate_total=False):
+        self.per_page = max(int(per_page), 1)
+        self.estimate_total = estimate_total
+        self.model = queryset.model
+        ordering = ordering or queryset.query.order_by or self.model._meta.ordering
+        # (field name, descending, field) for each sort key, ending with pk
+        self.keys = []
+        for name in ordering or ["pk"]:
+            if not isinstance(name, str) or name == "?" or "__" in name:
+                raise ValueError(f"Cannot paginate by cursor on {name!r}.")
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            if name in ("pk", self.model._meta.pk.name):
+                self.keys.append(("pk", descending, self.model._meta.pk))
+                break
+            self.keys.append((name, descending, self.model._meta.get_field(name)))
+        else:
+            self.keys.append(("pk", self.keys[0][1], self.model._meta.pk))
+        self.queryset = queryset.order_by(*self._ordering(reverse=False))
+
+    def _ordering(self, reverse):
+        return [
+            f"{'-' if descending != reverse else ''}{name}"
+            for name, descending, _ in self.keys
+        ]
+
+    @property
+    def estimated_count(self):
+        if not self.estimate_total:
+            return None
+        connection = connections[self.queryset.db]
+        collection = connection.get_collection(self.model._meta.db_table)
+        return collection.estimated_document_count()
+
+    # ---- Cursor tokens ----
+    def encode_cursor(self, obj, direction):
+        values = [_encode_value(value) for value in self._sort_values(obj)]
+        # The pk is always a string, since ObjectIds aren't JSON
+        values[-1] = str(values[-1])
+        data = json.dumps([direction, values], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, token):
+        try:
+            data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            direction, values = json.loads(data)
+            if direction not in ("next", "previous"):
+                raise ValueError(direction)
+            if len(values) != len(self.keys):
+                raise ValueError(values)
+            values = [
+                None if value is None else field.to_python(value)
+                for value, (_, _, field) in zip(values, self.keys)
+            ]
+        except (TypeError, ValueError, ValidationError, json.JSONDecodeError) as e:
+            raise InvalidCursor(token) from e
+        return direction, values
+
+    # ---- Keyset filters ----
+    def _key_after(self, name, descending, value):
+        """Return a filter for rows strictly after ``value`` on one key.
+
+        Nulls sort first in ascending order and last in descending order,
+        as in MongoDB. Null checks are explicit so comparisons never depend
+        on how the backend orders nulls against values.
+        """
+        if value is None:
+            if descending:
+                return None
+            return Q(**{f"{name}__isnull": False})
+        lookup = "lt" if descending else "gt"
+        after = Q(**{f"{name}__isnull": False, f"{name}__{lookup}": value})
+        if descending:
+            after |= Q(**{f"{name}__isnull": True})
+        return after
+
+    def _after(self, values, reverse):
+        """Return a filter for rows strictly after the keyset ``values``.
+
+        Rows are after when they tie on the first keys and come after on
+        the next one, for some number of leading ties.
+        """
+        # The pk key is never null, so there is always at least one branch
+        branches = []
+        equal = Q()
+        for (name, descending, _), value in zip(self.keys, values):
+            key_after = self._key_after(name, descending != reverse, value)
+            if key_after is not None:
+                branches.append(equal & key_after)
+            if value is None:
+                equal &= Q(**{f"{name}__isnull": True})
+            else:
+                equal &= Q(**{name: value})
+        return functools.reduce(operator.or_, branches)
+
+    def _sort_values(self, obj):
+        return [
+            obj.pk if name == "pk" else getattr(obj, field.attname)
+            for name, _, field in self.keys
+        ]
+
+    def _first(self, reverse, after=None):
+        queryset = self.queryset.order_by(*self._ordering(reverse))
+        if after is not None:
+            queryset = queryset.filter(self._after(after, reverse))
+        return next(iter(queryset[:1]), None)
+
+    def get_first(self):
+        """Return the first object in sort order, or None."""
+        return self._first(reverse=False)
+
+    def get_last(self):
+        """Return the last object in sort order, or None."""
+        return self._first(reverse=True)
+
+    def get_neighbors(self, obj):
+        """Return the first, previous, next and last objects around ``obj``.
+
+        Each lookup is a range query on the sort key limited to one
+        document. When ``obj`` has no previous (or next) object it is itself
+        the first (or last), and that lookup is skipped.
+        """
+        values = self._sort_values(obj)
+        previous_obj = self._first(reverse=True, after=values)
+        next_obj = self._first(reverse=False, after=values)
+        return {
+            "first_object": self.get_first() if previous_obj else obj,
+            "previous_object": previous_obj,
+            "next_object": next_obj,
+            "last_object": self.get_last() if next_obj else obj,
+        }
+
+    def get_page(self, cursor=None):
+        """Return the :class:`CursorPage` for a cursor token (None: first).
+
+        Invalid tokens fall back to the first page.
+        """
+        direction, values = "next", None
+        if cursor:
+            try:
+                direction, values = self.decode_cursor(cursor)
+            except InvalidCursor:
+                cursor = None
+
+        if not cursor:
+            rows = list(self.queryset[: self.per_page + 1])
+            has_more, has_before = len(rows) > self.per_page, False
+            rows = rows[: self.per_page]
+        elif direction == "next":
+            queryset = self.queryset.filter(self._after(values, reverse=False))
+            rows = list(queryset[: self.per_page + 1])
+            has_more, has_before = len(rows) > self.per_page, True
+            rows = rows[: self.per_page]
+        else:
+            queryset = self.queryset.order_by(*self._ordering(reverse=True)).filter(
+                self._after(values, reverse=True)
+            )
+            rows = list(queryset[: self.per_page + 1])
+            has_more, has_before = True, len(rows) > self.per_page
+            rows = rows[: self.per_page][::-1]
+
+        next_cursor = previous_cursor = None
+        if rows and has_more:
+            next_cursor = self.encode_cursor(rows[-1], "next")
+        if rows and has_before:
+            previous_cursor = self.encode_cursor(rows[0], "previous")
+        return CursorPage(rows, self, next_cursor, previous_cursor)
@@ -0,0 +1,105 @@
+"""Related objects shown on detail pages.
+
+Each model's detail page lists the objects around it: parents up the
+time → invoice/project → client → company chain, and children such as an
+invoice's time entries. :data:`RELATED_GRAPHS` declares them per model, in
+display order, and :func:`load_related` resolves a spec in a fixed number
+of queries:
+
+* every :class:`Parent` path is loaded with one ``select_related`` query
+  (a single ``$lookup`` aggregation on MongoDB);
+* each :class:`Children` group is one query, filtered by the object or, with
+  ``through``, by ``pk__in`` on the ids of an earlier group.
+
+Empty groups are simply empty lists, so no ``exists()`` checks are needed.
+"""
+
+from collections import namedtuple
+from itertools import chain
+
+from .models import Client, Invoice, Project, Time
+
+# A parent reached by a foreign key path from the object, e.g.
+# "project__client"
+Parent = namedtuple("Parent", ["path"])
+
+# Objects of ``model`` whose ``field`` points at the object, or with
+# ``through``, at any object of that earlier group
+Children = namedtuple(
+    "Children", ["name", "model", "field", "order_by", "through"], defaults=((), None)
+)
+
+RELATED_GRAPHS = {
+    Time: (
+        Parent("invoice"),
+        Parent("project"),
+        Parent("project__client"),
+        Parent("project__client__company"),
+    ),
+    Invoice: (
+        Children("times", Time, "invoice", order_by=("date",)),
+        Parent("project"),
+        Parent("project__client"),
+        Parent("project__client__company"),
+    ),
+    Project: (
+        Parent("client"),
+        Parent("client__company"),
+        Children("invoices", Invoice, "project", order_by=("-created",)),
+    ),
+    Client: (
+        Parent("company"),
+        Children("projects", Project, "client"),
+        Children(
+            "invoices", Invoice, "project", order_by=("-created",), through="projects"
+        ),
+    ),
+}
+
+
+def _follow(obj, path):
+    for name in path.split("__"):
+        obj = getattr(obj, name)
+        if obj is None:
+            return None
+    return obj
+
+
+def load_related(obj, spec=None):
+    """Resolve the related-graph spec of an object.
+
+    Returns a dict of group name (the parent path or children name) to a
+    list of objects, in spec order.
+    """
+    if spec is None:
+        spec = RELATED_GRAPHS.get(obj.__class__, ())
+
+    paths = [entry.path for entry in spec if isinstance(entry, Parent)]
+    if paths:
+        # select_related() loads the intermediate relations of every path
+        obj = obj.__class__.objects.select_related(*paths).get(pk=obj.pk)
+
+    groups = {}
+    for entry in spec:
+        if isinstance(entry, Parent):
+            parent = _follow(obj, entry.path)
+            groups[entry.path] = [parent] if parent is not None else []
+            continue
+        if entry.through is None:
+            lookup = {entry.field: obj}
+        else:
+            ids = [item.pk for item in groups[entry.through]]
+            if not ids:
+                groups[entry.name] = []
+                continue
+            lookup = {f"{entry.field}__in": ids}
+        queryset = entry.model.objects.filter(**lookup)
+        if entry.order_by:
+            queryset = queryset.order_by(*entry.order_by)
+        groups[entry.name] = list(queryset)
+    return groups
+
+
+def flatten_related(groups):
+    """Return the related objects of :func:`load_related` as one list."""
+    return list(chain.from_iterable(groups.values()))
@@ -0,0 +1,401 @@
+"""Dashboard rollups.
+
+:class:`~db.models.DashboardRollup` holds the dashboard totals for one user
+and month: entered and approved hours (time entries not on a fully paid
+invoice, by time entry user and date) and invoice gross, cost and net (by
+invoice user and issue date). The dashboard sums these rows instead of
+scanning every time entry and invoice.
+
+Rollups are maintained from the ``Time`` and ``Invoice`` signals. A write
+applies its change as deltas: a time entry's hours move from its old
+bucket to its new one, and its amount and cost move the totals of its
+invoices' buckets, so nothing is re-summed. Only when an invoice's paid
+state flips (its balance reaching or leaving zero) do all of its time
+entries enter or leave the totals; then the buckets it feeds are re-summed.
+Inside :class:`coalesce_rollups` (and so inside
+:class:`~db.invoicing.coalesce_invoice_totals`, which opens one and exits
+it after the invoice totals) the touched buckets are collected and re-summed
+once, when the outermost block exits. ``rebuild_rollups`` recomputes
+everything; migration 0005 runs it to backfill, and the command of the same
+name repairs drift.
+"""
+
+import datetime
+import threading
+from collections import defaultdict, namedtuple
+from contextlib import ContextDecorator
+
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import F, Q, Sum, Value
+from django.utils import timezone
+
+from .invoicing import ZERO, invoice_totals_deferred, to_decimal
+
+_state = threading.local()
+
+RollupLine = namedtuple(
+    "RollupLine", ["user_id", "month", "invoice_id", "hours", "amount", "cost"]
+)
+
+InvoiceRollup = namedtuple(
+    "InvoiceRollup", ["user_id", "month", "invoice_id", "gross", "cost", "net", "paid"]
+)
+
+ROLLUP_FIELDS = ("entered_hours", "approved_hours", "gross", "cost", "net")
+
+TIME_FIELDS = ("user_id", "date", "invoice_id", "hours", "amount", "cost")
+
+
+def month_start(value):
+    """Return the first day of the month containing a date or datetime."""
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    return value.replace(day=1)
+
+
+def _next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def get_time_rollup_line(time):
+    """Return the :class:`RollupLine` a time entry currently contributes.
+
+    Reads the instance ``__dict__`` so deferred fields are never loaded;
+    returns None when any of the fields is deferred.
+    """
+    values = time.__dict__
+    if any(field not in values for field in TIME_FIELDS):
+        return None
+    return RollupLine(
+        values["user_id"],
+        month_start(values["date"]),
+        values["invoice_id"],
+        to_decimal(values["hours"]),
+        to_decimal(values["amount"]),
+        to_decimal(values["cost"]),
+    )
+
+
+def get_invoice_rollup(invoice_id):
+    """Return the stored :class:`InvoiceRollup` of an invoice, or None.
+
+    Read from the database rather than an instance, since time entry writes
+    change an invoice's totals behind any instance already loaded.
+    """
+    from .models import Invoice
+
+    row = (
+        Invoice.objects.filter(pk=invoice_id)
+        .values_list("user_id", "issue_date", "amount", "cost", "net", "balance")
+        .first()
+    )
+    if row is None:
+        return None
+    user_id, issue_date, amount, cost, net, balance = row
+    return InvoiceRollup(
+        user_id,
+        month_start(issue_date),
+        invoice_id,
+        to_decimal(amount),
+        to_decimal(cost),
+        to_decimal(net),
+        to_decimal(balance) <= 0,
+    )
+
+
+def _get_invoice_states(invoice_ids):
+    """Return ``{invoice_id: ((user_id, month), balance)}`` for the invoices."""
+    from .models import Invoice
+
+    rows = Invoice.objects.filter(pk__in=list(invoice_ids)).values_list(
+        "pk", "user_id", "issue_date", "balance"
+    )
+    return {
+        pk: ((user_id, month_start(issue_date)), to_decimal(balance))
+        for pk, user_id, issue_date, balance in rows
+    }
+
+
+def _bucket(key):
+    return tuple(key[:2])
+
+
+def mark_rollups_dirty(keys=(), invoice_ids=()):
+    """Re-sum rollups now, or on exit of the enclosing coalescing block.
+
+    This is the fallback for writes whose previous state is unknown.
+    ``keys`` are ``(user_id, month)`` buckets, or any tuple starting with
+    them, to re-sum. Each invoice in ``invoice_ids`` also re-sums its own
+    bucket and the buckets of its time entries.
+    """
+    buckets = {_bucket(key) for key in keys if key is not None and key[1]}
+    invoice_ids = {pk for pk in invoice_ids if pk is not None}
+    if getattr(_state, "depth", 0) == 0:
+        refresh_rollups(buckets, invoice_ids)
+    else:
+        _state.dirty_buckets.update(buckets)
+        _state.dirty_invoice_ids.update(invoice_ids)
+
+
+def apply_rollup_deltas(deltas):
+    """Add deltas to rollups with one atomic update per bucket.
+
+    ``deltas`` maps ``(user_id, month)`` buckets to a dict of
+    ``ROLLUP_FIELDS`` deltas. A bucket that has no rollup yet is re-summed
+    instead, which creates it.
+    """
+    from .models import DashboardRollup
+
+    for (user_id, month), fields in deltas.items():
+        changes = {
+            name: F(name) + Value(delta) for name, delta in fields.items() if delta
+        }
+        if not month or not changes:
+            continue
+        updated = DashboardRollup.objects.filter(user_id=user_id, month=month).update(
+            updated=timezone.now(), **changes
+        )
+        if not updated:
+            refresh_rollup(user_id, month)
+
+
+def _new_deltas():
+    return defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, ZERO))
+
+
+def record_time_change(old, new):
+    """Apply the change from ``old`` to ``new`` :class:`RollupLine` to rollups.
+
+    Either side may be None (a new or deleted time entry). Runs after the
+    invoice totals are updated, so an invoice's balance before the change is
+    its current balance less the change in amount. When that flips the
+    invoice's paid state, the buckets it feeds are re-summed; otherwise the
+    hours and amounts are applied as deltas. Inside
+    :class:`coalesce_rollups` the buckets are only marked dirty.
+    """
+    lines = [line for line in (old, new) if line is not None]
+    amounts = defaultdict(lambda: [ZERO, ZERO])
+    for sign, line in ((-1, old), (1, new)):
+        if line is not None and line.invoice_id is not None:
+            amounts[line.invoice_id][0] += sign * line.amount
+            amounts[line.invoice_id][1] += sign * line.cost
+
+    if getattr(_state, "depth", 0):
+        # Remember each invoice's paid state the first time the block sees it
+        deferred = invoice_totals_deferred()
+        unseen = amounts.keys() - _state.paid.keys()
+        for pk, (_, balance) in _get_invoice_states(unseen).items():
+            if not deferred:
+                balance -= amounts[pk][0]
+            _state.paid[pk] = balance <= 0
+        _state.dirty_buckets.update(_bucket(line) for line in lines)
+        return
+
+    invoices = _get_invoice_states(amounts)
+    flipped = {
+        pk
+        for pk, (_, balance) in invoices.items()
+        if (balance <= 0) != (balance - amounts[pk][0] <= 0)
+    }
+    if flipped:
+        buckets = {_bucket(line) for line in lines}
+        buckets.update(bucket for bucket, _ in invoices.values())
+        refresh_rollups(buckets, flipped)
+        return
+
+    deltas = _new_deltas()
+    for sign, line in ((-1, old), (1, new)):
+        if line is None:
+            continue
+        if line.invoice_id is None:
+            deltas[_bucket(line)]["entered_hours"] += sign * line.hours
+        elif line.invoice_id in invoices and invoices[line.invoice_id][1] > 0:
+            deltas[_bucket(line)]["entered_hours"] += sign * line.hours
+            deltas[_bucket(line)]["approved_hours"] += sign * line.hours
+    for pk, (bucket, _) in invoices.items():
+        amount, cost = amounts[pk]
+        deltas[bucket]["gross"] += amount
+        deltas[bucket]["cost"] += cost
+        deltas[bucket]["net"] += amount - cost
+    apply_rollup_deltas(deltas)
+
+
+def record_invoice_change(old, new):
+    """Apply the change from ``old`` to ``new`` :class:`InvoiceRollup` to rollups.
+
+    ``old`` is None for a new invoice. Runs after the invoice totals are
+    re-summed. The totals move from the old bucket to the new one as deltas,
+    unless the paid state flipped, which re-sums every bucket the invoice
+    feeds. Inside :class:`coalesce_rollups` the buckets are only marked
+    dirty.
+    """
+    if getattr(_state, "depth", 0):
+        _state.dirty_buckets.update(
+            _bucket(totals) for totals in (old, new) if totals is not None
+        )
+        if old is not None:
+            _state.paid.setdefault(old.invoice_id, old.paid)
+        return
+
+    if old is not None and old.paid != new.paid:
+        refresh_rollups({_bucket(old), _bucket(new)}, [new.invoice_id])
+        return
+
+    deltas = _new_deltas()
+    for sign, totals in ((-1, old), (1, new)):
+        if totals is None:
+            continue
+        row = deltas[_bucket(totals)]
+        row["gross"] += sign * totals.gross
+        row["cost"] += sign * totals.cost
+        row["net"] += sign * totals.net
+    apply_rollup_deltas(deltas)
+
+
+class coalesce_rollups(ContextDecorator):
+    """Re-sum each rollup touched inside the block once, on exit.
+
+    Like :class:`~db.invoicing.coalesce_invoice_totals`, all state is kept
+    per thread, nested blocks join the outermost one, and nothing is
+    refreshed if the block raises. The paid state of each invoice is noted
+    when the block first sees it, so only invoices whose paid state flipped
+    re-sum all the buckets they feed.
+    """
+
+    def __enter__(self):
+        depth = getattr(_state, "depth", 0)
+        if depth == 0:
+            _state.dirty_buckets = set()
+            _state.dirty_invoice_ids = set()
+            _state.paid = {}
+        _state.depth = depth + 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _state.depth -= 1
+        if _state.depth:
+            return False
+        buckets = _state.dirty_buckets
+        invoice_ids = _state.dirty_invoice_ids
+        paid = _state.paid
+        del _state.dirty_buckets
+        del _state.dirty_invoice_ids
+        del _state.paid
+        if exc_type is None:
+            for pk, (bucket, balance) in _get_invoice_states(paid).items():
+                buckets.add(bucket)
+                if (balance <= 0) != paid[pk]:
+                    invoice_ids.add(pk)
+            refresh_rollups(buckets, invoice_ids)
+        return False
+
+
+def get_invoice_buckets(invoice_ids):
+    """Return the (user_id, month) buckets the given invoices feed."""
+    from .models import Invoice, Time
+
+    buckets = set()
+    if not invoice_ids:
+        return buckets
+    for user_id, issue_date in Invoice.objects.filter(pk__in=invoice_ids).values_list(
+        "user_id", "issue_date"
+    ):
+        buckets.add((user_id, month_start(issue_date)))
+    for user_id, date in Time.objects.filter(invoice_id__in=invoice_ids).values_list(
+        "user_id", "date"
+    ):
+        buckets.add((user_id, month_start(date)))
+    return buckets
+
+
+def refresh_rollup(user_id, month):
+    """Re-sum one (user, month) rollup from its time entries and invoices."""
+    from .models import DashboardRollup, Invoice, Time
+
+    month = month_start(month)
+    end = _next_month(month)
+    hours = (
+        Time.objects.filter(user_id=user_id, date__gte=month, date__lt=end)
+        .filter(Q(invoice__isnull=True) | Q(invoice__balance__gt=0))
+        .aggregate(
+            entered=Sum("hours"),
+            approved=Sum("hours", filter=Q(invoice__isnull=False)),
+        )
+    )
+    invoices = Invoice.objects.filter(
+        user_id=user_id, issue_date__gte=month, issue_date__lt=end
+    ).aggregate(gross=Sum("amount"), cost=Sum("cost"), net=Sum("net"))
+    rollup, _ = DashboardRollup.objects.update_or_create(
+        user_id=user_id,
+        month=month,
+        defaults={
+            "entered_hours": to_decimal(hours["entered"]),
+            "approved_hours": to_decimal(hours["approved"]),
+            "gross": to_decimal(invoices["gross"]),
+            "cost": to_decimal(invoices["cost"]),
+            "net": to_decimal(invoices["net"]),
+        },
+    )
+    return rollup
+
+
+def refresh_rollups(buckets=(), invoice_ids=()):
+    """Re-sum the given buckets plus every bucket the invoices feed."""
+    buckets = {
+        bucket
+        for bucket in set(buckets) | get_invoice_buckets(invoice_ids)
+        if bucket[1] is not None
+    }
+    for user_id, month in buckets:
+        refresh_rollup(user_id, month)
+    return len(buckets)
+
+
+def rebuild_rollups(apps=global_apps):
+    """Recompute every rollup from scratch in one pass over each collection.
+
+    ``apps`` is the app registry to take the models from, the historical one
+    in a migration. Returns the number of rollups written.
+    """
+    DashboardRollup = apps.get_model("db", "DashboardRollup")
+    Invoice = apps.get_model("db", "Invoice")
+    Time = apps.get_model("db", "Time")
+
+    totals = {}
+
+    def bucket(user_id, date):
+        key = (user_id, month_start(date))
+        if key not in totals:
+            totals[key] = dict.fromkeys(ROLLUP_FIELDS, ZERO)
+        return totals[key]
+
+    times = Time.objects.filter(
+        Q(invoice__isnull=True) | Q(invoice__balance__gt=0)
+    ).values_list("user_id", "date", "hours", "invoice_id")
+    for user_id, date, hours, invoice_id in times.iterator():
+        row = bucket(user_id, date)
+        row["entered_hours"] += to_decimal(hours)
+        if invoice_id is not None:
+            row["approved_hours"] += to_decimal(hours)
+
+    invoices = Invoice.objects.values_list(
+        "user_id", "issue_date", "amount", "cost", "net"
+    )
+    for user_id, issue_date, amount, cost, net in invoices.iterator():
+        row = bucket(user_id, issue_date)
+        row["gross"] += to_decimal(amount)
+        row["cost"] += to_decimal(cost)
+        row["net"] += to_decimal(net)
+
+    rollups = [
+        DashboardRollup(user_id=user_id, month=month, **row)
+        for (user_id, month), row in totals.items()
+        if month is not None
+    ]
+    with transaction.atomic():
+        DashboardRollup.objects.all().delete()
+        DashboardRollup.objects.bulk_create(rollups)
+    return len(rollups)
@@ -0,0 +1,90 @@
+"""Column-oriented field values for list, search and related tables.
+
+``BaseView.get_field_values`` used to build a list of ``(name, value)``
+tuples for every row, repeating the field names on each one. A
+:class:`FieldValuesPage` keeps each distinct tuple of field names once and
+stores a row as a slotted :class:`FieldValuesRow` holding that shared header
+and a tuple of values.
+
+Rows still iterate as ``(name, value)`` pairs and index as
+``row.0.1``-style lookups, so templates and callers written for the tuple
+lists keep working. Templates should prefer ``row.model_name``,
+``row.object_id`` and ``row.cells``.
+"""
+
+TYPE_FIELD = "type"
+ID_FIELD = "id"
+
+
+class FieldValuesRow:
+    """One table row: a shared header tuple and a tuple of values."""
+
+    __slots__ = ("headers", "values", "note_count")
+
+    def __init__(self, headers, values, note_count=0):
+        self.headers = headers
+        self.values = values
+        self.note_count = note_count
+
+    @property
+    def model_name(self):
+        return self.get(TYPE_FIELD)
+
+    @property
+    def object_id(self):
+        return self.get(ID_FIELD)
+
+    @property
+    def cells(self):
+        """(name, value) pairs for display, without the id column."""
+        return [pair for pair in zip(self.headers, self.values) if pair[0] != ID_FIELD]
+
+    def get(self, name, default=None):
+        try:
+            return self.values[self.headers.index(name)]
+        except ValueError:
+            return default
+
+    def __iter__(self):
+        return zip(self.headers, self.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return (self.headers[index], self.values[index])
+
+    def __repr__(self):
+        return f"<FieldValuesRow {list(self)!r}>"
+
+
+class FieldValuesPage:
+    """The rows of one page, with each distinct header tuple stored once."""
+
+    __slots__ = ("rows", "_headers")
+
+    def __init__(self):
+        self.rows = []
+        self._headers = {}
+
+    def append(self, names, values, note_count=0):
+        """Add a row from sequences of field names and values."""
+        names = tuple(names)
+        headers = self._headers.setdefault(names, names)
+        row = FieldValuesRow(headers, tuple(values), note_count)
+        self.rows.append(row)
+        return row
+
+    @property
+    def headers(self):
+        """The field names of the first row (the table headers)."""
+        return self.rows[0].headers if self.rows else ()
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
@@ -0,0 +1,224 @@
+"""Inverted-index search across the db models.
+
+Every object of the :data:`SEARCH_MODELS` is split into lowercase word
+tokens from its text fields (``CharField`` and ``TextField``), stored as
+:class:`~db.models.SearchToken` documents. The index is rewritten for an
+object whenever it is saved and dropped when it is deleted (see
+``db.signals``). ``rebuild_search_index`` builds it from scratch: migration
+0006 runs it to backfill, and the command of the same name repairs drift.
+
+A query matches tokens by prefix with an indexed, anchored range on the
+``token`` field, groups the matches per object and ranks them by summed
+weight, so its cost follows the number of matching tokens rather than the
+size of the collections. Results are paginated on the grouped hits and only
+the objects on the requested page are loaded.
+"""
+
+import re
+from collections import Counter, defaultdict
+
+from django.apps import apps as global_apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+from django.db.models import Q, Sum
+
+from .models import (
+    Client,
+    Company,
+    Contact,
+    Invoice,
+    Note,
+    Project,
+    SearchToken,
+    Task,
+    Time,
+)
+
+SEARCH_MODELS = (
+    Client,
+    Company,
+    Contact,
+    Invoice,
+    Note,
+    Project,
+    Task,
+    Time,
+)
+
+TOKEN_RE = re.compile(r"\w+")
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 64
+
+# Matches in these fields rank above matches elsewhere
+TITLE_FIELDS = {"name", "title", "first_name", "last_name", "email"}
+TITLE_WEIGHT = 3
+CHAR_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+EXCLUDED_FIELDS = {"object_id"}
+
+_search_fields = {}
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens of at least two characters."""
+    if not text:
+        return []
+    return [
+        token[:MAX_TOKEN_LENGTH]
+        for token in TOKEN_RE.findall(str(text).lower())
+        if len(token) >= MIN_TOKEN_LENGTH
+    ]
+
+
+def get_search_fields(model):
+    """Return ``(attname, weight)`` for the text fields indexed on a model."""
+    if model not in _search_fields:
+        fields = []
+        for field in model._meta.concrete_fields:
+            if field.name in EXCLUDED_FIELDS:
+                continue
+            if field.name in TITLE_FIELDS:
+                fields.append((field.attname, TITLE_WEIGHT))
+            elif isinstance(field, models.CharField):
+                fields.append((field.attname, CHAR_WEIGHT))
+            elif isinstance(field, models.TextField):
+                fields.append((field.attname, TEXT_WEIGHT))
+        _search_fields[model] = fields
+    return _search_fields[model]
+
+
+def get_object_tokens(obj):
+    """Return a Counter of token weights for an object."""
+    weights = Counter()
+    for attname, weight in get_search_fields(obj.__class__):
+        for token in tokenize(getattr(obj, attname, None)):
+            weights[token] += weight
+    return weights
+
+
+def _build_tokens(obj, content_type, token_model=SearchToken):
+    object_id = str(obj.pk)
+    return [
+        token_model(
+            content_type=content_type,
+            object_id=object_id,
+            token=token,
+            weight=weight,
+        )
+        for token, weight in get_object_tokens(obj).items()
+    ]
+
+
+def index_object(obj):
+    """Replace the index entries of one object."""
+    content_type = ContentType.objects.get_for_model(obj.__class__)
+    with transaction.atomic():
+        unindex_object(obj)
+        SearchToken.objects.bulk_create(_build_tokens(obj, content_type))
+
+
+def unindex_object(obj):
+    """Remove an object from the index."""
+    content_type = ContentType.objects.get_for_model(obj.__class__)
+    SearchToken.objects.filter(
+        content_type=content_type, object_id=str(obj.pk)
+    ).delete()
+
+
+def rebuild_search_index(
+    search_models=SEARCH_MODELS, batch_size=1000, apps=global_apps
+):
+    """Rebuild the index for the given models from scratch.
+
+    ``apps`` is the app registry to take the models from, the historical one
+    in a migration. Returns the number of objects indexed.
+    """
+    content_types = apps.get_model("contenttypes", "ContentType").objects
+    token_model = apps.get_model("db", "SearchToken")
+    count = 0
+    for model in search_models:
+        model = apps.get_model(model._meta.label)
+        content_type = content_types.get_for_model(model)
+        token_model.objects.filter(content_type=content_type).delete()
+        batch = []
+        for obj in model._default_manager.iterator(chunk_size=batch_size):
+            batch.extend(_build_tokens(obj, content_type, token_model))
+            count += 1
+            if len(batch) >= batch_size:
+                token_model.objects.bulk_create(batch)
+                batch = []
+        token_model.objects.bulk_create(batch)
+    return count
+
+
+def _load_hits(hits):
+    """Return the objects for a list of grouped hits, in hit order."""
+    ids_by_type = defaultdict(list)
+    for hit in hits:
+        ids_by_type[hit["content_type"]].append(hit["object_id"])
+    objects = {}
+    for content_type_id, object_ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        for pk, obj in model.objects.in_bulk(object_ids).items():
+            objects[(content_type_id, str(pk))] = obj
+    # Hits whose object is gone (stale index entries) are skipped
+    return [
+        objects[key]
+        for key in ((hit["content_type"], hit["object_id"]) for hit in hits)
+        if key in objects
+    ]
+
+
+class SearchResults:
+    """Lazy, ranked search results usable with Django's ``Paginator``.
+
+    Counting and slicing run on the grouped hits; objects are only loaded
+    for the slice that is actually displayed.
+    """
+
+    chunk_size = 100
+
+    def __init__(self, hits):
+        self.hits = hits
+
+    def count(self):
+        return self.hits.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return _load_hits(list(self.hits[index]))
+        return _load_hits(list(self.hits[index : index + 1]))[0]
+
+    def __iter__(self):
+        start = 0
+        while True:
+            hits = list(self.hits[start : start + self.chunk_size])
+            yield from _load_hits(hits)
+            if len(hits) < self.chunk_size:
+                return
+            start += self.chunk_size
+
+
+def search(query):
+    """Return :class:`SearchResults` for a query, best matches first.
+
+    Each query word matches every indexed token it is a prefix of. Objects
+    are ranked by the summed weight of their matching tokens.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return SearchResults(SearchToken.objects.none())
+    matches = Q()
+    for term in terms:
+        matches |= Q(token__startswith=term)
+    hits = (
+        SearchToken.objects.filter(matches)
+        .values("content_type", "object_id")
+        .annotate(score=Sum("weight"))
+        .order_by("-score", "content_type", "object_id")
+    )
+    return SearchResults(hits)
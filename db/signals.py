@@ -1,13 +1,33 @@
 from django.conf import settings
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.html import strip_tags
 
-from aclarknet.email_utils import send_notification_email
-from .models import Invoice
+from aclarknet.email_utils import queue_notification_email
+from .default_tasks import clear_default_tasks
+from .invoicing import apply_line_change, get_line_totals, mark_invoice_dirty
+from .models import Client, Invoice, Note, Project, Task
 from .models import Time
+from .rollups import (
+    get_invoice_buckets,
+    get_invoice_rollup,
+    get_time_rollup_line,
+    mark_rollups_dirty,
+    month_start,
+    record_invoice_change,
+    record_time_change,
+)
+from .search import SEARCH_MODELS, index_object, unindex_object
+from .statistics import invalidate_analytics, note_affects_analytics
 
 
 @receiver(post_save, sender=Time)
@@ -35,8 +55,8 @@ def send_email_on_time_creation(sender, instance, created, **kwargs):
         )
         plain_message = strip_tags(html_content)
 
-        # Send email with improved headers for better deliverability
-        send_notification_email(
+        # Queue for the send_outbox worker instead of sending inline
+        queue_notification_email(
             subject=subject,
             plain_message=plain_message,
             html_message=html_content,
@@ -45,67 +65,157 @@ def send_email_on_time_creation(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_init, sender=Time)
+def remember_time_line_totals(sender, instance, **kwargs):
+    """Snapshot the stored line totals so saves can apply only the delta."""
+    instance._line_totals = get_line_totals(instance)
+    instance._rollup_line = get_time_rollup_line(instance)
+
+
+@receiver(pre_save, sender=Invoice)
+def remember_invoice_rollup(sender, instance, raw=False, **kwargs):
+    """Read the bucket, totals and paid state the invoice's rollup holds.
+
+    Read at save time rather than snapshotted at post_init, since time entry
+    writes change the stored totals behind a loaded instance.
+    """
+    if raw or instance._state.adding:
+        instance._rollup = None
+    else:
+        instance._rollup = get_invoice_rollup(instance.pk)
+
+
 @receiver(post_save, sender=Invoice)
 def update_invoice(sender, instance, **kwargs):
-    if getattr(instance, "_updating", False):
+    """Re-sum invoice totals from the line totals stored on its time entries."""
+    if kwargs.get("raw"):
         return
-    setattr(instance, "_updating", True)
-    # Disconnect the signal temporarily to avoid recursion
-    post_save.disconnect(update_invoice_on_time_save, sender=Time)
-
-    times = Time.objects.filter(invoice=instance)
-    instance.amount = 0
-    instance.balance = 0
-    instance.net = 0
-    instance.cost = 0
-    instance.hours = 0
-    for time in times:
-        try:
-            time.cost = time.user.rate * time.hours
-        except (AttributeError, TypeError):
-            time.cost = 0
-        try:
-            time.amount = time.task.rate * time.hours
-            time.net = time.amount - time.cost
-        except (AttributeError, TypeError):
-            time.amount = 0
-            time.net = -time.cost
-
-        time.save()
-
-        if time.amount:
-            instance.amount += time.amount
-
-        if time.cost:
-            instance.cost += time.cost
-
-        if time.hours:
-            instance.hours += time.hours
-
-        instance.save()
-
-    instance.net = instance.amount - instance.cost
-    if instance.paid_amount:
-        instance.balance = instance.amount - instance.paid_amount
-
-    instance.save(
-        update_fields=["amount", "balance", "cost", "hours", "net", "paid_amount"]
-    )
-
-    # Reconnect the signal after updating the invoice
-    post_save.connect(update_invoice_on_time_save, sender=Time)
-    delattr(instance, "_updating")
+    mark_invoice_dirty(instance)
 
 
 @receiver(post_save, sender=Time)
-def update_invoice_on_time_save(sender, instance, **kwargs):
-    invoice = instance.invoice
-    if invoice:
-        update_invoice(Invoice, invoice)
+def update_invoice_on_time_save(sender, instance, created, **kwargs):
+    old = None if created else getattr(instance, "_line_totals", None)
+    new = get_line_totals(instance)
+    if new is None or (old is None and not created):
+        # Previous or current totals unknown (deferred fields): re-sum instead
+        for invoice_id in {getattr(old, "invoice_id", None), instance.invoice_id}:
+            mark_invoice_dirty(invoice_id)
+    else:
+        apply_line_change(old, new)
+    instance._line_totals = new
 
 
 @receiver(post_delete, sender=Time)
 def update_invoice_on_time_delete(sender, instance, **kwargs):
-    invoice = instance.invoice
-    if invoice:
-        update_invoice(Invoice, invoice)
+    old = getattr(instance, "_line_totals", None)
+    if old is not None:
+        apply_line_change(old, None)
+    else:
+        mark_invoice_dirty(instance.invoice_id)
+
+
+@receiver(post_save, sender=Invoice)
+def update_rollups_on_invoice_save(sender, instance, created, **kwargs):
+    """Move the invoice's totals between the dashboard rollups it left and joined.
+
+    Runs after the invoice totals are re-summed.
+    """
+    if kwargs.get("raw"):
+        return
+    old = None if created else getattr(instance, "_rollup", None)
+    new = get_invoice_rollup(instance.pk)
+    if new is None or (old is None and not created):
+        # Previous totals unknown: re-sum instead
+        key = (instance.user_id, month_start(instance.issue_date))
+        mark_rollups_dirty([key], [instance.pk])
+    else:
+        record_invoice_change(old, new)
+
+
+@receiver(pre_delete, sender=Invoice)
+def remember_invoice_rollup_buckets(sender, instance, **kwargs):
+    """Collect the buckets fed by the invoice before its time entries detach."""
+    instance._rollup_buckets = get_invoice_buckets([instance.pk])
+
+
+@receiver(post_delete, sender=Invoice)
+def update_rollups_on_invoice_delete(sender, instance, **kwargs):
+    mark_rollups_dirty(getattr(instance, "_rollup_buckets", ()))
+
+
+@receiver(post_save, sender=Time)
+def update_rollups_on_time_save(sender, instance, created, **kwargs):
+    """Move the time entry between the dashboard rollups it left and joined.
+
+    Runs after the invoice totals are updated, so the invoices' paid state
+    is current.
+    """
+    if kwargs.get("raw"):
+        return
+    old = None if created else getattr(instance, "_rollup_line", None)
+    new = get_time_rollup_line(instance)
+    if new is None or (old is None and not created):
+        # Previous or current line unknown (deferred fields): re-sum instead
+        key = (instance.user_id, month_start(instance.date))
+        invoice_ids = [getattr(old, "invoice_id", None), instance.invoice_id]
+        mark_rollups_dirty([old, key], invoice_ids)
+    else:
+        record_time_change(old, new)
+    instance._rollup_line = new
+
+
+@receiver(post_delete, sender=Time)
+def update_rollups_on_time_delete(sender, instance, **kwargs):
+    old = getattr(instance, "_rollup_line", None)
+    if old is not None:
+        record_time_change(old, None)
+    else:
+        key = (instance.user_id, month_start(instance.date))
+        mark_rollups_dirty([key], [instance.invoice_id])
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_analytics_on_note_change(sender, instance, **kwargs):
+    """Drop cached analytics when a contact submission or testimonial changes.
+
+    Edits always invalidate, since a note may have just stopped being a
+    testimonial; only new ordinary notes are skipped.
+    """
+    if kwargs.get("created") and not note_affects_analytics(instance):
+        return
+    invalidate_analytics()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def invalidate_analytics_on_change(sender, **kwargs):
+    """Drop cached analytics when a client changes (blog entries: blog.signals)."""
+    invalidate_analytics()
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_migrate)
+def clear_default_tasks_on_change(sender, **kwargs):
+    """Drop the cached default tasks when a task or project changes."""
+    clear_default_tasks()
+
+
+def update_search_index(sender, instance, **kwargs):
+    """Re-index a searchable object's text after it is saved."""
+    if kwargs.get("raw"):
+        return
+    index_object(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+for search_model in SEARCH_MODELS:
+    post_save.connect(update_search_index, sender=search_model)
+    post_delete.connect(remove_from_search_index, sender=search_model)
@@ -0,0 +1,296 @@
+"""Slow MongoDB command log.
+
+When SLOW_COMMAND_LOG_ENABLED is set, :class:`SlowCommandListener`, a pymongo
+``CommandListener`` registered at startup, watches every command. Commands
+that take at least SLOW_COMMAND_THRESHOLD_MS are queued for a background
+thread. The thread asks the server to ``explain`` the command, when it can
+be explained, and writes a record to the capped ``db_slowcommand``
+collection:
+
+* ``command``, ``collection`` and ``shape``. The shape is the command with
+  every literal value replaced by ``"?"``, so no data is stored.
+* ``duration_ms`` and ``origin``: the view name, ``manage.py <command>``,
+  or the process arguments.
+* ``plan`` (the winning plan) and ``collscan``, which is true when the plan
+  scans the whole collection.
+
+The listener only copies commands and never blocks on the database. When
+the queue is full, records are dropped. :func:`get_top_offenders` groups
+the log by shape for the analytics page.
+"""
+
+import json
+import logging
+import queue
+import sys
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+SLOW_COMMAND_COLLECTION = "db_slowcommand"
+
+# Commands the server can explain
+EXPLAINABLE_COMMANDS = (
+    "find",
+    "aggregate",
+    "count",
+    "distinct",
+    "update",
+    "delete",
+    "findAndModify",
+)
+
+# Session and cluster fields that are not part of a command's shape
+IGNORED_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction"}
+
+_origin = ContextVar("db_command_origin", default=None)
+_suppressed = ContextVar("db_slowlog_suppressed", default=False)
+_registered = False
+_process_origin = None
+
+
+def set_origin(origin):
+    """Set the origin recorded for commands in the current context."""
+    return _origin.set(origin)
+
+
+def reset_origin(token):
+    _origin.reset(token)
+
+
+def get_origin():
+    """Return the current view name, or this process's command line."""
+    global _process_origin
+    origin = _origin.get()
+    if origin:
+        return origin
+    if _process_origin is None:
+        argv = sys.argv
+        if len(argv) > 1 and argv[0].endswith("manage.py"):
+            _process_origin = f"manage.py {argv[1]}"
+        else:
+            _process_origin = argv[0] if argv else ""
+    return _process_origin
+
+
+def get_shape(value):
+    """Return a value with every literal replaced by ``"?"``."""
+    if isinstance(value, dict):
+        return {key: get_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [get_shape(item) for item in value]
+    return "?"
+
+
+def get_collection_name(command_name, command):
+    if command_name == "getMore":
+        return command.get("collection")
+    value = command.get(command_name)
+    return value if isinstance(value, str) else None
+
+
+def _clean_command(command):
+    return {
+        key: value
+        for key, value in command.items()
+        if not key.startswith("$") and key not in IGNORED_FIELDS
+    }
+
+
+def find_winning_plans(explain):
+    """Return every ``winningPlan`` in an explain result (aggregate may nest)."""
+    plans = []
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                plans.append(value)
+            else:
+                plans.extend(find_winning_plans(value))
+    elif isinstance(explain, list):
+        for item in explain:
+            plans.extend(find_winning_plans(item))
+    return plans
+
+
+def has_collscan(plan):
+    """Return whether a plan tree contains a COLLSCAN stage."""
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(has_collscan(item) for item in plan)
+    return False
+
+
+class SlowCommandListener(monitoring.CommandListener):
+    """Queue commands slower than the threshold for the slow log."""
+
+    def __init__(self, threshold_ms, writer):
+        self.threshold_micros = threshold_ms * 1000
+        self.writer = writer
+        self._started = {}
+
+    def _key(self, event):
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        if _suppressed.get():
+            return
+        self._started[self._key(event)] = (event.command, get_origin())
+
+    def succeeded(self, event):
+        started = self._started.pop(self._key(event), None)
+        if started is None or event.duration_micros < self.threshold_micros:
+            return
+        command, origin = started
+        self.writer.submit(
+            {
+                "command": event.command_name,
+                "database": event.database_name,
+                "duration_ms": event.duration_micros / 1000,
+                "origin": origin,
+                "raw": command,
+            }
+        )
+
+    def failed(self, event):
+        self._started.pop(self._key(event), None)
+
+
+class SlowCommandWriter:
+    """Explain and store queued slow commands from a daemon thread."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS, max_queue=1000, explain=True):
+        self.using = using
+        self.explain = explain
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._collection_ready = False
+
+    def submit(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="slow-command-log", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self):
+        # Commands issued by this thread (explain, insert) are never logged
+        _suppressed.set(True)
+        while True:
+            record = self.queue.get()
+            try:
+                self.write(record)
+            except PyMongoError:
+                logger.exception("Could not write slow command log")
+            finally:
+                self.queue.task_done()
+
+    def build_document(self, record):
+        """Return the stored document for a queued record."""
+        command = _clean_command(record["raw"])
+        name = record["command"]
+        collection = get_collection_name(name, command)
+        shape = get_shape(command)
+        if name in shape and collection is not None:
+            # Keep the collection so shapes group per collection
+            shape[name] = collection
+        plan = None
+        if self.explain and name in EXPLAINABLE_COMMANDS:
+            database = connections[self.using].database
+            try:
+                explain = database.command(
+                    {"explain": command, "verbosity": "queryPlanner"}
+                )
+            except PyMongoError as e:
+                logger.debug("Could not explain %s: %s", name, e)
+            else:
+                plans = find_winning_plans(explain)
+                plan = plans[0] if len(plans) == 1 else plans or None
+        return {
+            "ts": timezone.now(),
+            "command": name,
+            "collection": collection,
+            "database": record["database"],
+            "duration_ms": record["duration_ms"],
+            "origin": record["origin"],
+            "shape": shape,
+            "shape_key": json.dumps(shape, sort_keys=True, default=str),
+            "plan": plan,
+            "collscan": has_collscan(plan),
+        }
+
+    def write(self, record):
+        document = self.build_document(record)
+        if not self._collection_ready:
+            create_slow_log_collection(self.using)
+            self._collection_ready = True
+        connections[self.using].get_collection(SLOW_COMMAND_COLLECTION).insert_one(
+            document
+        )
+
+
+def create_slow_log_collection(using=DEFAULT_DB_ALIAS):
+    """Create the capped slow log collection; return False if it exists."""
+    database = connections[using].database
+    try:
+        database.create_collection(
+            SLOW_COMMAND_COLLECTION,
+            capped=True,
+            size=settings.SLOW_COMMAND_LOG_SIZE,
+        )
+    except CollectionInvalid:
+        return False
+    return True
+
+
+def register_listener():
+    """Register :class:`SlowCommandListener` with pymongo (once)."""
+    global _registered
+    if not _registered:
+        writer = SlowCommandWriter(explain=settings.SLOW_COMMAND_EXPLAIN)
+        monitoring.register(
+            SlowCommandListener(settings.SLOW_COMMAND_THRESHOLD_MS, writer)
+        )
+        _registered = True
+
+
+def get_top_offenders(limit=10, using=DEFAULT_DB_ALIAS):
+    """Return the slowest command shapes by total time, worst first."""
+    collection = connections[using].get_collection(SLOW_COMMAND_COLLECTION)
+    pipeline = [
+        {
+            "$group": {
+                "_id": "$shape_key",
+                "command": {"$last": "$command"},
+                "collection": {"$last": "$collection"},
+                "origin": {"$last": "$origin"},
+                "count": {"$sum": 1},
+                "total_ms": {"$sum": "$duration_ms"},
+                "avg_ms": {"$avg": "$duration_ms"},
+                "max_ms": {"$max": "$duration_ms"},
+                "collscan": {"$max": "$collscan"},
+                "last_seen": {"$max": "$ts"},
+            }
+        },
+        {"$sort": {"total_ms": -1}},
+        {"$limit": limit},
+        {"$set": {"shape": "$_id"}},
+        {"$unset": "_id"},
+    ]
+    return list(collection.aggregate(pipeline))
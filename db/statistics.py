@@ -0,0 +1,136 @@
+"""Dashboard statistics.
+
+The dashboard statcards and chart datasets (entered and approved hours, and
+invoice gross, cost and net) are read from the per-user, per-month
+:class:`~db.models.DashboardRollup` rows maintained by :mod:`db.rollups`, in
+a single aggregation whose cost depends on the number of months rather than
+the number of time entries and invoices.
+
+The analytics page counts come from one conditional aggregation per
+collection and are cached for ANALYTICS_CACHE_TIMEOUT seconds in the
+ANALYTICS_CACHE cache. The signals in ``db.signals`` invalidate them when a
+note, client or blog entry changes.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .invoicing import to_decimal
+
+ANALYTICS_CACHE_KEY = "db:analytics"
+
+CONTACT_NOTE_PREFIX = "Contact form submission"
+
+
+def get_dashboard_statistics(user=None):
+    """Return the dashboard hours and invoice totals.
+
+    Hours count time entries that are not on a fully paid invoice (balance
+    of zero); ``approved`` hours are those already on an invoice. Pass
+    ``user`` to restrict the hours to that user's time entries. Invoice
+    totals always cover every invoice.
+
+    Returns a dict with ``times`` (``entered``, ``approved``) and
+    ``invoices`` (``gross``, ``cost``, ``net``), all as Decimal.
+    """
+    from .models import DashboardRollup
+
+    hours_filter = {} if user is None else {"filter": Q(user=user)}
+    totals = DashboardRollup.objects.aggregate(
+        entered=Sum("entered_hours", **hours_filter),
+        approved=Sum("approved_hours", **hours_filter),
+        gross=Sum("gross"),
+        cost=Sum("cost"),
+        net=Sum("net"),
+    )
+    totals = {key: to_decimal(value) for key, value in totals.items()}
+    return {
+        "times": {"entered": totals["entered"], "approved": totals["approved"]},
+        "invoices": {
+            "gross": totals["gross"],
+            "cost": totals["cost"],
+            "net": totals["net"],
+        },
+    }
+
+
+def _analytics_cache():
+    return caches[settings.ANALYTICS_CACHE]
+
+
+def compute_analytics(now=None):
+    """Count contact submissions, testimonials, clients and blog posts.
+
+    Runs one aggregation per collection. Returns the ``analytics`` dict used
+    by the analytics page, plus ``generated_at``.
+    """
+    from .models import Client, Note
+
+    try:
+        from blog.models import Entry
+    except ImportError:  # pragma: no cover - blog app always installed
+        Entry = None
+
+    now = now or timezone.now()
+    since_datetime = now - timezone.timedelta(days=30)
+    since_date = now.date() - timezone.timedelta(days=30)
+
+    contact = Q(name__startswith=CONTACT_NOTE_PREFIX)
+    notes = Note.objects.filter(contact | Q(is_testimonial=True)).aggregate(
+        contacts=Count("pk", filter=contact),
+        contacts_recent=Count("pk", filter=contact & Q(created__gte=since_datetime)),
+        testimonials=Count("pk", filter=Q(is_testimonial=True)),
+        featured=Count("pk", filter=Q(is_testimonial=True, is_featured=True)),
+    )
+    clients = Client.objects.aggregate(
+        total=Count("pk"),
+        featured=Count("pk", filter=Q(featured=True)),
+    )
+    entries = {"published": 0, "recent": 0}
+    if Entry is not None:
+        entries = Entry.objects.filter(status=Entry.PUBLISHED).aggregate(
+            published=Count("pk"),
+            recent=Count("pk", filter=Q(pub_date__gte=since_date)),
+        )
+
+    return {
+        "contacts": {
+            "total": notes["contacts"],
+            "last_30_days": notes["contacts_recent"],
+        },
+        "testimonials": {
+            "total": notes["testimonials"],
+            "featured": notes["featured"],
+        },
+        "clients": {
+            "total": clients["total"],
+            "featured": clients["featured"],
+        },
+        "blog": {
+            "published": entries["published"],
+            "last_30_days": entries["recent"],
+        },
+        "generated_at": now,
+    }
+
+
+def get_analytics():
+    """Return the cached analytics counts, computing them on a miss."""
+    cache = _analytics_cache()
+    analytics = cache.get(ANALYTICS_CACHE_KEY)
+    if analytics is None:
+        analytics = compute_analytics()
+        cache.set(ANALYTICS_CACHE_KEY, analytics, settings.ANALYTICS_CACHE_TIMEOUT)
+    return analytics
+
+
+def invalidate_analytics():
+    """Drop the cached analytics counts."""
+    _analytics_cache().delete(ANALYTICS_CACHE_KEY)
+
+
+def note_affects_analytics(note):
+    """Return whether a note is a contact submission or testimonial."""
+    return note.is_testimonial or (note.name or "").startswith(CONTACT_NOTE_PREFIX)
@@ -1,7 +1,8 @@
 """Custom template filters for text formatting."""
 
 from django import template
-from db.templatetags.babel import currencyfmt
+from db.field_registry import get_formatter
+from db.rows import FieldValuesRow
 
 register = template.Library()
 
@@ -56,25 +57,7 @@ def format_field_value(field_value, field_name):
         {{ None|format_field_value:"invoice" }} -> "Not invoiced"
         {{ "Test"|format_field_value:"name" }} -> "Test"
     """
-    # List of field names that should be formatted as currency
-    currency_fields = ["amount", "paid_amount", "cost", "net", "balance"]
-
-    if field_name in currency_fields:
-        # Format as USD currency, default to 0 if value is None/empty
-        value = field_value if field_value is not None else 0
-        return currencyfmt(value, "USD")
-    elif field_name == "hours":
-        # For hours, default to 0 if None
-        return field_value if field_value is not None else 0
-    elif field_name == "invoice":
-        # For invoice field, show invoice name or "Not invoiced"
-        if field_value is None:
-            return "Not invoiced"
-        # If it's an Invoice object, convert to string (uses __str__ method)
-        return str(field_value)
-    else:
-        # For all other fields, default to empty string if None
-        return field_value if field_value is not None else ""
+    return get_formatter(field_name)(field_value)
 
 
 @register.filter
@@ -82,11 +65,14 @@ def is_not_invoiced(field_values):
     """Return True if the row contains an invoice field with no invoice assigned.
 
     Args:
-        field_values: List of (field_name, field_value) tuples for a table row.
+        field_values: A FieldValuesRow, or a list of (field_name, field_value)
+            tuples for a table row.
 
     Returns:
         bool: True if an 'invoice' field exists and its value is None.
     """
+    if isinstance(field_values, FieldValuesRow):
+        return "invoice" in field_values.headers and field_values.get("invoice") is None
     for field_name, field_value in field_values:
         if field_name == "invoice" and field_value is None:
             return True
@@ -0,0 +1,18 @@
+"""Shared fixtures for the db tests."""
+
+import pytest
+
+from db.default_tasks import clear_default_tasks
+
+
+@pytest.fixture(autouse=True)
+def empty_default_task_cache():
+    """Start every test with an empty default task cache.
+
+    The cache is process-local and a test's rollback sends no signal, so a
+    task cached in one test could otherwise be handed out by the next one
+    after it was rolled back.
+    """
+    clear_default_tasks()
+    yield
+    clear_default_tasks()
@@ -0,0 +1,65 @@
+"""Tests for the cached analytics counts."""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from db.models import Client, Note
+from db.statistics import get_analytics
+
+User = get_user_model()
+
+
+class AnalyticsCountsTest(TestCase):
+    """Analytics counts are aggregated once per collection and cached."""
+
+    def setUp(self):
+        cache.clear()
+        Note.objects.create(name="Contact form submission from Jane")
+        Note.objects.create(name="Praise", is_testimonial=True, is_featured=True)
+        Note.objects.create(name="Ordinary note")
+        Client.objects.create(name="Acme", featured=True)
+        Client.objects.create(name="Globex")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_counts(self):
+        analytics = get_analytics()
+
+        self.assertEqual(analytics["contacts"]["total"], 1)
+        self.assertEqual(analytics["contacts"]["last_30_days"], 1)
+        self.assertEqual(analytics["testimonials"], {"total": 1, "featured": 1})
+        self.assertEqual(analytics["clients"], {"total": 2, "featured": 1})
+        self.assertIsNotNone(analytics["generated_at"])
+
+    def test_one_query_per_collection_then_cached(self):
+        with self.assertNumQueries(3):
+            get_analytics()
+        with self.assertNumQueries(0):
+            get_analytics()
+
+    def test_invalidated_on_change(self):
+        get_analytics()
+        Client.objects.create(name="Initech")
+        self.assertEqual(get_analytics()["clients"]["total"], 3)
+
+        Note.objects.create(name="Kind words", is_testimonial=True)
+        self.assertEqual(get_analytics()["testimonials"]["total"], 2)
+
+    def test_ordinary_note_keeps_cache(self):
+        get_analytics()
+        Note.objects.create(name="Another ordinary note")
+        with self.assertNumQueries(0):
+            get_analytics()
+
+    def test_page_shows_generation_time(self):
+        superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(superuser)
+        response = self.client.get(reverse("analytics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Counts generated")
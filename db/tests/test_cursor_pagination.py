@@ -0,0 +1,132 @@
+"""Tests for keyset (cursor) pagination."""
+
+import base64
+import datetime
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from db.models import Invoice, Time
+from db.pagination import CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTest(TestCase):
+    """Pages follow (ordering field, pk) without offsets."""
+
+    def setUp(self):
+        # Two entries per day so ties on date are broken by pk
+        self.entries = [
+            Time.objects.create(hours=1, date=datetime.date(2026, 1, 1 + i // 2))
+            for i in range(7)
+        ]
+        self.expected = list(Time.objects.order_by("-date", "-pk"))
+
+    def _paginator(self):
+        return CursorPaginator(Time.objects.order_by("-date"), per_page=3)
+
+    def test_walk_forward_and_back(self):
+        paginator = self._paginator()
+        first = paginator.get_page()
+        self.assertEqual(list(first), self.expected[:3])
+        self.assertFalse(first.has_previous())
+
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(list(second), self.expected[3:6])
+        self.assertTrue(second.has_previous())
+
+        third = paginator.get_page(second.next_cursor)
+        self.assertEqual(list(third), self.expected[6:])
+        self.assertFalse(third.has_next())
+
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual(list(back), self.expected[3:6])
+        back = paginator.get_page(back.previous_cursor)
+        self.assertEqual(list(back), self.expected[:3])
+        self.assertFalse(back.has_previous())
+
+    def test_each_page_is_one_query(self):
+        paginator = self._paginator()
+        cursor = paginator.get_page().next_cursor
+        with self.assertNumQueries(1):
+            paginator.get_page(cursor)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = self._paginator().get_page("not-a-cursor")
+        self.assertEqual(list(page), self.expected[:3])
+
+
+class CursorPaginatorOrderingTest(TestCase):
+    """Every ordering field is part of the keyset."""
+
+    def setUp(self):
+        # Invoice orders by -issue_date, then name
+        for day, name in [(1, "c"), (2, "b"), (1, "a"), (2, "d"), (1, "b"), (2, "a")]:
+            Invoice.objects.create(name=name, issue_date=datetime.date(2026, 1, day))
+        self.expected = list(Invoice.objects.order_by("-issue_date", "name", "-pk"))
+
+    def test_pages_follow_model_ordering(self):
+        paginator = CursorPaginator(Invoice.objects.all(), per_page=4)
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(list(first) + list(second), self.expected)
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), self.expected[:4])
+
+    def test_neighbors_follow_model_ordering(self):
+        paginator = CursorPaginator(Invoice.objects.all(), per_page=1)
+        neighbors = paginator.get_neighbors(self.expected[2])
+        self.assertEqual(neighbors["previous_object"], self.expected[1])
+        self.assertEqual(neighbors["next_object"], self.expected[3])
+
+    def test_unsupported_ordering(self):
+        with self.assertRaises(ValueError):
+            CursorPaginator(Invoice.objects.order_by("user__username"), per_page=3)
+
+
+class CursorPaginationViewTest(TestCase):
+    """TimeListView opts in to cursor pagination."""
+
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        for i in range(15):
+            Time.objects.create(
+                user=self.superuser, hours=1, date=datetime.date(2026, 1, 1 + i)
+            )
+        self.client.force_login(self.superuser)
+
+    def test_next_cursor_link(self):
+        response = self.client.get(reverse("time_index"))
+        page_obj = response.context["page_obj"]
+        self.assertTrue(page_obj.is_cursor)
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(response, f"?cursor={page_obj.next_cursor}")
+
+        response = self.client.get(
+            reverse("time_index"), {"cursor": page_obj.next_cursor}
+        )
+        self.assertEqual(len(response.context["page_obj"]), 5)
+
+    def test_unparseable_cursor_values_fall_back_to_first_page(self):
+        first = self.client.get(reverse("time_index")).context["page_obj"]
+        # Well-formed tokens whose date or pk can't be parsed
+        for values in (["garbage", "0" * 24], ["2026-01-01", "garbage"]):
+            data = json.dumps(["next", values]).encode()
+            token = base64.urlsafe_b64encode(data).decode().rstrip("=")
+            response = self.client.get(reverse("time_index"), {"cursor": token})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                list(response.context["page_obj"]), list(first.object_list)
+            )
+
+    def test_items_per_page_and_unpaginated(self):
+        response = self.client.get(reverse("time_index"), {"items_per_page": 100})
+        self.assertEqual(len(response.context["page_obj"]), 15)
+
+        response = self.client.get(reverse("time_index"), {"paginated": "false"})
+        self.assertEqual(response.context["page_obj"].count(), 15)
@@ -1,9 +1,11 @@
 """Tests for Dashboard view filtering."""
 
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from django.test import RequestFactory, TestCase
 
-from db.models import Time
+from db.models import Invoice, Task, Time
 from db.views.dashboard import DashboardView
 
 User = get_user_model()
@@ -129,3 +131,58 @@ class DashboardViewTest(TestCase):
 
         # Verify the entered hours are only from user1 (8.0 + 4.0 = 12.0)
         self.assertEqual(entered, 12.0)
+
+
+class DashboardStatisticsTest(TestCase):
+    """Dashboard statcards come from a single aggregation."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            username="user1", password="testpass123", rate=Decimal("50.00")
+        )
+        self.other_user = User.objects.create_user(
+            username="user2", password="testpass123", rate=Decimal("50.00")
+        )
+        self.superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        task = Task.objects.create(name="Test Task", rate=Decimal("100.00"))
+        self.invoice = Invoice.objects.create(name="Open Invoice")
+        Time.objects.create(user=self.user, task=task, hours=Decimal("2.0"))
+        Time.objects.create(
+            user=self.user, task=task, hours=Decimal("3.0"), invoice=self.invoice
+        )
+        Time.objects.create(
+            user=self.other_user, task=task, hours=Decimal("4.0"), invoice=self.invoice
+        )
+
+    def _get_context(self, user):
+        request = self.factory.get("/dashboard/")
+        request.user = user
+        view = DashboardView()
+        view.request = request
+        view.object_list = []
+        return view.get_context_data()
+
+    def test_context_uses_one_query(self):
+        with self.assertNumQueries(1):
+            self._get_context(self.user)
+
+    def test_user_statistics(self):
+        context = self._get_context(self.user)
+
+        self.assertEqual(context["statcard"]["times"]["entered"], Decimal("5.00"))
+        self.assertEqual(context["statcard"]["times"]["approved"], Decimal("3.00"))
+        self.assertEqual(context["dataset_times"], [5, 3])
+
+    def test_superuser_statistics(self):
+        context = self._get_context(self.superuser)
+
+        self.assertEqual(context["statcard"]["times"]["entered"], Decimal("9.00"))
+        self.assertEqual(context["statcard"]["times"]["approved"], Decimal("7.00"))
+        invoices = context["statcards"]["dashboard"]["invoices"]
+        self.assertEqual(invoices["gross"], Decimal("700.00"))
+        self.assertEqual(invoices["cost"], Decimal("350.00"))
+        self.assertEqual(invoices["net"], Decimal("350.00"))
+        self.assertEqual(context["dataset_invoices"], [700, 350, 350])
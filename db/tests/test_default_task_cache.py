@@ -0,0 +1,80 @@
+"""Tests for the process-local default task cache."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from db.default_tasks import (
+    DEFAULT_TASK_NAME,
+    clear_default_tasks,
+    get_default_task,
+    get_project_default_task,
+)
+from db.models import Invoice, Project, Task, Time
+
+User = get_user_model()
+
+
+class DefaultTaskCacheTest(TestCase):
+    """Default tasks are loaded once and dropped when tasks or projects change."""
+
+    def setUp(self):
+        clear_default_tasks()
+        self.task = Task.objects.create(name="Design", rate=150)
+        self.project = Project.objects.create(name="Site", default_task=self.task)
+
+    def test_default_task_cached(self):
+        task = get_default_task()
+        self.assertEqual(task.name, DEFAULT_TASK_NAME)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_default_task(), task)
+
+    def test_cached_task_is_a_copy(self):
+        get_default_task().name = "Changed"
+        self.assertEqual(get_default_task().name, DEFAULT_TASK_NAME)
+
+    def test_project_default_task(self):
+        self.assertEqual(get_project_default_task(self.project.pk), self.task)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_project_default_task(self.project.pk), self.task)
+
+        other = Project.objects.create(name="Other")
+        self.assertEqual(get_project_default_task(other.pk), get_default_task())
+
+    def test_project_change_clears_cache(self):
+        get_project_default_task(self.project.pk)
+        new_task = Task.objects.create(name="Support")
+        self.project.default_task = new_task
+        self.project.save()
+        self.assertEqual(get_project_default_task(self.project.pk), new_task)
+
+    def test_task_delete_clears_cache(self):
+        default = get_default_task()
+        Task.objects.get(pk=default.pk).delete()
+        self.assertNotEqual(get_default_task().pk, default.pk)
+
+    def test_time_save_uses_cached_project_task(self):
+        get_project_default_task(self.project.pk)
+        time_entry = Time.objects.create(project=self.project, hours=1)
+        self.assertEqual(time_entry.task, self.task)
+
+    def test_time_api_project(self):
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(admin)
+        response = self.client.get(reverse("time_api_project", args=[self.project.pk]))
+        self.assertEqual(response.json()["default_task_id"], str(self.task.pk))
+        response = self.client.get(reverse("time_api_project", args=["0" * 24]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_time_create_form_uses_project_default_task(self):
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        invoice = Invoice.objects.create(name="Invoice", project=self.project)
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse("time_create"), {"invoice_id": str(invoice.pk)}
+        )
+        self.assertEqual(response.context["form"].initial["task"], self.task)
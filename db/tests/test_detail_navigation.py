@@ -0,0 +1,46 @@
+"""Tests for detail view first/previous/next/last navigation."""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from db.models import Time
+from db.pagination import CursorPaginator
+
+User = get_user_model()
+
+
+class DetailNavigationTest(TestCase):
+    """Neighbors come from the current object's sort key."""
+
+    def setUp(self):
+        self.user1 = User.objects.create_user(username="user1", password="testpass123")
+        self.user2 = User.objects.create_user(username="user2", password="testpass123")
+        self.entries = []
+        for i in range(6):
+            user = self.user1 if i % 2 == 0 else self.user2
+            self.entries.append(Time.objects.create(user=user, hours=1))
+
+    def test_neighbors(self):
+        paginator = CursorPaginator(Time.objects.all(), per_page=1)
+        with self.assertNumQueries(4):
+            neighbors = paginator.get_neighbors(self.entries[2])
+        self.assertEqual(neighbors["first_object"], self.entries[0])
+        self.assertEqual(neighbors["previous_object"], self.entries[1])
+        self.assertEqual(neighbors["next_object"], self.entries[3])
+        self.assertEqual(neighbors["last_object"], self.entries[5])
+
+    def test_ends_skip_lookups(self):
+        paginator = CursorPaginator(Time.objects.all(), per_page=1)
+        with self.assertNumQueries(3):
+            neighbors = paginator.get_neighbors(self.entries[0])
+        self.assertIsNone(neighbors["previous_object"])
+        self.assertEqual(neighbors["first_object"], self.entries[0])
+
+    def test_detail_view_filters_by_user(self):
+        self.client.login(username="user1", password="testpass123")
+        response = self.client.get(f"/dashboard/time/{self.entries[2].pk}/")
+        self.assertEqual(response.status_code, 200)
+        navigation = response.context["page_obj_detail_view"]
+        self.assertEqual(navigation["previous_object"], self.entries[0])
+        self.assertEqual(navigation["next_object"], self.entries[4])
+        self.assertEqual(navigation["last_object"], self.entries[4])
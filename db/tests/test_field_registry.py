@@ -0,0 +1,58 @@
+"""Tests for the displayable field registry."""
+
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+
+from db import forms
+from db.field_registry import (
+    format_currency,
+    format_invoice,
+    get_form_class,
+    get_model_field_set,
+)
+from db.models import Client, Time
+from db.views.time import TimeListView
+
+User = get_user_model()
+
+
+class FieldRegistryTest(TestCase):
+    """Field sets are built at startup, per model and role."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="user", password="testpass")
+        self.superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass"
+        )
+
+    def test_models_map_to_forms(self):
+        self.assertIs(get_form_class(Time), forms.TimeForm)
+        self.assertIs(get_form_class(Client), forms.ClientForm)
+
+    def test_time_role_variants(self):
+        regular = get_model_field_set(Time, self.user).fields
+        admin = get_model_field_set(Time, self.superuser).fields
+        self.assertNotIn("invoice", regular)
+        self.assertNotIn("task", regular)
+        self.assertIn("invoice", admin)
+        self.assertIn("task", admin)
+
+    def test_formatters(self):
+        formatters = get_model_field_set(Time, self.superuser).formatters
+        self.assertIs(formatters["invoice"], format_invoice)
+        self.assertEqual(formatters["invoice"](None), "Not invoiced")
+        self.assertEqual(get_model_field_set(Client).formatters["name"]("Acme"), "Acme")
+        self.assertEqual(format_currency(None), format_currency(0))
+
+    def test_list_view_does_not_instantiate_forms(self):
+        Time.objects.create(user=self.superuser, hours=1)
+        request = RequestFactory().get("/")
+        request.user = self.superuser
+        view = TimeListView()
+        view.request = request
+        with patch.object(forms.TimeForm, "__init__") as init:
+            rows = view.get_field_values(page_obj=list(Time.objects.all()))
+        init.assert_not_called()
+        self.assertIn("invoice", rows.headers)
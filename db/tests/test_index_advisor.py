@@ -0,0 +1,103 @@
+"""Tests for the index advisor."""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from db.index_advisor import (
+    QUERY_SHAPES,
+    SAMPLE,
+    QueryShape,
+    advise,
+    build_queryset,
+    get_proposed_index,
+    get_sample,
+    summarize_plans,
+)
+from db.models import Client, Note, Time
+
+User = get_user_model()
+
+SHAPES = {shape.name: shape for shape in QUERY_SHAPES}
+
+
+class ProposedIndexTest(SimpleTestCase):
+    """Proposals put equality fields first, then the sort, then ranges."""
+
+    def test_equality_sort_range(self):
+        index = get_proposed_index(SHAPES["entry_previous"])
+        self.assertEqual(index.fields, ["status", "-pub_date"])
+
+        index = get_proposed_index(SHAPES["time_list_user"])
+        self.assertEqual(index.fields, ["user", "-date", "-id"])
+        self.assertLessEqual(len(index.name), 30)
+
+    def test_range_after_sort(self):
+        shape = QueryShape(
+            "t", "db.Time", {"user": SAMPLE}, ("name",), ranges={"date": "gte"}
+        )
+        self.assertEqual(get_proposed_index(shape).fields, ["user", "name", "date"])
+
+    def test_summarize_plans(self):
+        plan = {
+            "stage": "SORT",
+            "inputStage": {"stage": "FETCH", "inputStage": {"stage": "COLLSCAN"}},
+        }
+        summary = summarize_plans([plan])
+        self.assertTrue(summary.collscan)
+        self.assertTrue(summary.sort)
+        self.assertEqual(summary.indexes, [])
+
+        plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "x"}}
+        summary = summarize_plans([plan])
+        self.assertFalse(summary.collscan or summary.sort)
+        self.assertEqual(summary.indexes, ["x"])
+
+
+class IndexAdvisorTest(TestCase):
+    """Shapes are replayed with sampled values and explained."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="u", password="p")
+        self.time = Time.objects.create(user=self.user, hours=1)
+        self.note = Note.objects.create(
+            description="A note",
+            content_type=ContentType.objects.get_for_model(Client),
+            object_id="abc",
+        )
+
+    def test_sample_and_queryset(self):
+        shape = SHAPES["time_list_user"]
+        sample = get_sample(shape)
+        self.assertEqual(sample, {"user": self.user.pk})
+        self.assertEqual(list(build_queryset(shape, sample)), [self.time])
+
+    def test_skips_shapes_without_data(self):
+        advice, skipped = advise([SHAPES["entry_previous"]], repeat=1)
+        self.assertEqual(advice, [])
+        self.assertEqual(skipped, ["entry_previous"])
+
+    def test_note_index_covers_object_notes(self):
+        (item,), _ = advise([SHAPES["note_object"]], repeat=1)
+        self.assertIsNone(item.index)
+        self.assertFalse(item.plan.collscan)
+
+    def test_command_measures_proposals(self):
+        out = StringIO()
+        call_command(
+            "index_advisor", "--shape", "time_list_user", "--measure", stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn("time_list_user (db.Time)", output)
+        self.assertIn("propose models.Index(fields=['user', '-date', '-id']", output)
+        self.assertIn("ms ->", output)
+        self.assertIn("Add to Meta.indexes, then run makemigrations:", output)
+        self.assertIn("  db.Time:", output)
+        # The temporary index is dropped again
+        index = get_proposed_index(SHAPES["time_list_user"])
+        collection = connection.get_collection(Time._meta.db_table)
+        self.assertNotIn(index.name, collection.index_information())
@@ -0,0 +1,90 @@
+"""Tests for per-request query and latency instrumentation."""
+
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from db import instrumentation
+from db.instrumentation import CommandCounter
+
+User = get_user_model()
+
+ENABLED = {
+    "INSTRUMENTATION_ENABLED": True,
+    "INSTRUMENTATION_SAMPLE_RATE": 1.0,
+    "INSTRUMENTATION_HEADERS": True,
+}
+
+
+class CommandCounterTest(TestCase):
+    """Commands only count while a request is being measured."""
+
+    def test_counts_current_request_only(self):
+        event = SimpleNamespace(duration_micros=1500)
+        counter = CommandCounter()
+        counter.succeeded(event)  # No request: ignored
+
+        stats, token = instrumentation.start_request()
+        try:
+            counter.succeeded(event)
+            counter.failed(event)
+        finally:
+            instrumentation.end_request(token)
+        counter.succeeded(event)
+
+        self.assertEqual(stats.commands, 2)
+        self.assertAlmostEqual(stats.as_metrics()["db_ms"], 3.0)
+
+
+class InstrumentationMiddlewareTest(TestCase):
+    """Sampled requests are recorded per URL name."""
+
+    def setUp(self):
+        instrumentation.reset()
+        self.superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(self.superuser)
+
+    @override_settings(**ENABLED)
+    def test_headers_and_summary(self):
+        response = self.client.get(reverse("time_index"))
+        self.assertIn("X-DB-Commands", response)
+        self.assertGreater(float(response["X-View-Time-Ms"]), 0)
+
+        summary = {row["url_name"]: row for row in instrumentation.get_summary()}
+        self.assertEqual(summary["time_index"]["requests"], 1)
+
+    @override_settings(
+        **ENABLED, INSTRUMENTATION_BUDGETS={"time_index": {"view_ms": 0}}
+    )
+    def test_budget_overrun_is_logged(self):
+        with self.assertLogs("db.instrumentation", "WARNING") as logs:
+            self.client.get(reverse("time_index"))
+        self.assertIn("time_index over budget", logs.output[0])
+        self.assertEqual(instrumentation.get_summary()[0]["over_budget"], 1)
+
+    @override_settings(**ENABLED, INSTRUMENTATION_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_are_not_recorded(self):
+        response = self.client.get(reverse("time_index"))
+        self.assertNotIn("X-DB-Commands", response)
+        self.assertEqual(instrumentation.get_summary(), [])
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("time_index"))
+        self.assertNotIn("X-DB-Commands", response)
+
+    @override_settings(**ENABLED)
+    def test_performance_page(self):
+        self.client.get(reverse("time_index"))
+        response = self.client.get(reverse("analytics_performance"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "time_index")
+
+    def test_performance_page_requires_superuser(self):
+        User.objects.create_user(username="user", password="testpass123")
+        self.client.login(username="user", password="testpass123")
+        response = self.client.get(reverse("analytics_performance"))
+        self.assertEqual(response.status_code, 302)
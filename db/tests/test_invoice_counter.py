@@ -0,0 +1,71 @@
+"""Tests for the atomic invoice number counter."""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from db.counters import INVOICE_NUMBER, reserve, reserve_invoice_numbers
+from db.models import Counter, Invoice
+
+
+class InvoiceCounterTest(TestCase):
+    """Invoice numbers come from the counter, seeded from existing data."""
+
+    def test_reserve_block(self):
+        Invoice.objects.create(issue_date=timezone.now().date())
+        block = reserve_invoice_numbers(3)
+        self.assertEqual(list(block), [2, 3, 4])
+        invoice = Invoice.objects.create(issue_date=timezone.now().date())
+        self.assertEqual(invoice.invoice_number, 5)
+        self.assertEqual(Counter.objects.get(name=INVOICE_NUMBER).value, 5)
+
+    def test_seeded_from_existing_invoices(self):
+        # bulk_create skips save(), so the counter doesn't exist yet
+        Invoice.objects.bulk_create([Invoice(name="Old", invoice_number=41)])
+        invoice = Invoice.objects.create(issue_date=timezone.now().date())
+        self.assertEqual(invoice.invoice_number, 42)
+
+    def test_explicit_number_advances_counter(self):
+        Invoice.objects.create(issue_date=timezone.now().date(), invoice_number=100)
+        invoice = Invoice.objects.create(issue_date=timezone.now().date())
+        self.assertEqual(invoice.invoice_number, 101)
+
+    def test_edits_skip_counter(self):
+        invoice = Invoice.objects.create(issue_date=timezone.now().date())
+        invoice = Invoice.objects.get(pk=invoice.pk)
+        with patch("db.models.advance_invoice_number") as advance:
+            invoice.paid_amount = 10
+            invoice.save()
+            advance.assert_not_called()
+            invoice.invoice_number = 50
+            invoice.save()
+            advance.assert_called_once_with(50, using="default")
+
+    def test_reserve_rejects_empty_block(self):
+        with self.assertRaises(ValueError):
+            reserve("other", 0)
+
+
+class ConcurrentInvoiceNumberTest(TransactionTestCase):
+    """Invoices created in parallel get distinct, consecutive numbers."""
+
+    def test_parallel_creates(self):
+        def create(_):
+            try:
+                invoice = Invoice.objects.create(issue_date=timezone.now().date())
+                return invoice.invoice_number
+            finally:
+                # Each worker thread opened its own connection
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            numbers = list(executor.map(create, range(40)))
+
+        self.assertEqual(sorted(numbers), list(range(1, 41)))
+        self.assertEqual(
+            sorted(Invoice.objects.values_list("invoice_number", flat=True)),
+            list(range(1, 41)),
+        )
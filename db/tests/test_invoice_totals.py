@@ -0,0 +1,239 @@
+"""Tests for the incremental invoice totals engine."""
+
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from db import invoicing
+from db.invoicing import (
+    coalesce_invoice_totals,
+    get_invoice_statistics,
+    rebuild_invoice_totals,
+)
+from db.models import Invoice, Task, Time
+
+User = get_user_model()
+
+
+class IncrementalInvoiceTotalsTest(TestCase):
+    """Time entry changes update invoice totals by delta."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123", rate=Decimal("100.00")
+        )
+        self.task = Task.objects.create(name="Test Task", rate=Decimal("150.00"))
+        self.invoice = Invoice.objects.create(name="Invoice A")
+        self.other_invoice = Invoice.objects.create(name="Invoice B")
+
+    def _create_time(self, hours, invoice=None):
+        return Time.objects.create(
+            user=self.user,
+            task=self.task,
+            hours=Decimal(hours),
+            invoice=invoice or self.invoice,
+        )
+
+    def test_time_stores_line_totals(self):
+        time_entry = self._create_time("2.0")
+        time_entry.refresh_from_db()
+        self.assertEqual(time_entry.amount, Decimal("300.00"))
+        self.assertEqual(time_entry.cost, Decimal("200.00"))
+
+    def test_totals_after_create_edit_and_delete(self):
+        first = self._create_time("2.0")
+        self._create_time("3.0")
+
+        first.hours = Decimal("4.0")
+        first.save()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.hours, Decimal("7.00"))
+        self.assertEqual(self.invoice.amount, Decimal("1050.00"))
+        self.assertEqual(self.invoice.cost, Decimal("700.00"))
+        self.assertEqual(self.invoice.net, Decimal("350.00"))
+        self.assertEqual(self.invoice.balance, Decimal("1050.00"))
+
+        first.delete()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.hours, Decimal("3.00"))
+        self.assertEqual(self.invoice.amount, Decimal("450.00"))
+
+    def test_edit_does_not_resave_sibling_time_entries(self):
+        entries = [self._create_time("1.0") for _ in range(5)]
+        saved = []
+
+        def record(sender, instance, **kwargs):
+            saved.append(instance.pk)
+
+        post_save.connect(record, sender=Time)
+        try:
+            entries[0].hours = Decimal("2.0")
+            entries[0].save()
+        finally:
+            post_save.disconnect(record, sender=Time)
+        self.assertEqual(saved, [entries[0].pk])
+
+    def test_moving_time_between_invoices(self):
+        time_entry = self._create_time("2.0")
+        time_entry.invoice = self.other_invoice
+        time_entry.save()
+
+        self.invoice.refresh_from_db()
+        self.other_invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount, Decimal("0.00"))
+        self.assertEqual(self.invoice.hours, Decimal("0.00"))
+        self.assertEqual(self.other_invoice.amount, Decimal("300.00"))
+        self.assertEqual(self.other_invoice.hours, Decimal("2.00"))
+
+    def test_balance_accounts_for_paid_amount(self):
+        self.invoice.paid_amount = Decimal("100.00")
+        self.invoice.save()
+        self._create_time("2.0")
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.balance, Decimal("200.00"))
+
+
+class RebuildInvoiceTotalsTest(TestCase):
+    """The full rebuild reprices time entries from current rates."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123", rate=Decimal("100.00")
+        )
+        self.task = Task.objects.create(name="Test Task", rate=Decimal("150.00"))
+        self.invoice = Invoice.objects.create(name="Invoice A")
+        Time.objects.create(
+            user=self.user, task=self.task, hours=Decimal("2.0"), invoice=self.invoice
+        )
+
+    def test_rebuild_picks_up_rate_change(self):
+        Task.objects.filter(pk=self.task.pk).update(rate=Decimal("200.00"))
+        rebuild_invoice_totals(self.invoice)
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount, Decimal("400.00"))
+        self.assertEqual(self.invoice.net, Decimal("200.00"))
+        self.assertEqual(
+            Time.objects.get(invoice=self.invoice).amount, Decimal("400.00")
+        )
+
+    def test_rebuild_invoices_command(self):
+        Invoice.objects.filter(pk=self.invoice.pk).update(amount=Decimal("1.00"))
+        out = StringIO()
+        call_command("rebuild_invoices", stdout=out)
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.amount, Decimal("300.00"))
+        self.assertIn("Rebuilt totals for 1 invoices", out.getvalue())
+
+
+class CoalesceInvoiceTotalsTest(TestCase):
+    """Bulk writes recalculate each invoice once."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123", rate=Decimal("100.00")
+        )
+        self.task = Task.objects.create(name="Test Task", rate=Decimal("150.00"))
+        self.invoice = Invoice.objects.create(name="Invoice A")
+
+    def _create_times(self, count):
+        return [
+            Time.objects.create(
+                user=self.user,
+                task=self.task,
+                hours=Decimal("1.0"),
+                invoice=self.invoice,
+            )
+            for _ in range(count)
+        ]
+
+    def test_invoice_recalculated_once_per_block(self):
+        with (
+            patch.object(
+                invoicing, "sync_invoice_totals", wraps=invoicing.sync_invoice_totals
+            ) as sync,
+            patch.object(invoicing, "apply_invoice_delta") as delta,
+        ):
+            with coalesce_invoice_totals():
+                entries = self._create_times(20)
+                self.invoice.save()
+                Time.objects.filter(pk__in=[e.pk for e in entries[:5]]).delete()
+
+        sync.assert_called_once_with(self.invoice.pk)
+        delta.assert_not_called()
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.hours, Decimal("15.00"))
+        self.assertEqual(self.invoice.amount, Decimal("2250.00"))
+        self.assertEqual(self.invoice.cost, Decimal("1500.00"))
+
+    def test_nested_blocks_flush_once(self):
+        with patch.object(
+            invoicing, "sync_invoice_totals", wraps=invoicing.sync_invoice_totals
+        ) as sync:
+            with coalesce_invoice_totals():
+                with coalesce_invoice_totals():
+                    self._create_times(3)
+                sync.assert_not_called()
+        sync.assert_called_once_with(self.invoice.pk)
+
+    def test_shared_instance_nests(self):
+        # A decorator instance is shared by every request it wraps
+        block = coalesce_invoice_totals()
+        with patch.object(
+            invoicing, "sync_invoice_totals", wraps=invoicing.sync_invoice_totals
+        ) as sync:
+            with block:
+                with block:
+                    self._create_times(3)
+                sync.assert_not_called()
+        sync.assert_called_once_with(self.invoice.pk)
+
+    def test_nothing_written_when_block_raises(self):
+        with patch.object(invoicing, "sync_invoice_totals") as sync:
+            with self.assertRaises(ValueError):
+                with coalesce_invoice_totals():
+                    self._create_times(2)
+                    raise ValueError
+        sync.assert_not_called()
+
+
+class InvoiceStatisticsTest(TestCase):
+    """Per-user invoice statistics come from one grouped aggregation."""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            username="alice", password="testpass123", rate=Decimal("100.00")
+        )
+        self.bob = User.objects.create_user(
+            username="bob", password="testpass123", rate=Decimal("50.00")
+        )
+        self.task = Task.objects.create(name="Test Task", rate=Decimal("150.00"))
+        self.invoice = Invoice.objects.create(name="Invoice A")
+        for user, hours in [(self.bob, "1.0"), (self.alice, "2.0"), (self.bob, "3.0")]:
+            Time.objects.create(
+                user=user, task=self.task, hours=Decimal(hours), invoice=self.invoice
+            )
+        Time.objects.create(task=self.task, hours=Decimal("1.0"), invoice=self.invoice)
+
+    def test_grouped_by_user(self):
+        with self.assertNumQueries(1):
+            stats = get_invoice_statistics(self.invoice)
+
+        self.assertEqual([u["username"] for u in stats["users"]], ["alice", "bob"])
+        bob = stats["users"][1]
+        self.assertEqual(bob["hours"], Decimal("4.00"))
+        self.assertEqual(bob["amount"], Decimal("600.00"))
+        self.assertEqual(bob["cost"], Decimal("200.00"))
+        self.assertEqual(bob["user_rate"], Decimal("50.00"))
+
+    def test_totals_include_entries_without_user(self):
+        stats = get_invoice_statistics(self.invoice.pk)
+        self.assertEqual(stats["hours"], Decimal("7.00"))
+        self.assertEqual(stats["amount"], Decimal("1050.00"))
+        self.assertEqual(stats["cost"], Decimal("400.00"))
@@ -0,0 +1,66 @@
+"""Tests for loading displayed foreign keys with list pages."""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from db.models import Project, Task, Time
+from db.views.base import get_foreign_key_fields
+from db.views.time import TimeListView
+
+User = get_user_model()
+
+
+class ListPrefetchTest(TestCase):
+    """The number of queries per list page does not grow with its rows."""
+
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(self.superuser)
+
+    def _create_times(self, count):
+        for i in range(count):
+            user = User.objects.create_user(username=f"user{Time.objects.count()}")
+            Time.objects.create(user=user, hours=1, description=f"Entry {i}")
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("time_index"), {"items_per_page": 100})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_per_page_are_constant(self):
+        self._create_times(3)
+        baseline = self._count_queries()
+        self._create_times(20)
+        self.assertEqual(self._count_queries(), baseline)
+
+    def test_foreign_key_fields(self):
+        self.assertEqual(
+            get_foreign_key_fields(Time, ["project", "date", "task", "missing"]),
+            ["project", "task"],
+        )
+
+    def test_override(self):
+        view = TimeListView()
+        self.assertEqual(view.get_list_select_related(Time, ["user"]), ["user"])
+        view.list_select_related = ["project"]
+        self.assertEqual(view.get_list_select_related(Time, ["user"]), ["project"])
+        self.assertEqual(view.get_list_select_related(Task, ["user"]), [])
+        view.list_select_related = False
+        self.assertEqual(view.get_list_select_related(Time, ["user"]), [])
+
+    def test_related_rows_are_batched(self):
+        project = Project.objects.create(name="Project")
+        users = [User.objects.create_user(username=f"member{i}") for i in range(5)]
+        times = [Time.objects.create(user=u, project=project, hours=1) for u in users]
+        times = list(Time.objects.filter(pk__in=[t.pk for t in times]))
+        view = TimeListView()
+        with self.assertNumQueries(1):
+            view._prefetch_foreign_keys(times, ["user"])
+        with self.assertNumQueries(0):
+            self.assertEqual({t.user for t in times}, set(users))
@@ -0,0 +1,67 @@
+"""Tests for batched note loading."""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from db.models import Client, Company, Note
+from db.notes import get_note_counts, get_notes, get_notes_for_objects
+
+User = get_user_model()
+
+
+class NoteLoadingTest(TestCase):
+    """Notes and counts for a page of objects come from one query."""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.company = Company.objects.create(name="Company")
+        self.clients = [Client.objects.create(name=f"Client {i}") for i in range(3)]
+        for obj, count in [(self.clients[0], 2), (self.company, 1)]:
+            for i in range(count):
+                Note.objects.create(
+                    name=f"Note {i}",
+                    user=self.user,
+                    content_type=ContentType.objects.get_for_model(obj),
+                    object_id=str(obj.pk),
+                )
+        # Warm the content type cache so only note queries are counted
+        ContentType.objects.get_for_models(Client, Company)
+
+    def test_notes_for_mixed_objects(self):
+        objects = [*self.clients, self.company]
+        with self.assertNumQueries(1):
+            notes = get_notes_for_objects(objects)
+            users = {note.user for note in notes[self.clients[0]]}
+        self.assertEqual(users, {self.user})
+        self.assertEqual(len(notes[self.clients[0]]), 2)
+        self.assertEqual(len(notes[self.company]), 1)
+        self.assertNotIn(self.clients[1], notes)
+
+    def test_newest_first(self):
+        Note.objects.filter(name="Note 0").update(
+            created=timezone.now() - timedelta(days=1)
+        )
+        notes = get_notes(self.clients[0])
+        self.assertEqual([n.name for n in notes], ["Note 1", "Note 0"])
+
+    def test_counts(self):
+        with self.assertNumQueries(1):
+            counts = get_note_counts([*self.clients, self.company])
+        self.assertEqual(counts, {self.clients[0]: 2, self.company: 1})
+
+    def test_list_rows_show_note_counts(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("client_index"))
+        counts = {
+            row.object_id: row.note_count
+            for row in response.context["field_values_page"]
+        }
+        self.assertEqual(counts[self.clients[0].pk], 2)
+        self.assertEqual(counts[self.clients[1].pk], 0)
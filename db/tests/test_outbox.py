@@ -0,0 +1,153 @@
+"""Tests for the email outbox and the send_outbox worker."""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from aclarknet.email_utils import (
+    queue_email_with_headers,
+    queue_notification_email,
+    send_outbox,
+)
+from db.models import OutboxEmail
+
+
+class CountingBackend(EmailBackend):
+    """Locmem backend that counts how often a connection is opened."""
+
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(EmailBackend):
+    """Backend whose relay rejects every message."""
+
+    def send_messages(self, messages):
+        raise ConnectionError("relay unavailable")
+
+
+class OutboxQueueTest(TestCase):
+    """Queueing stores the rendered message without sending it."""
+
+    def test_queue_does_not_send(self):
+        queued = queue_email_with_headers(
+            subject="Hello",
+            plain_message="Body",
+            recipient_list=["to@example.com"],
+            html_message="<p>Body</p>",
+            reply_to="reply@example.com",
+        )
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(queued.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(queued.to, ["to@example.com"])
+        self.assertEqual(queued.from_email, "aclark@aclark.net")
+        self.assertEqual(queued.headers["Reply-To"], "reply@example.com")
+
+    def test_send_outbox_delivers_and_records_status(self):
+        queued = queue_notification_email(
+            subject="Notify", plain_message="Body", html_message="<p>Body</p>"
+        )
+        counts = send_outbox()
+
+        self.assertEqual(counts, {"sent": 1, "retried": 0, "failed": 0})
+        self.assertEqual(len(mail.outbox), 1)
+        email = mail.outbox[0]
+        self.assertEqual(email.subject, "Notify")
+        self.assertEqual(email.to, ["aclark@aclark.net"])
+        self.assertEqual(email.extra_headers["X-Mailer"], "aclark.net")
+        self.assertEqual(email.alternatives[0][0], "<p>Body</p>")
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, OutboxEmail.STATUS_SENT)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIsNotNone(queued.sent_at)
+
+        # Sent messages are not delivered again
+        send_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(
+        EMAIL_OUTBOX_BACKEND="db.tests.test_outbox.CountingBackend",
+        EMAIL_OUTBOX_BATCH_SIZE=10,
+    )
+    def test_batch_reuses_one_connection(self):
+        CountingBackend.opened = 0
+        for i in range(5):
+            queue_notification_email(subject=f"Message {i}", plain_message="Body")
+
+        counts = send_outbox()
+
+        self.assertEqual(counts["sent"], 5)
+        self.assertEqual(CountingBackend.opened, 1)
+
+    def test_command_drains_in_batches(self):
+        for i in range(5):
+            queue_notification_email(subject=f"Message {i}", plain_message="Body")
+        out = StringIO()
+        call_command("send_outbox", "--batch-size", "2", stdout=out)
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn("Sent 5 emails", out.getvalue())
+        self.assertFalse(
+            OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists()
+        )
+
+
+@override_settings(
+    EMAIL_OUTBOX_BACKEND="db.tests.test_outbox.FailingBackend",
+    EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+    EMAIL_OUTBOX_RETRY_BACKOFF=60,
+)
+class OutboxRetryTest(TestCase):
+    """Failed deliveries are retried with backoff, then marked failed."""
+
+    def setUp(self):
+        self.queued = queue_notification_email(subject="Retry", plain_message="Body")
+
+    def test_failure_schedules_retry_with_backoff(self):
+        before = timezone.now()
+        counts = send_outbox()
+
+        self.assertEqual(counts, {"sent": 0, "retried": 1, "failed": 0})
+        self.queued.refresh_from_db()
+        self.assertEqual(self.queued.status, OutboxEmail.STATUS_PENDING)
+        self.assertEqual(self.queued.attempts, 1)
+        self.assertIn("relay unavailable", self.queued.last_error)
+        self.assertGreaterEqual(
+            self.queued.next_attempt_at, before + timedelta(seconds=60)
+        )
+
+        # Not due yet, so the next run skips it
+        self.assertEqual(send_outbox(), {"sent": 0, "retried": 0, "failed": 0})
+
+    def test_marked_failed_after_max_attempts(self):
+        send_outbox()
+        OutboxEmail.objects.filter(pk=self.queued.pk).update(
+            next_attempt_at=timezone.now()
+        )
+        counts = send_outbox()
+
+        self.assertEqual(counts, {"sent": 0, "retried": 0, "failed": 1})
+        self.queued.refresh_from_db()
+        self.assertEqual(self.queued.status, OutboxEmail.STATUS_FAILED)
+        self.assertEqual(self.queued.attempts, 2)
+
+    def test_stale_claim_is_released(self):
+        OutboxEmail.objects.filter(pk=self.queued.pk).update(
+            status=OutboxEmail.STATUS_SENDING,
+            claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        with override_settings(EMAIL_OUTBOX_BACKEND=None):
+            counts = send_outbox()
+
+        self.assertEqual(counts["sent"], 1)
+        self.assertEqual(len(mail.outbox), 1)
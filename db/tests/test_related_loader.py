@@ -0,0 +1,64 @@
+"""Tests for the detail page related-graph loader."""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from db.models import Client, Company, Invoice, Project, Time
+from db.related import flatten_related, load_related
+
+
+class RelatedLoaderTest(TestCase):
+    """Related objects load in a fixed number of queries, in display order."""
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Company")
+        self.client_obj = Client.objects.create(name="Client", company=self.company)
+        self.project = Project.objects.create(name="Project", client=self.client_obj)
+        self.invoice = Invoice.objects.create(name="Invoice", project=self.project)
+        self.times = [
+            Time.objects.create(project=self.project, invoice=self.invoice, hours=1)
+            for _ in range(3)
+        ]
+
+    def test_time_parents_in_one_query(self):
+        time = Time.objects.get(pk=self.times[0].pk)
+        with self.assertNumQueries(1):
+            related = flatten_related(load_related(time))
+        self.assertEqual(
+            related, [self.invoice, self.project, self.client_obj, self.company]
+        )
+
+    def test_invoice(self):
+        with self.assertNumQueries(2):
+            related = load_related(self.invoice)
+        self.assertEqual(len(related["times"]), 3)
+        self.assertEqual(
+            flatten_related(related)[3:], [self.project, self.client_obj, self.company]
+        )
+
+    def test_client_invoices_through_projects(self):
+        with self.assertNumQueries(3):
+            related = flatten_related(load_related(self.client_obj))
+        self.assertEqual(related, [self.company, self.project, self.invoice])
+
+    def test_missing_parents_and_children(self):
+        client = Client.objects.create(name="Solo")
+        with self.assertNumQueries(2):
+            self.assertEqual(flatten_related(load_related(client)), [])
+
+    def test_detail_page_query_count_is_fixed(self):
+        admin = get_user_model().objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(admin)
+        url = f"/dashboard/client/{self.client_obj.pk}/"
+        with CaptureQueriesContext(connection) as before:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        for i in range(5):
+            project = Project.objects.create(name=f"More {i}", client=self.client_obj)
+            Invoice.objects.create(name=f"Invoice {i}", project=project)
+        with CaptureQueriesContext(connection) as after:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(after), len(before))
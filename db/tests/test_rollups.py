@@ -0,0 +1,159 @@
+"""Tests for the per-user, per-month dashboard rollups."""
+
+import datetime
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from db.invoicing import coalesce_invoice_totals
+from db.models import DashboardRollup, Invoice, Task, Time
+from db.rollups import coalesce_rollups, refresh_rollup
+from db.statistics import get_dashboard_statistics
+
+User = get_user_model()
+
+JANUARY = datetime.date(2026, 1, 1)
+FEBRUARY = datetime.date(2026, 2, 1)
+
+
+class DashboardRollupTest(TestCase):
+    """Rollups follow time entry and invoice writes."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", password="testpass123", rate=Decimal("50.00")
+        )
+        self.task = Task.objects.create(name="Test Task", rate=Decimal("100.00"))
+
+    def _rollup(self, user, month):
+        return DashboardRollup.objects.get(user=user, month=month)
+
+    def _create_time(self, hours, date, invoice=None):
+        return Time.objects.create(
+            user=self.user,
+            task=self.task,
+            hours=Decimal(hours),
+            date=date,
+            invoice=invoice,
+        )
+
+    def test_time_entries_roll_up_by_month(self):
+        self._create_time("2.0", datetime.date(2026, 1, 5))
+        self._create_time("3.0", datetime.date(2026, 1, 20))
+        self._create_time("4.0", datetime.date(2026, 2, 3))
+
+        self.assertEqual(self._rollup(self.user, JANUARY).entered_hours, Decimal("5"))
+        self.assertEqual(self._rollup(self.user, FEBRUARY).entered_hours, Decimal("4"))
+
+    def test_edit_move_and_delete(self):
+        time_entry = self._create_time("2.0", datetime.date(2026, 1, 5))
+        time_entry.hours = Decimal("6.0")
+        time_entry.date = datetime.date(2026, 2, 5)
+        time_entry.save()
+
+        self.assertEqual(self._rollup(self.user, JANUARY).entered_hours, Decimal("0"))
+        self.assertEqual(self._rollup(self.user, FEBRUARY).entered_hours, Decimal("6"))
+
+        time_entry.delete()
+        self.assertEqual(self._rollup(self.user, FEBRUARY).entered_hours, Decimal("0"))
+
+    def test_invoice_totals_and_paid_state(self):
+        invoice = Invoice.objects.create(
+            name="Invoice", user=self.user, issue_date=datetime.date(2026, 1, 31)
+        )
+        self._create_time("2.0", datetime.date(2026, 1, 5), invoice=invoice)
+
+        rollup = self._rollup(self.user, JANUARY)
+        self.assertEqual(rollup.approved_hours, Decimal("2"))
+        self.assertEqual(rollup.gross, Decimal("200"))
+        self.assertEqual(rollup.cost, Decimal("100"))
+        self.assertEqual(rollup.net, Decimal("100"))
+
+        # Paying the invoice in full drops its hours from the dashboard
+        invoice.refresh_from_db()
+        invoice.paid_amount = Decimal("200.00")
+        invoice.save()
+
+        rollup = self._rollup(self.user, JANUARY)
+        self.assertEqual(rollup.entered_hours, Decimal("0"))
+        self.assertEqual(rollup.approved_hours, Decimal("0"))
+        self.assertEqual(rollup.gross, Decimal("200"))
+
+    def test_edits_apply_deltas(self):
+        invoice = Invoice.objects.create(
+            name="Invoice", user=self.user, issue_date=datetime.date(2026, 2, 1)
+        )
+        time_entry = self._create_time("2.0", datetime.date(2026, 1, 5), invoice)
+        self._create_time("1.0", datetime.date(2026, 1, 6))
+
+        with patch("db.rollups.refresh_rollup", wraps=refresh_rollup) as refresh:
+            time_entry.hours = Decimal("3.0")
+            time_entry.save()
+        refresh.assert_not_called()
+
+        january = self._rollup(self.user, JANUARY)
+        self.assertEqual(january.entered_hours, Decimal("4"))
+        self.assertEqual(january.approved_hours, Decimal("3"))
+        february = self._rollup(self.user, FEBRUARY)
+        self.assertEqual(february.gross, Decimal("300"))
+        self.assertEqual(february.cost, Decimal("150"))
+        self.assertEqual(february.net, Decimal("150"))
+
+    def test_coalesced_paid_state_flip_resums_invoice(self):
+        invoice = Invoice.objects.create(
+            name="Invoice", user=self.user, issue_date=datetime.date(2026, 2, 1)
+        )
+        self._create_time("2.0", datetime.date(2026, 1, 5), invoice)
+        self._create_time("1.0", datetime.date(2026, 2, 5), invoice)
+
+        with coalesce_invoice_totals():
+            invoice.refresh_from_db()
+            invoice.paid_amount = Decimal("300.00")
+            invoice.save()
+
+        for month in (JANUARY, FEBRUARY):
+            rollup = self._rollup(self.user, month)
+            self.assertEqual(rollup.entered_hours, Decimal("0"))
+            self.assertEqual(rollup.approved_hours, Decimal("0"))
+        self.assertEqual(self._rollup(self.user, FEBRUARY).gross, Decimal("300"))
+
+    def test_coalesced_block_refreshes_on_exit(self):
+        with coalesce_invoice_totals():
+            for day in range(1, 6):
+                self._create_time("1.0", datetime.date(2026, 1, day))
+            self.assertFalse(DashboardRollup.objects.exists())
+
+        self.assertEqual(self._rollup(self.user, JANUARY).entered_hours, Decimal("5"))
+
+    def test_rollup_block_refreshes_on_exit(self):
+        with coalesce_rollups():
+            with coalesce_rollups():
+                self._create_time("1.0", datetime.date(2026, 1, 1))
+            self._create_time("1.0", datetime.date(2026, 1, 2))
+            self.assertFalse(DashboardRollup.objects.exists())
+
+        self.assertEqual(self._rollup(self.user, JANUARY).entered_hours, Decimal("2"))
+
+    def test_rebuild_rollups_command(self):
+        self._create_time("2.0", datetime.date(2026, 1, 5))
+        DashboardRollup.objects.update(entered_hours=Decimal("99"))
+
+        out = StringIO()
+        call_command("rebuild_rollups", stdout=out)
+
+        self.assertEqual(self._rollup(self.user, JANUARY).entered_hours, Decimal("2"))
+        self.assertIn("Rebuilt 1 rollups", out.getvalue())
+
+    def test_dashboard_statistics_read_rollups(self):
+        other = User.objects.create_user(username="other", password="testpass123")
+        self._create_time("2.0", datetime.date(2026, 1, 5))
+        Time.objects.create(user=other, hours=Decimal("3.0"), date=JANUARY)
+
+        self.assertEqual(
+            get_dashboard_statistics(self.user)["times"]["entered"], Decimal("2")
+        )
+        self.assertEqual(get_dashboard_statistics()["times"]["entered"], Decimal("5"))
@@ -0,0 +1,42 @@
+"""Tests for the column-oriented field values page."""
+
+from django.test import SimpleTestCase
+
+from db.rows import FieldValuesPage
+from db.templatetags.text_filters import is_not_invoiced
+
+
+class FieldValuesPageTest(SimpleTestCase):
+    """Rows share their header tuple and still read as (name, value) pairs."""
+
+    def setUp(self):
+        self.page = FieldValuesPage()
+        for pk in range(3):
+            self.page.append(
+                ["type", "id", "invoice", "hours"], ["time", pk, None, pk + 1]
+            )
+        self.page.append(["type", "id", "name"], ["client", 9, "Acme"])
+
+    def test_headers_stored_once(self):
+        self.assertEqual(self.page.headers, ("type", "id", "invoice", "hours"))
+        self.assertIs(self.page[0].headers, self.page[2].headers)
+        self.assertEqual(self.page[3].headers, ("type", "id", "name"))
+
+    def test_row_compatibility(self):
+        row = self.page[1]
+        self.assertEqual(
+            list(row), [("type", "time"), ("id", 1), ("invoice", None), ("hours", 2)]
+        )
+        self.assertEqual(row[0][1], "time")
+        self.assertEqual(len(row), 4)
+
+    def test_row_accessors(self):
+        row = self.page[3]
+        self.assertEqual(row.model_name, "client")
+        self.assertEqual(row.object_id, 9)
+        self.assertEqual(row.cells, [("type", "client"), ("name", "Acme")])
+        self.assertIsNone(row.get("missing"))
+
+    def test_is_not_invoiced(self):
+        self.assertTrue(is_not_invoiced(self.page[0]))
+        self.assertFalse(is_not_invoiced(self.page[3]))
@@ -0,0 +1,73 @@
+"""Tests for the search token index."""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from db.models import Client, Note, SearchToken, Time
+from db.search import search, tokenize
+
+User = get_user_model()
+
+
+class SearchIndexTest(TestCase):
+    """Objects are indexed on save and found by prefix."""
+
+    def setUp(self):
+        self.client_obj = Client.objects.create(
+            name="Acme Widgets", description="Industrial supplier"
+        )
+        self.note = Note.objects.create(
+            name="Kickoff", description="Discussed the widget roadmap with Acme"
+        )
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hello, World! a"), ["hello", "world"])
+
+    def test_prefix_match_includes_text_fields(self):
+        self.assertEqual(list(search("roadm")), [self.note])
+        self.assertEqual(list(search("INDUSTR")), [self.client_obj])
+
+    def test_ranking_prefers_title_matches(self):
+        # "acme" is in the client name but only in the note description
+        self.assertEqual(list(search("acme")), [self.client_obj, self.note])
+
+    def test_update_and_delete_maintain_index(self):
+        self.note.description = "Budget review"
+        self.note.save()
+        self.assertEqual(list(search("roadmap")), [])
+        self.assertEqual(list(search("budget")), [self.note])
+
+        self.note.delete()
+        self.assertEqual(list(search("budget")), [])
+
+    def test_results_paginate_lazily(self):
+        for i in range(5):
+            Time.objects.create(hours=1, description=f"Deploy run {i}")
+        results = search("deploy")
+
+        self.assertEqual(results.count(), 5)
+        with self.assertNumQueries(2):
+            page = results[1:3]
+        self.assertEqual(len(page), 2)
+
+    def test_rebuild_search_index_command(self):
+        SearchToken.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_search_index", "--model", "client", stdout=out)
+
+        self.assertEqual(list(search("acme")), [self.client_obj])
+        self.assertIn("Indexed 1 objects", out.getvalue())
+
+    def test_search_view(self):
+        superuser = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(superuser)
+        response = self.client.get(reverse("search_index"), {"q": "widg"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page_obj"].paginator.count, 2)
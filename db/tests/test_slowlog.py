@@ -0,0 +1,130 @@
+"""Tests for the slow MongoDB command log."""
+
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from db import slowlog
+from db.models import Time
+from db.slowlog import (
+    SLOW_COMMAND_COLLECTION,
+    SlowCommandListener,
+    SlowCommandWriter,
+    find_winning_plans,
+    get_shape,
+    get_top_offenders,
+    has_collscan,
+)
+
+User = get_user_model()
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.records = []
+
+    def submit(self, record):
+        self.records.append(record)
+
+
+def _events(command, duration_micros, request_id=1):
+    started = SimpleNamespace(
+        command=command, connection_id=("localhost", 27017), request_id=request_id
+    )
+    finished = SimpleNamespace(
+        command_name=next(iter(command)),
+        database_name="test",
+        duration_micros=duration_micros,
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+    )
+    return started, finished
+
+
+class SlowCommandHelpersTest(SimpleTestCase):
+    """Shapes hide values; plans are searched for COLLSCAN stages."""
+
+    def test_shape(self):
+        shape = get_shape({"filter": {"name": "Acme", "hours": {"$gt": 2}}, "limit": 1})
+        self.assertEqual(
+            shape, {"filter": {"name": "?", "hours": {"$gt": "?"}}, "limit": "?"}
+        )
+
+    def test_collscan(self):
+        explain = {
+            "stages": [
+                {"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}},
+            ]
+        }
+        plans = find_winning_plans(explain)
+        self.assertEqual(plans, [{"stage": "COLLSCAN"}])
+        self.assertTrue(has_collscan(plans))
+        self.assertFalse(
+            has_collscan({"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}})
+        )
+
+    def test_listener_threshold(self):
+        writer = RecordingWriter()
+        listener = SlowCommandListener(threshold_ms=100, writer=writer)
+        for request_id, duration in [(1, 50_000), (2, 150_000)]:
+            started, finished = _events({"find": "db_time"}, duration, request_id)
+            listener.started(started)
+            listener.succeeded(finished)
+        self.assertEqual(len(writer.records), 1)
+        self.assertEqual(writer.records[0]["duration_ms"], 150)
+
+    def test_origin(self):
+        token = slowlog.set_origin("time_index")
+        try:
+            self.assertEqual(slowlog.get_origin(), "time_index")
+        finally:
+            slowlog.reset_origin(token)
+
+
+class SlowCommandLogTest(TestCase):
+    """Slow commands are explained and stored in the capped collection."""
+
+    def tearDown(self):
+        connection.database.drop_collection(SLOW_COMMAND_COLLECTION)
+
+    def _write_unindexed_find(self):
+        Time.objects.create(hours=1, description="Work")
+        record = {
+            "command": "find",
+            "database": connection.database.name,
+            "duration_ms": 250.0,
+            "origin": "time_index",
+            "raw": {
+                "find": Time._meta.db_table,
+                "filter": {"description": "Work"},
+                "$db": connection.database.name,
+            },
+        }
+        SlowCommandWriter().write(record)
+
+    def test_write_and_top_offenders(self):
+        self._write_unindexed_find()
+        self._write_unindexed_find()
+
+        stored = connection.get_collection(SLOW_COMMAND_COLLECTION).find_one()
+        self.assertEqual(stored["collection"], Time._meta.db_table)
+        self.assertEqual(stored["shape"]["filter"], {"description": "?"})
+        self.assertTrue(stored["collscan"])
+
+        offenders = get_top_offenders()
+        self.assertEqual(len(offenders), 1)
+        self.assertEqual(offenders[0]["count"], 2)
+        self.assertEqual(offenders[0]["total_ms"], 500.0)
+
+    @override_settings(SLOW_COMMAND_LOG_ENABLED=True)
+    def test_analytics_page_lists_offenders(self):
+        self._write_unindexed_find()
+        admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.client.force_login(admin)
+        response = self.client.get(reverse("analytics"))
+        self.assertContains(response, "COLLSCAN")
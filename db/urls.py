@@ -94,6 +94,7 @@ from .views import (
 # Other Views
 from .views import DashboardView
 from .views import AnalyticsView
+from .views import PerformanceView
 from .views import SearchView
 from .views import trigger_500
 from .views import update_related_entries
@@ -107,6 +108,11 @@ urlpatterns = [
 
 urlpatterns += [
     path("analytics/", AnalyticsView.as_view(), name="analytics"),
+    path(
+        "analytics/performance/",
+        PerformanceView.as_view(),
+        name="analytics_performance",
+    ),
 ]
 
 urlpatterns += [
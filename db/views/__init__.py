@@ -51,6 +51,7 @@ from .contact import (
 from .dashboard import (
     AnalyticsView,
     DashboardView,
+    PerformanceView,
     display_mode,
     lounge,
 )
@@ -164,6 +165,7 @@ __all__ = [
     # Dashboard views
     "AnalyticsView",
     "DashboardView",
+    "PerformanceView",
     "display_mode",
     "html_mode",
     "lounge",
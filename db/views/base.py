@@ -1,14 +1,35 @@
 """Base views, mixins, and error handlers for the db app."""
 
+# Standard library imports
+from collections import defaultdict
+
 # Django imports
 from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.exceptions import FieldDoesNotExist
 from django.core.paginator import Paginator
+from django.db.models import QuerySet, prefetch_related_objects
 from django.shortcuts import render, reverse
 from django.urls import reverse_lazy
 from django.views.defaults import permission_denied
 
-# Standard library imports
+from ..field_registry import get_form_field_set, get_model_field_set
+from ..notes import get_note_counts, get_notes
+from ..pagination import CursorPaginator
+from ..rows import FieldValuesPage
+
+
+def get_foreign_key_fields(model, field_names):
+    """Return the forward foreign key (and one-to-one) fields among names."""
+    fields = []
+    for name in field_names:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            fields.append(name)
+    return fields
 
 
 class FakeDataMixin:
@@ -69,6 +90,22 @@ class BaseView:
     has_related = False
     dashboard = False
 
+    # ---- Pagination ----
+    # "offset" uses Django's Paginator (count() plus skip/limit); "cursor"
+    # pages by (ordering field, pk) with ?cursor= tokens, see db.pagination
+    pagination_mode = "offset"
+    cursor_estimated_total = False  # Show the collection's estimated size
+
+    # ---- Related object loading ----
+    # Foreign keys shown in list rows are loaded with the page rather than
+    # one query per row: select_related() for querysets of the view's model,
+    # one batched query per related model otherwise. None follows the
+    # displayed foreign keys, False turns loading off, and a list of names
+    # is used as is for the view's model.
+    list_select_related = None
+    # Show a notes badge on list rows (one count query per page)
+    list_note_counts = True
+
     # ---- Field values customization ----
     # Subclasses can set these to customize which fields are shown in detail views
     field_values_include = None  # List of field names to include (None = all fields)
@@ -200,12 +237,26 @@ class BaseView:
             queryset = self.queryset_related
             related = True
 
-        # 4. Pagination
-        paginator = Paginator(queryset, self.per_page)
-        if self.paginated:
-            page_obj = paginator.get_page(self.page_number)
-        else:
+        if not related and isinstance(queryset, QuerySet):
+            select_related = self.get_list_select_related(
+                queryset.model, self._get_list_form_fields()
+            )
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+
+        # 4. Pagination (views whose data lives in the context, such as the
+        # dashboard, return an empty list and skip it)
+        if not self.paginated or (isinstance(queryset, list) and not queryset):
             page_obj = queryset
+        elif self.pagination_mode == "cursor" and isinstance(queryset, QuerySet):
+            paginator = CursorPaginator(
+                queryset, self.per_page, estimate_total=self.cursor_estimated_total
+            )
+            page_obj = paginator.get_page(self.request.GET.get("cursor"))
+            # Keep templates from evaluating the whole queryset
+            context["object_list"] = page_obj.object_list
+        else:
+            page_obj = Paginator(queryset, self.per_page).get_page(self.page_number)
         context["page_obj"] = page_obj
 
         # 5. Field Extraction Logic
@@ -226,8 +277,8 @@ class BaseView:
             context["field_values_page"] = field_values_page
 
         # Extract table headers from the first row of results
-        if field_values_page and len(field_values_page) > 0:
-            context["table_headers"] = [i[0] for i in field_values_page[0]]
+        if field_values_page:
+            context["table_headers"] = field_values_page.headers
 
         # Detail view specific context
         if hasattr(self, "object"):
@@ -253,7 +304,8 @@ class BaseView:
         """Get field values for display in templates.
 
         For list views (page_obj provided):
-            Returns a list of field value tuples for each item.
+            Returns a FieldValuesPage (see db.rows) with one row per item;
+            each row iterates as (field_name, field_value) tuples.
             Supports customization options:
             - field_values_include: Only include these fields
             - field_values_exclude: Exclude these fields
@@ -266,41 +318,24 @@ class BaseView:
             - field_values_extra: Additional (name, value) tuples to append
         """
         if page_obj is not None:
-            results = []
+            results = FieldValuesPage()
+            form_fields = self._get_list_form_fields()
+            items = [item for item in page_obj if item is not None]
+            self._prefetch_foreign_keys(items, form_fields, related)
+            note_counts = {}
+            if self.list_note_counts and not related and not search:
+                note_counts = get_note_counts(items)
 
-            # Get form fields for list view customization
-            if hasattr(self, "form_class"):
-                if not hasattr(self, "_cached_form_fields"):
-                    self._cached_form_fields = list(self.form_class().fields.keys())
-                form_fields = self._cached_form_fields.copy()
-
-                # Apply field_values_include filter if specified
-                if self.field_values_include is not None:
-                    form_fields = [
-                        f for f in form_fields if f in self.field_values_include
-                    ]
-
-                # Apply field_values_exclude filter if specified
-                if self.field_values_exclude is not None:
-                    form_fields = [
-                        f for f in form_fields if f not in self.field_values_exclude
-                    ]
-            else:
-                # Fallback to hardcoded attributes if no form_class
-                form_fields = ["amount", "cost", "net", "hours"]
-
-            for item in page_obj:
-                if item is None:
-                    continue
-
-                field_values = [
-                    ("type", item._meta.model_name),
-                    ("id", item.id),
-                ]
+            # If it's a single object (not a paginator object list)
+            with_item = not hasattr(page_obj, "object_list")
+
+            for item in items:
+                names = ["type", "id"]
+                values = [item._meta.model_name, item.id]
 
-                # If it's a single object (not a paginator object list)
-                if not hasattr(page_obj, "object_list"):
-                    field_values.append(("item", item))
+                if with_item:
+                    names.append("item")
+                    values.append(item)
 
                 # For related views, use the item's model-specific form to get fields
                 item_form_fields = form_fields
@@ -310,21 +345,22 @@ class BaseView:
                 # Add form fields that exist on the item
                 for field_name in item_form_fields:
                     if hasattr(item, field_name):
-                        field_values.append((field_name, getattr(item, field_name)))
+                        names.append(field_name)
+                        values.append(getattr(item, field_name))
 
                 # Append any extra fields specified by the view
                 if self.field_values_extra is not None:
-                    field_values.extend(self.field_values_extra)
+                    for field_name, field_value in self.field_values_extra:
+                        names.append(field_name)
+                        values.append(field_value)
 
-                results.append(field_values)
+                results.append(names, values, note_counts.get(item, 0))
             return results
 
         # Logic for Detail View field extraction
         try:
-            # Get all form fields (use cached form if available to avoid re-instantiation)
-            if not hasattr(self, "_cached_form_fields"):
-                self._cached_form_fields = list(self.form_class().fields.keys())
-            form_fields = self._cached_form_fields.copy()
+            # Get all form fields from the registry (no form instantiation)
+            form_fields = list(self.get_form_field_set().fields)
 
             # Apply field_values_include filter if specified
             if self.field_values_include is not None:
@@ -347,6 +383,56 @@ class BaseView:
         except (AttributeError, TypeError):
             return []
 
+    def _get_list_form_fields(self):
+        """Get the form fields shown in list rows, after include/exclude."""
+        if not hasattr(self, "form_class"):
+            # Fallback to hardcoded attributes if no form_class
+            return ["amount", "cost", "net", "hours"]
+
+        form_fields = list(self.get_form_field_set().fields)
+
+        # Apply field_values_include filter if specified
+        if self.field_values_include is not None:
+            form_fields = [f for f in form_fields if f in self.field_values_include]
+
+        # Apply field_values_exclude filter if specified
+        if self.field_values_exclude is not None:
+            form_fields = [f for f in form_fields if f not in self.field_values_exclude]
+        return form_fields
+
+    def get_list_select_related(self, model, field_names):
+        """Get the foreign keys to load with list rows of ``model``."""
+        if self.list_select_related is False:
+            return []
+        if self.list_select_related is not None and model is self.model:
+            return list(self.list_select_related)
+        return get_foreign_key_fields(model, field_names)
+
+    def _prefetch_foreign_keys(self, items, form_fields, related=False):
+        """Load the displayed foreign keys of list rows in batches.
+
+        Rows already loaded with select_related() are skipped; mixed-model
+        lists (related and search views) get one query per related model.
+        """
+        by_model = defaultdict(list)
+        for item in items:
+            by_model[item.__class__].append(item)
+        for model, instances in by_model.items():
+            fields = (
+                self._get_model_form_fields(instances[0]) if related else form_fields
+            )
+            names = self.get_list_select_related(model, fields)
+            if names:
+                prefetch_related_objects(instances, *names)
+
+    def _get_user(self):
+        request = getattr(self, "request", None)
+        return getattr(request, "user", None)
+
+    def get_form_field_set(self):
+        """Get the registry FieldSet of the view's form for the current user."""
+        return get_form_field_set(self.form_class, self._get_user())
+
     def _get_model_form_fields(self, item):
         """Get form fields for a specific model instance.
 
@@ -356,75 +442,40 @@ class BaseView:
         Returns:
             List of field names from the item's corresponding form
         """
-        from .. import forms
-
-        # Map model names to their form classes
-        model_name = item._meta.model_name
-        form_class_name = f"{model_name.capitalize()}Form"
-
-        # Try to get the form class from the forms module
-        form_class = getattr(forms, form_class_name, None)
-
-        if form_class is not None:
-            # First, try accessing Meta.fields directly (most reliable)
-            try:
-                if hasattr(form_class, "Meta") and hasattr(form_class.Meta, "fields"):
-                    meta_fields = form_class.Meta.fields
-                    # Handle both tuple and list
-                    fields = list(meta_fields) if meta_fields != "__all__" else None
-                    if fields is not None:
-                        return fields
-            except (AttributeError, TypeError):
-                pass
-
-            # If Meta.fields didn't work, try instantiating the form
-            try:
-                # For forms that may need user context (like TimeForm), provide basic instantiation
-                # Most ModelForms should work fine with no arguments
-                form_instance = form_class()
-                fields = list(form_instance.fields.keys())
-                return fields
-            except (TypeError, ValueError, AttributeError, ImportError):
-                # If instantiation fails, we already tried Meta.fields above
-                pass
+        field_set = get_model_field_set(item.__class__, self._get_user())
+        if field_set is not None:
+            return list(field_set.fields)
 
         # Fallback to using the view's form_class if available
         # Only use this if the item's model matches the view's model
-        if hasattr(self, "form_class") and hasattr(self, "model"):
-            if item._meta.model == self.model:
-                fields = list(self.form_class().fields.keys())
-                return fields
+        if hasattr(self, "form_class") and item._meta.model == self.model:
+            return list(self.get_form_field_set().fields)
 
         # Final fallback to basic fields
         return ["amount", "cost", "net", "hours"]
 
     def get_page_obj_detail_view(self):
-        """Get pagination context for detail view navigation."""
+        """Get first/previous/next/last navigation for the detail view.
+
+        Neighbors are found from the current object's sort key (see
+        CursorPaginator.get_neighbors), so each is a single-document range
+        query instead of an offset into the collection.
+        """
         user = self.request.user
         if user.is_authenticated and not user.is_superuser:
             objects = self.model.objects.filter(user=user)
         else:
             objects = self.model.objects.all()
 
-        count = objects.count()
-        page_number = self._get_int_param("page_number_detail", 1)
-
-        # Use slicing for better performance on large querysets
-        try:
-            current_obj = objects[page_number - 1]
-            next_obj = objects[page_number] if page_number < count else None
-            prev_obj = objects[page_number - 2] if page_number > 1 else None
-        except (IndexError, AssertionError):
-            current_obj = next_obj = prev_obj = None
-
-        return {
-            "page_obj": current_obj,
-            "next_object": next_obj,
-            "previous_object": prev_obj,
-            "first_object": objects.first(),
-            "last_object": objects.last(),
-            "count": count,
-        }
+        paginator = CursorPaginator(objects, per_page=1)
+        if self.object is None:
+            # Create views have no current object; link to the ends only
+            return {
+                "page_obj": None,
+                "first_object": paginator.get_first(),
+                "last_object": paginator.get_last(),
+            }
+        return {"page_obj": self.object, **paginator.get_neighbors(self.object)}
 
     def _get_notes_for_object(self):
         """Get notes attached to the current object via generic foreign key.
@@ -434,22 +485,7 @@ class BaseView:
         """
         if not hasattr(self, "object") or self.object is None:
             return None
-
-        try:
-            from django.contrib.contenttypes.models import ContentType
-            from ..models import Note
-
-            content_type = ContentType.objects.get_for_model(self.object.__class__)
-            notes = list(
-                Note.objects.filter(
-                    content_type=content_type, object_id=str(self.object.pk)
-                ).order_by("-created")
-            )
-
-            return notes if notes else None
-        except Exception:
-            # Silently fail if Note model doesn't exist or other issues
-            return None
+        return get_notes(self.object) or None
 
     def get_statcards(self):
         """Get statistics cards data (stub)."""
@@ -1,7 +1,5 @@
 """Client-related views."""
 
-from itertools import chain
-
 from django.http import HttpResponseRedirect
 from django.shortcuts import reverse
 from django.urls import reverse_lazy
@@ -15,7 +13,8 @@ from django.views.generic import (
 
 from .base import BaseView, FakeDataMixin, SuperuserRequiredMixin
 from ..forms import ClientForm
-from ..models import Client, Company, Invoice
+from ..models import Client, Company
+from ..related import flatten_related, load_related
 
 
 class BaseClientView(BaseView, SuperuserRequiredMixin):
@@ -63,16 +62,8 @@ class ClientDetailView(BaseClientView, DetailView):
     template_name = "view.html"
 
     def get_context_data(self, **kwargs):
-        client = self.get_object()
-        projects = client.projects.all()
-        company = client.company
-        invoices = Invoice.objects.filter(project__in=projects)
-        invoices = invoices.order_by("-created")
-        queryset_related = [q for q in [projects, invoices] if q.exists()]
-        if company:
-            queryset_related.insert(0, [company])
-        queryset_related = list(chain(*queryset_related))
-        self._queryset_related = queryset_related
+        # Company, projects and their invoices (see db.related)
+        self._queryset_related = flatten_related(load_related(self.object))
         self.has_related = True
         context = super().get_context_data(**kwargs)
         context["is_detail_view"] = True
@@ -2,14 +2,16 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.db.models import F, Q, Sum
+from django.db.models import Q
 from django.http import HttpResponseRedirect
 from django.shortcuts import render, reverse
-from django.utils import timezone
 from django.views.generic import ListView
 
 from .base import BaseView
-from ..models import Client, Invoice, Note, Time
+from ..models import Invoice, Time
+from .. import instrumentation
+from ..slowlog import get_top_offenders
+from ..statistics import get_analytics, get_dashboard_statistics
 
 User = get_user_model()
 
@@ -59,20 +61,15 @@ class DashboardView(BaseView, UserPassesTestMixin, ListView):
             }
         )
 
-        times = context["times"]
-        entered = times.aggregate(total=Sum(F("hours")))["total"] or 0
-        approved = (
-            times.filter(invoice__isnull=False).aggregate(total=Sum(F("hours")))[
-                "total"
-            ]
-            or 0
+        # All statcards and chart datasets come from one aggregation
+        statistics = get_dashboard_statistics(
+            user=None if self.request.user.is_superuser else self.request.user
         )
-
-        gross = (
-            get_base_queryset(Invoice).aggregate(amount=Sum(F("amount")))["amount"] or 0
-        )
-        cost = get_base_queryset(Invoice).aggregate(cost=Sum(F("cost")))["cost"] or 0
-        net = get_base_queryset(Invoice).aggregate(net=Sum(F("net")))["net"] or 0
+        entered = statistics["times"]["entered"]
+        approved = statistics["times"]["approved"]
+        gross = statistics["invoices"]["gross"]
+        cost = statistics["invoices"]["cost"]
+        net = statistics["invoices"]["net"]
 
         context.update(
             {
@@ -125,45 +122,12 @@ class AnalyticsView(BaseView, UserPassesTestMixin, ListView):
         context["analytics_nav"] = True
         context["dashboard"] = self.dashboard
 
-        try:
-            from blog.models import Entry
-        except ImportError:  # pragma: no cover - blog app always installed
-            Entry = None
+        # Counts are cached; see db.statistics for TTL and invalidation
+        context["analytics"] = get_analytics()
 
-        now = timezone.now()
-        since_datetime = now - timezone.timedelta(days=30)
-        since_date = now.date() - timezone.timedelta(days=30)
-
-        contact_submissions = Note.objects.filter(
-            name__startswith="Contact form submission"
-        )
-        testimonials = Note.objects.filter(is_testimonial=True)
-        entries = Entry.objects.filter(status=Entry.PUBLISHED) if Entry else None
-
-        context["analytics"] = {
-            "contacts": {
-                "total": contact_submissions.count(),
-                "last_30_days": contact_submissions.filter(
-                    created__gte=since_datetime
-                ).count(),
-            },
-            "testimonials": {
-                "total": testimonials.count(),
-                "featured": testimonials.filter(is_featured=True).count(),
-            },
-            "clients": {
-                "total": Client.objects.count(),
-                "featured": Client.objects.filter(featured=True).count(),
-            },
-            "blog": {
-                "published": entries.count() if entries is not None else 0,
-                "last_30_days": (
-                    entries.filter(pub_date__gte=since_date).count()
-                    if entries is not None
-                    else 0
-                ),
-            },
-        }
+        # Slowest command shapes, to find queries that need indexes
+        if settings.SLOW_COMMAND_LOG_ENABLED:
+            context["slow_commands"] = get_top_offenders()
 
         context["ga_measurement_id"] = getattr(settings, "GA_MEASUREMENT_ID", "")
         context["ga_dashboard_url"] = getattr(
@@ -175,6 +139,22 @@ class AnalyticsView(BaseView, UserPassesTestMixin, ListView):
         return context
 
 
+class PerformanceView(AnalyticsView):
+    """Per-view MongoDB command counts and timings from db.instrumentation."""
+
+    template_name = "dashboard/performance.html"
+
+    def get_context_data(self, **kwargs):
+        context = super(AnalyticsView, self).get_context_data(**kwargs)
+        context["overview_nav"] = True
+        context["analytics_nav"] = True
+        context["dashboard"] = self.dashboard
+        context["instrumentation_enabled"] = settings.INSTRUMENTATION_ENABLED
+        context["sample_rate"] = settings.INSTRUMENTATION_SAMPLE_RATE
+        context["view_stats"] = instrumentation.get_summary()
+        return context
+
+
 def display_mode(request):
     mode = request.GET.get("display-mode", "dark")
     profile = request.user.profile
@@ -3,10 +3,10 @@
 import io
 import locale
 from decimal import Decimal
-from itertools import chain
 
 from dateutil.relativedelta import relativedelta
-from django.http import FileResponse
+from django.db import transaction
+from django.http import FileResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.template.loader import get_template
 from django.urls import reverse_lazy
@@ -29,7 +29,9 @@ from .base import (
     SuperuserRequiredMixin,
 )
 from ..forms import InvoiceForm, TimeEntryFormSet
+from ..invoicing import coalesce_invoice_totals, get_invoice_statistics
 from ..models import Invoice, Project, Time
+from ..related import flatten_related, load_related
 
 locale.setlocale(locale.LC_ALL, "")
 
@@ -104,84 +106,42 @@ class InvoiceDetailView(BaseInvoiceView, DetailView):
     template_name = "view.html"
 
     def get_context_data(self, **kwargs):
-        invoice = self.get_object()
-        times = invoice.times.all().order_by("date")
-        project = invoice.project
-        queryset_related = [q for q in [times] if q.exists()]
-        if project:
-            queryset_related.append([project])
-            client = invoice.project.client
-            if client:
-                queryset_related.append([client])
-                # Add company through client if exists
-                if client.company:
-                    queryset_related.append([client.company])
-        queryset_related = list(chain(*queryset_related))
-        self._queryset_related = queryset_related
+        invoice = self.object
+        # Time entries, project, client and company (see db.related)
+        related = load_related(invoice)
+        times = related["times"]
+        self._queryset_related = flatten_related(related)
         self.has_related = True
 
-        # Calculate user-based statistics
-        from collections import defaultdict
-
-        user_stats = defaultdict(
-            lambda: {
-                "hours": Decimal("0"),
-                "amount": Decimal("0"),
-                "cost": Decimal("0"),
-                "rate": None,
-            }
-        )
-
-        for time_entry in times:
-            if time_entry.user:
-                user_key = time_entry.user.username
-                hours = time_entry.hours or Decimal("0")
-                amount = time_entry.amount or Decimal("0")
-
-                user_stats[user_key]["hours"] += hours
-                user_stats[user_key]["amount"] += amount
-                user_stats[user_key]["rate"] = time_entry.user.rate
-                user_stats[user_key]["user"] = time_entry.user
-
-                # Calculate cost (user rate * hours)
-                if time_entry.user.rate:
-                    user_stats[user_key]["cost"] += time_entry.user.rate * hours
-
-        # Convert to list for template iteration
+        # Per-user statistics come from one server-side aggregation
         user_calculations = []
         total_hours = Decimal("0")
         total_amount = Decimal("0")
         total_cost = Decimal("0")
 
-        for username, stats in user_stats.items():
-            cost = stats["cost"]
+        for stats in get_invoice_statistics(invoice)["users"]:
+            hours = stats["hours"]
             amount = stats["amount"]
-            difference = amount - cost
+            cost = stats["cost"]
 
-            # Calculate average task rate (amount / hours) after all entries are summed
-            task_rate = None
-            if stats["hours"] > 0:
-                task_rate = stats["amount"] / stats["hours"]
+            # Average task rate (amount / hours) across the user's entries
+            task_rate = amount / hours if hours > 0 else None
 
             user_calculations.append(
                 {
-                    "user": stats["user"],
-                    "username": username,
-                    "hours": stats["hours"],
-                    "user_rate": stats["rate"],
+                    "username": stats["username"],
+                    "hours": hours,
+                    "user_rate": stats["user_rate"],
                     "task_rate": task_rate,
                     "cost": cost,
                     "amount": amount,
-                    "difference": difference,
+                    "difference": amount - cost,
                 }
             )
-            total_hours += stats["hours"]
+            total_hours += hours
             total_amount += amount
             total_cost += cost
 
-        # Sort by username for consistent display
-        user_calculations.sort(key=lambda x: x["username"])
-
         # Define extra field values with formatted currency
         # Use safe formatting with None checks
         # self.field_values_extra = [
@@ -261,10 +221,12 @@ class InvoiceUpdateView(
         time_formset = self.get_time_formset()
 
         if time_formset.is_valid():
-            self.object = form.save()
-            time_formset.instance = self.object
-            time_formset.save()
-            return super().form_valid(form)
+            # Recalculate the invoice once for the whole formset, not per row
+            with transaction.atomic(), coalesce_invoice_totals():
+                self.object = form.save()
+                time_formset.instance = self.object
+                time_formset.save()
+            return HttpResponseRedirect(self.get_success_url())
         else:
             return self.render_to_response(
                 self.get_context_data(form=form, time_formset=time_formset)
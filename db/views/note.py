@@ -28,6 +28,7 @@ class BaseNoteView(BaseView, SuperuserRequiredMixin):
 class NoteListView(BaseNoteView, ListView):
     model = Note
     template_name = "index.html"
+    pagination_mode = "cursor"
 
 
 class NoteListFullScreen(NoteListView, ListView):
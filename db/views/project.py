@@ -1,7 +1,5 @@
 """Project-related views."""
 
-from itertools import chain
-
 from django.http import HttpResponseRedirect
 from django.shortcuts import reverse
 from django.urls import reverse_lazy
@@ -16,7 +14,8 @@ from django.views.generic import (
 
 from .base import BaseView, FakeDataMixin, SuperuserRequiredMixin
 from ..forms import ProjectForm
-from ..models import Client, Invoice, Project
+from ..models import Client, Project
+from ..related import flatten_related, load_related
 
 
 class BaseProjectView(BaseView, SuperuserRequiredMixin):
@@ -96,19 +95,8 @@ class ProjectDetailView(BaseProjectView, DetailView):
     template_name = "view.html"
 
     def get_context_data(self, **kwargs):
-        project = self.get_object()
-        client = project.client
-        company = None
-        if client:
-            company = client.company
-        invoices = Invoice.objects.filter(project=project).order_by("-created")
-        queryset_related = [q for q in [invoices] if q.exists()]
-        queryset_related = list(chain(*queryset_related))
-        if company:
-            queryset_related.insert(0, company)
-        if client:
-            queryset_related.insert(0, client)
-        self._queryset_related = queryset_related
+        # Client, company and invoices (see db.related)
+        self._queryset_related = flatten_related(load_related(self.object))
         self.has_related = True
         context = super().get_context_data(**kwargs)
         context["is_detail_view"] = True
@@ -1,30 +1,9 @@
 """Search views."""
 
-from django.db.models import Q
 from django.views.generic import ListView
 
 from .base import BaseView, SuperuserRequiredMixin
-from ..models import (
-    Client,
-    Company,
-    Contact,
-    Invoice,
-    Note,
-    Project,
-    Task,
-    Time,
-)
-
-SEARCH_MODELS = (
-    Client,
-    Company,
-    Contact,
-    Invoice,
-    Note,
-    Project,
-    Task,
-    Time,
-)
+from .. import search as search_index
 
 
 class SearchView(SuperuserRequiredMixin, BaseView, ListView):
@@ -44,18 +23,11 @@ class SearchView(SuperuserRequiredMixin, BaseView, ListView):
         return context
 
     def get_queryset(self):
-        """Search across multiple models."""
-        queryset = []
+        """Search across multiple models using the token index.
+
+        Returns lazy, ranked results; only the displayed page is loaded.
+        """
         query = self.request.GET.get("q")
-        if query:
-            query = query.split()
-            for search_model in SEARCH_MODELS:
-                q = Q()
-                for search_term in query:
-                    for field in search_model._meta.fields:
-                        # Only search text fields
-                        if field.__class__.__name__ == "CharField":
-                            q |= Q(**{f"{field.name}__icontains": search_term})
-                if q:
-                    queryset += search_model.objects.filter(q)
-        return queryset
+        if not query:
+            return []
+        return search_index.search(query)
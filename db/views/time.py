@@ -1,7 +1,5 @@
 """Time-related views."""
 
-from itertools import chain
-
 from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy, reverse
 from django.views.generic import (
@@ -20,8 +18,10 @@ from .base import (
     ModelCopyMixin,
     RedirectToObjectViewMixin,
 )
+from ..default_tasks import get_project_default_task
 from ..forms import TimeForm
-from ..models import Time, Invoice, Task
+from ..models import Time, Invoice
+from ..related import flatten_related, load_related
 
 
 class BaseTimeView(BaseView, AuthenticatedRequiredMixin):
@@ -63,6 +63,7 @@ class TimeCreateView(
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         invoice_id = self.request.GET.get("invoice_id")
+        project_id = None
         if invoice_id:
             if "form" in context and hasattr(context["form"], "initial"):
                 # Only set invoice initial if field exists (admin users)
@@ -75,6 +76,7 @@ class TimeCreateView(
                         invoice = Invoice.objects.get(pk=invoice_id)
                         if invoice.project:
                             context["form"].initial["project"] = invoice.project
+                            project_id = invoice.project_id
                     except Invoice.DoesNotExist:
                         pass
 
@@ -84,7 +86,8 @@ class TimeCreateView(
             and "form" in context
             and "task" in context["form"].fields
         ):
-            default_task = Task.get_default_task()
+            # The project's default task, as the time_api lookups return it
+            default_task = get_project_default_task(project_id)
             context["form"].initial["task"] = default_task
         return context
 
@@ -93,10 +96,11 @@ class TimeCreateView(
         obj = form.save(commit=False)
         # Always assign the logged-in user to new time entries
         obj.user = self.request.user
+        if invoice_id:
+            # Attach before the single save so the invoice is updated once
+            obj.invoice = Invoice.objects.get(pk=invoice_id)
         obj.save()
         if invoice_id:
-            invoice = Invoice.objects.get(pk=invoice_id)
-            invoice.times.add(obj)
             return HttpResponseRedirect(reverse("invoice_view", args=[invoice_id]))
         return super().form_valid(form)
 
@@ -111,21 +115,7 @@ class TimeListView(
 ):
     template_name = "index.html"
     ordering = ["-date"]  # Newest entries first
-
-    def get_field_values(self, page_obj=None, search=False, related=False):
-        """Override to pass user context when caching form fields.
-
-        This ensures that admin users see the invoice field in the table,
-        while non-admin users don't (since it's removed from their form).
-        """
-        # Cache form fields with user context for proper field visibility
-        if page_obj is not None and hasattr(self, "form_class"):
-            if not hasattr(self, "_cached_form_fields"):
-                # Pass user to form so it knows which fields to include
-                form = self.form_class(user=self.request.user)
-                self._cached_form_fields = list(form.fields.keys())
-
-        return super().get_field_values(page_obj, search, related)
+    pagination_mode = "cursor"
 
 
 class TimeDetailView(BaseTimeView, DetailView):
@@ -138,28 +128,10 @@ class TimeDetailView(BaseTimeView, DetailView):
         return self.request.user.is_superuser or self.request.user == time.user
 
     def get_context_data(self, **kwargs):
-        time = self.get_object()
-        queryset_related = []
-
-        # Add invoice if exists
-        if time.invoice:
-            queryset_related.append([time.invoice])
-
-        # Add project if exists
-        if time.project:
-            queryset_related.append([time.project])
-
-            # Add client through project if exists
-            if time.project.client:
-                queryset_related.append([time.project.client])
-
-                # Add company through client if exists
-                if time.project.client.company:
-                    queryset_related.append([time.project.client.company])
-
-        # Flatten the list and set as related queryset
+        # Invoice, project, client and company in one query (see db.related)
+        queryset_related = flatten_related(load_related(self.object))
         if queryset_related:
-            self._queryset_related = list(chain(*queryset_related))
+            self._queryset_related = queryset_related
             self.has_related = True
 
         context = super().get_context_data(**kwargs)
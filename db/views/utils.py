@@ -9,6 +9,9 @@ from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import reverse
 from django.views.decorators.http import require_GET
 
+from ..default_tasks import get_project_default_task
+from ..invoicing import coalesce_invoice_totals
+
 
 def get_model_config(model_name):
     """
@@ -70,6 +73,7 @@ def get_model_config(model_name):
 
 
 @transaction.atomic
+@coalesce_invoice_totals()
 def update_selected_entries(request):
     if request.method != "POST":
         return HttpResponseRedirect(reverse("dashboard"))
@@ -136,6 +140,8 @@ def update_selected_entries(request):
     return HttpResponseRedirect(reverse(f"{model_name}_index"))
 
 
+@transaction.atomic
+@coalesce_invoice_totals()
 def update_related_entries(request):
     """
     Update multiple related entries (delete, save, etc.).
@@ -204,9 +210,8 @@ def time_api_invoice(request, pk):
     if not request.user.is_superuser:
         return JsonResponse({"error": "Forbidden"}, status=403)
     Invoice = apps.get_model("db", "Invoice")
-    Task = apps.get_model("db", "Task")
     try:
-        invoice = Invoice.objects.get(pk=pk)
+        invoice = Invoice.objects.select_related("project").get(pk=pk)
     except Invoice.DoesNotExist:
         return JsonResponse({}, status=404)
     data = {
@@ -218,7 +223,7 @@ def time_api_invoice(request, pk):
     if invoice.project:
         data["project_id"] = str(invoice.project.pk)
         data["project_name"] = str(invoice.project)
-        task = invoice.project.default_task or Task.get_default_task()
+        task = get_project_default_task(invoice.project_id)
         data["default_task_id"] = str(task.pk)
         data["default_task_name"] = str(task)
     return JsonResponse(data)
@@ -231,12 +236,11 @@ def time_api_project(request, pk):
     if not request.user.is_superuser:
         return JsonResponse({"error": "Forbidden"}, status=403)
     Project = apps.get_model("db", "Project")
-    Task = apps.get_model("db", "Task")
     try:
-        project = Project.objects.get(pk=pk)
+        # Cached per process, see db.default_tasks
+        task = get_project_default_task(pk)
     except Project.DoesNotExist:
         return JsonResponse({}, status=404)
-    task = project.default_task or Task.get_default_task()
     data = {
         "default_task_id": str(task.pk),
         "default_task_name": str(task),
@@ -150,6 +150,10 @@ run_migrations() {
     echo -e "${GREEN}Running database migrations...${NC}"
     cd ${DEPLOY_DIR}
     ${DEPLOY_DIR}/.venv/bin/python manage.py migrate --noinput
+    ${DEPLOY_DIR}/.venv/bin/python manage.py createcachecollection
+    ${DEPLOY_DIR}/.venv/bin/python manage.py create_slow_log
+    ${DEPLOY_DIR}/.venv/bin/python manage.py rerender_posts
+    ${DEPLOY_DIR}/.venv/bin/python manage.py backfill_entry_summaries
 }
 
 # Setup The Lounge IRC client
@@ -179,9 +183,11 @@ setup_thelounge() {
 setup_systemd() {
     echo -e "${GREEN}Setting up systemd services...${NC}"
     cp ${DEPLOY_DIR}/deployment/aclarknet.service ${SYSTEMD_DIR}/
+    cp ${DEPLOY_DIR}/deployment/aclarknet-outbox.service ${SYSTEMD_DIR}/
     cp ${DEPLOY_DIR}/deployment/thelounge.service ${SYSTEMD_DIR}/
     systemctl daemon-reload
     systemctl enable aclarknet.service
+    systemctl enable aclarknet-outbox.service
     systemctl enable thelounge.service
 }
 
@@ -198,6 +204,7 @@ setup_nginx() {
 restart_services() {
     echo -e "${GREEN}Restarting services...${NC}"
     systemctl restart aclarknet.service
+    systemctl restart aclarknet-outbox.service
 
     # Check status
     if systemctl is-active --quiet aclarknet.service; then